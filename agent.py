@@ -6,17 +6,20 @@
 
 import numpy as np
 import random
+import time
 from matplotlib import pyplot as plt
 
-from gym_hnef import hnef_game, hnef_vars
+from gym_hnef import hnef_game, hnef_vars, hnef_backend, hnef_compact, hnef_symmetry, action_codec
 from gym_hnef.envs import hnef_env
 
 import config
 import mcts as monte
+import mcts_array
+import parallel_mcts
+import eval_cache
 from mcts import Node
 
-import action_ids
-import small_action_space as small_action_ids
+game = hnef_backend.get_backend(config.GAME_BACKEND)
 
 
 class RandomAgent():
@@ -27,7 +30,7 @@ class RandomAgent():
 
     # Method for the random agent to pick a valid action randomly
     def act(self, state, tau):
-        valid_moves = hnef_game.compute_valid_moves(state)
+        valid_moves = game.compute_valid_moves(game.from_array(state))
         return valid_moves[random.randrange(len(valid_moves))], None
 
 class Agent():
@@ -37,10 +40,27 @@ class Agent():
         self.name = name
         self.model = model
         self.mcts = None
+        self.root_transform = 0
 
         self.state_size = state_size
         self.action_size = action_size
+        # the layout of the action ids follows from the size of the policy (see action_codec)
+        self.board_size = action_codec.board_size(action_size)
+        self.action_layout = action_codec.layout(action_size)
         self.num_sims = config.MCTS_SIMS
+        self.tree_store = config.MCTS_TREE
+        self.leaf_batch = config.MCTS_LEAF_BATCH
+        self.node_budget = config.MCTS_NODE_BUDGET
+        self.time_limit = config.MCTS_TIME_LIMIT
+        self.early_stop = config.MCTS_EARLY_STOP
+        self.search_sims = 0    # simulations and seconds of the last search
+        self.search_time = 0.0
+        self.cache = eval_cache.EvaluationCache(config.EVAL_CACHE_MB * 2**20)
+
+        # with config.MCTS_PARALLEL the searches run in worker processes (see parallel_mcts.py)
+        self.parallel = None
+        if config.MCTS_PARALLEL is not None:
+            self.parallel = parallel_mcts.ParallelSearch(model, action_size, config.MCTS_PARALLEL, config.MCTS_WORKERS)
 
     # Method for running simulations from the current state
     #       moving to a terminal node, evaluating the leaf and updating the MCTS
@@ -49,70 +69,192 @@ class Agent():
         value, path = self.evaluate_leaf(leaf, value, done, path)
         self.mcts.backpropagation(leaf, value, path)
 
+    # Method for running a round of simulations that share one call to the neural network
+    #       each traversal adds a virtual loss to the edges of its path so that the next traversals of the
+    #       round are steered towards other leaves, the losses are removed before the results are backed up
+    # In: self, count (number of traversals in the round)
+    def simulate_batch(self, count):
+        traversals = []
+        for i in range(count):
+            leaf, value, done, path = self.mcts.traverse_tree()
+            self.mcts.add_virtual_loss(path, config.VIRTUAL_LOSS)
+            traversals.append((leaf, value, done, path))
+
+        # evaluate every unfinished leaf once, even if several traversals reached it
+        leaves = []
+        for leaf, value, done, path in traversals:
+            if done == 0 and self.mcts.is_leaf(leaf) and leaf not in leaves:
+                leaves.append(leaf)
+        leaf_values = {}
+        if len(leaves) > 0:
+            predictions = self.get_predictions_batch([self.mcts.get_state(leaf) for leaf in leaves])
+            for leaf, (value, priors, possible_actions, possible_actions_ids) in zip(leaves, predictions):
+                self.mcts.expand(leaf, possible_actions, priors)
+                leaf_values[leaf] = value
+
+        for leaf, value, done, path in traversals:
+            self.mcts.remove_virtual_loss(path, config.VIRTUAL_LOSS)
+            if done == 0:
+                value = leaf_values.get(leaf, value)
+            self.mcts.backpropagation(leaf, value, path)
+
+    # Method for running the simulations of a search from a state, in this process or in the worker processes
+    #       of self.parallel (see parallel_mcts.py, which only uses the simulation count)
+    #       the search runs num_sims simulations unless it runs out of time (time_limit seconds), the tree reaches
+    #       its node budget, the result of the root is proven (see mcts.WIN), or (with early_stop, only when tau is 0)
+    #       the most visited action is settled
+    # In: self, state (game state of the backend), tau (the exploration constant the action is chosen with)
+    def search(self, state, tau=1):
+        start = time.perf_counter()
+        self.search_sims = self.num_sims
+        if self.parallel is not None:
+            self.parallel_statistics = self.parallel.search(game.to_array(state), self.num_sims)
+            self.search_time = time.perf_counter() - start
+            return
+
+        if self.mcts == None or monte.state_id(state) not in self.mcts.tree:
+            self.build_mcts(state)
+        else:
+            self.change_root_mcts(state)
+        self.root_transform = self.get_root_transform(state)
+        # every search samples its own noise for the priors of the root
+        self.mcts.clear_noise()
+
+        sim = 0
+        # the search stops early once the tree reaches its node budget or the time is up, and at once when the
+        # result of the root is proven
+        while sim < self.num_sims and not self.mcts.is_solved(self.mcts.root) and (sim == 0 or (len(self.mcts) < self.node_budget and not self.out_of_time(start))):
+            # a new root is expanded on its own, otherwise every traversal of the round would stop at it
+            if self.leaf_batch > 1 and not self.mcts.is_leaf(self.mcts.root):
+                count = min(self.leaf_batch, self.num_sims - sim)
+                self.simulate_batch(count)
+            else:
+                count = 1
+                self.simulate()
+            sim += count
+
+            if self.early_stop and tau == 0 and self.is_settled(sim, start):
+                break
+
+        self.search_sims = sim
+        self.search_time = time.perf_counter() - start
+
+    def out_of_time(self, start):
+        return self.time_limit is not None and time.perf_counter() - start >= self.time_limit
+
+    # Checks if the most visited action of the root can no longer be overtaken by the simulations that are left,
+    #       the simulations that are left are bounded by the simulation count and the time left at the speed of the
+    #       search so far (the node budget isn't a bound, a simulation that ends on a finished, proven or known
+    #       position adds no node)
+    # In: self, sim (simulations run so far), start (time the search started)
+    # Out: True if the search can stop
+    def is_settled(self, sim, start):
+        if self.mcts.is_leaf(self.mcts.root):
+            return False
+        _, visits, _ = self.mcts.root_statistics()
+        if len(visits) == 1:
+            return True
+
+        remaining = self.num_sims - sim
+        if self.time_limit is not None:
+            elapsed = time.perf_counter() - start
+            remaining = min(remaining, sim * (self.time_limit - elapsed) / max(elapsed, 1e-9))
+
+        second, best = np.sort(visits)[-2:]
+        return best - second > remaining
+
     # Method for running simulations and choosing an action
     # In: self, state (current state), tau (exploratory constant)
     # Out: action selected, current policy and values as well as values from the neural network
     def act(self, state, tau):
-        if self.mcts == None or monte.Node(state).id not in self.mcts.tree:
-            self.build_mcts(state)
-        else:
-            self.change_root_mcts(state)
-        
-        for sim in range(self.num_sims):
-            self.simulate()
+        state = game.from_array(state)
+
+        self.search(state, tau)
         
         pi, values, = self.get_action_values(tau=1)
         
         action, value = self.choose_action(pi, values, tau)
         
-        if self.action_size == 625:
-            action = small_action_ids.action_id[action]
-        else:
-            action = action_ids.action_id[action]
+        action = action_codec.decode(action, self.board_size, self.action_layout)
 
-        valid_moves = hnef_game.compute_valid_moves(state)
+        # the valid moves of the root are the actions of its edges
+        valid_moves, _, _ = self.root_statistics()
         # We rarely got errors where we got invalid moves, so when that
         # happens, we choose a random action
-        if action not in valid_moves:
+        if action not in set(valid_moves):
             action = valid_moves[np.random.randint(len(valid_moves))]
 
+        # keep the subtree of the chosen action for the next search and free the rest of the tree
+        if self.parallel is None:
+            self.mcts.advance(hnef_symmetry.transform_action(action, hnef_symmetry.INVERSE[self.root_transform], self.board_size))
+
         return (action, pi)
 
     # Method for getting the predictions of values from the neural network
     # In: self, state (current state)
-    # Out: values predicted, probabilities (policy), valid actions, id's of the valid actions
+    # Out: values predicted, prior probabilities of the valid actions, valid actions, id's of the valid actions
     def get_predictions(self, state):
-        model_input = np.array(self.model.convert_to_input(state))
-
-        predictions = self.model.predict(model_input)
-
-        all_values = predictions[0]
-        all_logits = predictions[1]
-
-        values = all_values[0]
-        logits = all_logits[0]
-
-        possible_actions = hnef_game.compute_valid_moves(state)
-
-        possible_actions_ids = []
-
-        for i in range(len(possible_actions)):
-            if self.action_size == 625:
-                possible_actions_ids.append(small_action_ids.get_id(possible_actions[i]))
-            else:
-                possible_actions_ids.append(action_ids.get_id(possible_actions[i]))
-        possible_actions_ids = np.array(possible_actions_ids)
-
-        mask = np.ones(logits.shape, dtype=bool)
-        for i in possible_actions_ids:
-            mask[i] = False
-        logits[mask] = -100
-
-        # apply softmax
-        odds = np.exp(logits)
-        probabilities = odds / np.sum(odds)
-
-        return ((values, probabilities, possible_actions, possible_actions_ids))
+        return self.get_predictions_batch([state])[0]
+
+    # Method for getting the predictions of many states with one call to the neural network,
+    #       states that are in the evaluation cache aren't given to the network
+    # In: self, states (list of states)
+    # Out: list of (values, prior probabilities, valid actions, id's of the valid actions), one for each state
+    def get_predictions_batch(self, states):
+        self.cache.check_version(self.model.version)
+
+        arrays = [game.to_array(state) for state in states]
+        keys, transforms = zip(*[self.cache_key(state, array) for state, array in zip(states, arrays)])
+        entries = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if len(missing) > 0:
+            model_input = np.concatenate([self.model.convert_to_input(arrays[i]) for i in missing])
+
+            predictions = self.model.predict(model_input)
+            # a RemoteModel learns that the served model changed from the answer, the cache entries of the old weights
+            # are dropped before the new ones are stored
+            self.cache.check_version(self.model.version)
+
+            all_values = predictions[0]
+            all_logits = predictions[1]
+
+            # boolean mask over every action id, True for the valid actions
+            valid = hnef_game.compute_valid_moves_batch(model_input, self.action_layout)
+
+            all_logits[~valid] = -100
+
+            # apply softmax
+            odds = np.exp(all_logits)
+            all_probabilities = odds / np.sum(odds, axis=1, keepdims=True)
+
+            # the entries are stored with the action ids of the canonical orientation of the state
+            for j, i in enumerate(missing):
+                possible_actions_ids = np.flatnonzero(valid[j])
+                canonical_ids = hnef_symmetry.transform_action_ids(possible_actions_ids, transforms[i], self.board_size, self.action_layout)
+                entries[i] = (float(all_values[j][0]), all_probabilities[j][possible_actions_ids], canonical_ids)
+                self.cache.put(keys[i], entries[i])
+
+        results = []
+        for (value, priors, canonical_ids), t in zip(entries, transforms):
+            possible_actions_ids = hnef_symmetry.transform_action_ids(canonical_ids, hnef_symmetry.INVERSE[t], self.board_size, self.action_layout)
+            order = np.argsort(possible_actions_ids)
+            possible_actions_ids = possible_actions_ids[order]
+            priors = priors[order]
+            possible_actions = [action_codec.decode(a, self.board_size, self.action_layout) for a in possible_actions_ids]
+            results.append((value, priors, possible_actions, possible_actions_ids))
+
+        return results
+
+    # Key of a state in the evaluation cache and the transform to its canonical orientation (see hnef_symmetry),
+    #       the network also sees the turn number so it's part of the key
+    #       with config.SYMMETRY the 8 symmetric versions of a state share their key
+    def cache_key(self, state, array):
+        if config.SYMMETRY:
+            state_hash, t = game.canonical_hash(state)
+        else:
+            state_hash, t = game.hash_state(state), 0
+        return (state_hash, int(array[hnef_vars.TIME_CHNL, 0, 0])), t
 
     # Method for evaluating a leaf, creates a new leaf node if the game isn't finished
     # In: leaf Node, value (reward), done boolean, path taken to the leaf
@@ -120,30 +262,10 @@ class Agent():
     def evaluate_leaf(self, leaf, value, done, path):
         if done == 0:
 
-            value, probabilities, possible_actions, possible_actions_ids = self.get_predictions(leaf.state)
-            probs = []
-
-            for i in possible_actions_ids:
-                probs.append(probabilities[i])
-
-            probabilities = probs 
-            valid_moves = hnef_game.compute_valid_moves(leaf.state)
+            value, priors, possible_actions, possible_actions_ids = self.get_predictions(self.mcts.get_state(leaf))
 
-            # loop through all possible actions at a given state
-            for i, action in enumerate(possible_actions):
-                new_state, _, _ = hnef_game.simulate_step(np.copy(leaf.state), action)
-                # if the node doesn't already exist in the tree, create it
-                new_node_id = str(hash(str([new_state[0], new_state[1]])))
-
-                if new_node_id not in self.mcts.tree:
-                    node = monte.Node(new_state)
-                    self.mcts.add_node(node)
-                else:
-                    node = self.mcts.tree[new_node_id]
-
-                # set the source node as the leaf and the dest node aka 'node' as the state of a given action
-                new_edge = monte.Edge(leaf, node, probabilities[i], action)
-                self.mcts.tree[leaf.id].edges.append((action, new_edge))
+            # add an edge for every possible action at the leaf's state
+            self.mcts.expand(leaf, possible_actions, priors)
 
         return ((value, path))
 
@@ -151,18 +273,14 @@ class Agent():
     # In: self, tau (controls exploration)
     # Out: pi (policy), values of the actions
     def get_action_values(self, tau):
-        edges = self.mcts.root.edges
+        actions, visits, action_values = self.root_statistics()
 
         pi = np.zeros(self.action_size, dtype=np.integer)
         values = np.zeros(self.action_size, dtype=np.float32)
 
-        for action, edge in edges:
-            if self.action_size == 625:
-                action_id = small_action_ids.get_id(action)
-            else:
-                action_id = action_ids.get_id(action)
-            pi[action_id] = np.power(edge.metrics['N'],(1/tau))
-            values[action_id] = edge.metrics['Q']
+        action_ids = action_codec.encode_batch(actions, self.board_size, self.action_layout)
+        pi[action_ids] = np.power(visits, (1/tau))
+        values[action_ids] = action_values
         
         if np.sum(pi) != 0:
             pi = pi/float(np.sum(pi))
@@ -190,14 +308,44 @@ class Agent():
         return self.model.predict(model_input)
 
     # Method for generating our Monte Carlo Search Tree
+    #       tree_store picks Node and Edge objects ('object', see mcts.py) or arrays ('array', see mcts_array.py),
+    #       the arrays of an existing array tree are reused for the new tree
     def build_mcts(self, state):
-        self.root = monte.Node(state)
-        self.mcts = monte.MCTS(self.root)
+        if self.tree_store == 'array':
+            if isinstance(self.mcts, mcts_array.ArrayMCTS):
+                self.mcts.reset(state)
+            else:
+                self.mcts = mcts_array.ArrayMCTS(state, self.board_size)
+            self.root = self.mcts.root
+        else:
+            self.root = monte.Node(state)
+            self.mcts = monte.MCTS(self.root)
 
-    # Method for changing the current root (state) in the MCTS
+    # Method for changing the current root (state) in the MCTS, the nodes that can't be reached from the new
+    #       root are freed, and the tree is built again if what is left is still over the node budget
     def change_root_mcts(self, state):
-        new_root = monte.Node(state)
-        self.mcts.root = self.mcts.tree[new_root.id]
+        self.mcts.prune(self.mcts.tree[monte.state_id(state)])
+        if len(self.mcts) > self.node_budget:
+            self.build_mcts(state)
+
+    # With config.SYMMETRY the root can hold a symmetric version of the state given to act, this returns the
+    # transform from the root's state to the given state (see hnef_symmetry), 0 when they are the same
+    def get_root_transform(self, state):
+        if not config.SYMMETRY:
+            return 0
+        root_transform = game.canonical_hash(self.mcts.get_state(self.mcts.root))[1]
+        state_transform = game.canonical_hash(state)[1]
+        return hnef_symmetry.COMPOSE[hnef_symmetry.INVERSE[state_transform]][root_transform]
+
+    # Returns the actions of the root's edges, turned to the orientation of the state given to act, with their
+    # visit counts and mean values
+    def root_statistics(self):
+        if self.parallel is not None:
+            return self.parallel_statistics
+        actions, visits, values = self.mcts.root_statistics()
+        if self.root_transform != 0:
+            actions = [hnef_symmetry.transform_action(action, self.root_transform, self.board_size) for action in actions]
+        return actions, visits, values
 
     # Replays through the states in the long term memory and makes the neural network 
     #       learn from them
@@ -205,8 +353,11 @@ class Agent():
         for i in range(config.TRAINING_LOOPS):
             minibatch = random.sample(ltmemory, min(config.BATCH_SIZE, len(ltmemory)))
 
-            training_states = np.array([row['state'] for row in minibatch])
+            training_states = hnef_compact.network_input([row['state'] for row in minibatch])
             training_targets = {'value_head': np.array([row['value'] for row in minibatch]),
                                 'policy_head': np.array([row['AV'] for row in minibatch])}
                                 
-            fit = self.model.fit(training_states, training_targets, epochs=config.EPOCHS, verbose=1, validation_split=0, batch_size=32)
\ No newline at end of file
+            fit = self.model.fit(training_states, training_targets, epochs=config.EPOCHS, verbose=1, validation_split=0, batch_size=32)
+
+        # the cached predictions were made with the old weights
+        self.cache.clear()
\ No newline at end of file
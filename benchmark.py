@@ -0,0 +1,567 @@
+# Purpose: Benchmarks for the speed critical parts of the game and the agent
+# Usage: python benchmark.py <benchmark> [options], e.g. python benchmark.py env_steps --rules historical
+
+import argparse
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from gym_hnef import hnef_game, hnef_bitboard, hnef_compact, action_codec
+from gym_hnef.envs.hnef_env import HnefEnv
+import agent
+import eval_cache
+import parallel_mcts
+import inference
+
+# Plays random games in the environment and reports the number of env steps per second
+# With cache=False the cached valid moves are thrown away before every step, which
+# makes step generate them again like it used to
+def play_random_games(rules, backend, games, cache):
+    env = HnefEnv(rules, 'terminal', backend)
+    steps = 0
+    start = time.perf_counter()
+    for game in range(games):
+        env.reset()
+        env.all_actions = list()
+        done = False
+        while not done:
+            action = env.random_action()
+            if not cache:
+                env.valid_moves = None
+            _, _, done, _ = env.step(action)
+            steps += 1
+    return steps / (time.perf_counter() - start)
+
+def env_steps(args):
+    random.seed(args.seed)
+    uncached = play_random_games(args.rules, args.backend, args.games, cache=False)
+    random.seed(args.seed)
+    cached = play_random_games(args.rules, args.backend, args.games, cache=True)
+
+    print('Env steps per second ({}, {} backend, {} games)'.format(args.rules, args.backend, args.games))
+    print('  valid moves generated twice per step: {:10.1f}'.format(uncached))
+    print('  valid moves generated once per step:  {:10.1f}'.format(cached))
+    print('  speedup: {:.2f}x'.format(cached / uncached))
+
+# Returns a list of array states reached by playing random moves from the initial state
+def random_positions(rules, count, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = hnef_game.init_state(rules)
+        for ply in range(rng.randrange(1, 80)):
+            valid_moves = hnef_game.compute_valid_moves(state)
+            action = valid_moves[rng.randrange(len(valid_moves))]
+            hnef_game.make_move(state, action)
+            if hnef_game.is_over(state, action)[0]:
+                break
+        if not hnef_game.is_over(state, None)[0]:
+            positions.append(state)
+    return positions
+
+def movegen_batch(args):
+    positions = random_positions(args.rules, args.batch, args.seed)
+    states = np.array(positions)
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        for state in positions:
+            hnef_game.compute_valid_moves(state)
+    single = args.repeats * len(positions) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        hnef_game.compute_valid_moves_batch(states)
+    batch = args.repeats * len(positions) / (time.perf_counter() - start)
+
+    print('Positions per second ({}, batch of {})'.format(args.rules, args.batch))
+    print('  compute_valid_moves:       {:10.1f}'.format(single))
+    print('  compute_valid_moves_batch: {:10.1f}'.format(batch))
+    print('  speedup: {:.2f}x'.format(batch / single))
+
+def step_batch(args):
+    positions = random_positions(args.rules, args.batch, args.seed)
+    states = np.array(positions)
+    rng = np.random.default_rng(args.seed)
+
+    # one random valid action per position
+    valid = hnef_game.compute_valid_moves_batch(states)
+    action_ids = np.array([rng.choice(np.flatnonzero(v)) for v in valid])
+    actions = [action_codec.decode(i, states.shape[2]) for i in action_ids]
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        for state, action in zip(positions, actions):
+            hnef_game.simulate_step(state, action)
+    single = args.repeats * len(positions) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        hnef_game.next_state_batch(states, action_ids)
+    batch = args.repeats * len(positions) / (time.perf_counter() - start)
+
+    print('Transitions per second ({}, batch of {})'.format(args.rules, args.batch))
+    print('  simulate_step:    {:10.1f}'.format(single))
+    print('  next_state_batch: {:10.1f}'.format(batch))
+    print('  speedup: {:.2f}x'.format(batch / single))
+
+def enclosure(args):
+    positions = random_positions(args.rules, args.positions, args.seed)
+    boards = [hnef_bitboard.from_array(state) for state in positions]
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        for state in positions:
+            hnef_game.check_enclosure(state, None)
+    array_us = 1e6 * (time.perf_counter() - start) / (args.repeats * len(positions))
+
+    start = time.perf_counter()
+    for i in range(args.repeats):
+        for board in boards:
+            hnef_bitboard.check_enclosure(board, None)
+    bitboard_us = 1e6 * (time.perf_counter() - start) / (args.repeats * len(positions))
+
+    print('check_enclosure time per call ({}, {} positions, budget {} us)'.format(args.rules, len(positions), args.budget))
+    for name, us in (('array', array_us), ('bitboard', bitboard_us)):
+        print('  {:8s} {:8.1f} us  {}'.format(name, us, 'ok' if us <= args.budget else 'OVER BUDGET'))
+
+# Masking and softmax of the policy logits like Agent.get_predictions, for both layouts of the action ids
+def policy_layouts(args):
+    positions = random_positions(args.rules, args.batch, args.seed)
+    states = np.array(positions)
+    size = states.shape[2]
+    rng = np.random.default_rng(args.seed)
+
+    print('Policy head per layout ({}, batch of {})'.format(args.rules, args.batch))
+    for layout in action_codec.LAYOUTS:
+        num_actions = action_codec.num_actions(size, layout)
+        logits = rng.normal(size=(len(positions), num_actions)).astype(np.float32)
+
+        start = time.perf_counter()
+        for i in range(args.repeats):
+            valid = hnef_game.compute_valid_moves_batch(states, layout)
+            masked = np.where(valid, logits, -100)
+            odds = np.exp(masked)
+            probabilities = odds / np.sum(odds, axis=1, keepdims=True)
+        per_position = 1e6 * (time.perf_counter() - start) / (args.repeats * len(positions))
+
+        # the final Dense layer of Residual_CNN.policy_head maps 2 planes of size x size to every action id
+        print('  {:12s} {:6d} logits {:10d} policy weights {:8.1f} us per position'.format(
+            layout, num_actions, 2 * size * size * num_actions, per_position))
+
+# Stand-in for Residual_CNN that returns random values and logits without running a network,
+# so that the benchmarks of the search only measure the search itself
+# The outputs only depend on the position, so searches that evaluate the same positions get the same results
+class RandomModel():
+    def __init__(self, action_size, seed=0):
+        self.action_size = action_size
+        self.seed = seed
+        self.version = 0
+
+    def convert_to_input(self, state):
+        return np.expand_dims(state, axis=0).astype(np.float32)
+
+    def predict(self, x):
+        values = np.empty((len(x), 1), dtype=np.float32)
+        logits = np.empty((len(x), self.action_size), dtype=np.float32)
+        for i, position in enumerate(x):
+            rng = np.random.default_rng([self.seed, zlib.crc32(position.tobytes())])
+            values[i] = rng.uniform(-1, 1)
+            logits[i] = rng.normal(size=self.action_size)
+        return [values, logits]
+
+# Small Residual_CNN for the benchmarks that include the cost of calling the network
+def small_network(rules, action_size):
+    import model
+    state = hnef_game.init_state(rules)
+    return model.Residual_CNN(0.0001, 0.1, state.shape, action_size, [{'filters': 64, 'kernel_size': (3, 3)}] * 4)
+
+# Plays the first moves of a game with an Agent and returns the simulations per second and the policy of every move
+def search_speed(rules, player, sims, moves):
+    player.num_sims = sims
+    state = hnef_game.init_state(rules)
+    policies = []
+    start = time.perf_counter()
+    for move in range(moves):
+        action, pi = player.act(state, 1)
+        policies.append(pi)
+        state = hnef_game.next_state(state, action)
+        if hnef_game.is_over(state, action)[0]:
+            break
+    return len(policies) * sims / (time.perf_counter() - start), policies
+
+# Simulations per second of Agent.act with the object tree (mcts.py) and the array tree (mcts_array.py)
+def mcts_trees(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+
+    print('MCTS simulations per second ({}, {} sims per move, {} moves)'.format(args.rules, args.sims, args.moves))
+    results = {}
+    for tree_store in ('object', 'array'):
+        np.random.seed(args.seed)
+        random.seed(args.seed)
+        player = agent.Agent(tree_store, RandomModel(action_size, args.seed), None, action_size)
+        player.tree_store = tree_store
+        player.leaf_batch = 1
+        results[tree_store], _ = search_speed(args.rules, player, args.sims, args.moves)
+        print('  {:6s} tree: {:10.1f} sims/s  {:8d} nodes  {:6.2f} nodes allocated per simulation'.format(
+            tree_store, results[tree_store], len(player.mcts), player.mcts.nodes_per_simulation()))
+    print('  speedup: {:.2f}x'.format(results['array'] / results['object']))
+
+# Simulations per second of Agent.act when gathering K leaves per call to the network (see Agent.simulate_batch),
+# and how far the root visit distribution of the first move moves away from the one of K = 1
+def leaf_batch(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    if args.model == 'cnn':
+        network = small_network(args.rules, action_size)
+    else:
+        network = RandomModel(action_size, args.seed)
+
+    print('MCTS simulations per second by leaves per network call ({}, {} model, {} tree, {} sims per move)'.format(
+        args.rules, args.model, args.tree, args.sims))
+    baseline = None
+    for k in args.k:
+        np.random.seed(args.seed)
+        random.seed(args.seed)
+        player = agent.Agent('k{}'.format(k), network, None, action_size)
+        player.tree_store = args.tree
+        player.leaf_batch = k
+        speed, policies = search_speed(args.rules, player, args.sims, args.moves)
+
+        if baseline is None:
+            baseline = policies[0]
+        distance = 0.5 * np.sum(np.abs(policies[0] - baseline))
+        print('  K = {:3d}: {:10.1f} sims/s  first move policy distance to K = {}: {:.3f}'.format(k, speed, args.k[0], distance))
+
+# Plays self-play games with and without the evaluation cache (see eval_cache.py) and reports its hit rate,
+# the cache is kept across the games so their shared opening is only evaluated once
+def evaluation_cache(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    if args.model == 'cnn':
+        network = small_network(args.rules, action_size)
+    else:
+        network = RandomModel(action_size, args.seed)
+
+    print('Self-play with the evaluation cache ({}, {} model, {} games of {} moves, {} sims per move)'.format(
+        args.rules, args.model, args.games, args.moves, args.sims))
+    for cache_mb in (0, args.cache_mb):
+        np.random.seed(args.seed)
+        random.seed(args.seed)
+        player = agent.Agent('player', network, None, action_size)
+        player.cache = eval_cache.EvaluationCache(cache_mb * 2**20)
+
+        start = time.perf_counter()
+        for game_number in range(args.games):
+            player.mcts = None
+            search_speed(args.rules, player, args.sims, args.moves)
+        speed = args.games * args.moves * args.sims / (time.perf_counter() - start)
+        print('  cache of {:4d} MB: {:10.1f} sims/s  {}'.format(cache_mb, speed, player.cache))
+
+# Plays a self-play game with one Agent and reports how many nodes its tree keeps and frees after every move
+def tree_reuse(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    player = agent.Agent('player', RandomModel(action_size, args.seed), None, action_size)
+    player.tree_store = args.tree
+    player.num_sims = args.sims
+    player.node_budget = args.budget
+
+    print('Tree reuse in self-play ({}, {} tree, {} sims per move, node budget {})'.format(args.rules, args.tree, args.sims, args.budget))
+    state = hnef_game.init_state(args.rules)
+    sizes = []
+    for move in range(args.moves):
+        action, _ = player.act(state, 1)
+        sizes.append(len(player.mcts))
+        if move % args.every == 0:
+            print('  move {:4d}: {:8d} nodes kept {:8d} nodes freed'.format(move, player.mcts.nodes_kept, player.mcts.nodes_freed))
+        state = hnef_game.next_state(state, action)
+        if hnef_game.is_over(state, action)[0]:
+            break
+    print('  largest tree: {} nodes, {} nodes freed in total'.format(max(sizes), player.mcts.total_nodes_freed))
+
+# Per call latency of the Keras Model.predict path against the compiled forward pass of Residual_CNN.predict,
+# by batch size, with the largest difference between their outputs
+def compiled_inference(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    network = small_network(args.rules, action_size)
+    rng = np.random.default_rng(args.seed)
+
+    print('Network inference latency per call ({}, small Residual_CNN, median of {} calls)'.format(args.rules, args.repeats))
+    for batch_size in args.batch:
+        x = rng.integers(0, 2, size=(batch_size,) + network.input_dim).astype(np.float32)
+        network.predict(x)
+        network.model.predict(x, verbose=0)
+
+        keras_times = []
+        compiled_times = []
+        for i in range(args.repeats):
+            start = time.perf_counter()
+            keras_values, keras_logits = network.model.predict(x, verbose=0)
+            keras_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            values, logits = network.predict(x)
+            compiled_times.append(time.perf_counter() - start)
+
+        difference = max(np.max(np.abs(values - keras_values)), np.max(np.abs(logits - keras_logits)))
+        keras_time = np.median(keras_times) * 1000
+        compiled_time = np.median(compiled_times) * 1000
+        print('  batch {:4d}: Model.predict {:8.3f} ms  compiled {:8.3f} ms  speedup {:6.2f}x  max difference {:.2e}'.format(
+            batch_size, keras_time, compiled_time, keras_time / compiled_time, difference))
+
+# Exports the small Residual_CNN to an int8 TFLite model calibrated on random game positions stored like the entries
+# of the long term memory (see quantize.py), then reports its accuracy on other positions and its latency against the float network
+def quantized_inference(args):
+    import quantize
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    network = small_network(args.rules, action_size)
+
+    # export_int8 only reads the packed states of the entries
+    ltmemory = [{'state': hnef_compact.pack(state)} for state in random_positions(args.rules, args.positions, args.seed)]
+
+    start = time.perf_counter()
+    quantized = quantize.export_int8(network, ltmemory, args.save, args.positions)
+    print('Int8 export of the small Residual_CNN ({}, calibrated on {} positions) in {:.1f} s'.format(
+        args.rules, len(ltmemory), time.perf_counter() - start))
+
+    test_inputs = np.stack(random_positions(args.rules, args.positions, args.seed + 1)).astype(np.float32)
+    print(quantize.accuracy_report(network, quantized, test_inputs))
+    print(quantize.latency_report(network, quantized, args.batch, args.repeats))
+
+# Simulations per second of several self-play searches at once, in threads of this process that share one
+# network through an InferenceServer (see inference.py), against the same searches run one after another that
+# each call the network themselves
+def inference_server(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    if args.model == 'cnn':
+        network = small_network(args.rules, action_size)
+    else:
+        network = RandomModel(action_size, args.seed)
+
+    print('Concurrent searches through the inference server ({}, {} model, {} searches, {} sims per move, {} moves)'.format(
+        args.rules, args.model, args.searches, args.sims, args.moves))
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    start = time.perf_counter()
+    for search in range(args.searches):
+        player = agent.Agent('direct', network, None, action_size)
+        search_speed(args.rules, player, args.sims, args.moves)
+    direct = args.searches * args.moves * args.sims / (time.perf_counter() - start)
+    print('  one after another: {:10.1f} sims/s'.format(direct))
+
+    server = inference.InferenceServer(network, args.searches, max_batch=args.max_batch, max_wait=args.max_wait / 1000)
+    server.start()
+    players = [agent.Agent('served', server.client(i), None, action_size) for i in range(args.searches)]
+    threads = [threading.Thread(target=search_speed, args=(args.rules, player, args.sims, args.moves)) for player in players]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    served = args.searches * args.moves * args.sims / (time.perf_counter() - start)
+    server.stop()
+    print('  served together:   {:10.1f} sims/s  speedup {:5.2f}x'.format(served, served / direct))
+    print(server.report())
+
+# Simulations per second of a search by number of worker processes, for root and tree parallelisation
+# (see parallel_mcts.py), against the search of a single Agent in this process
+def parallel_search(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    if args.model == 'cnn':
+        network = small_network(args.rules, action_size)
+    else:
+        network = RandomModel(action_size, args.seed)
+
+    print('Parallel MCTS simulations per second ({}, {} model, {} sims per move, {} moves)'.format(
+        args.rules, args.model, args.sims, args.moves))
+    np.random.seed(args.seed)
+    random.seed(args.seed)
+    player = agent.Agent('sequential', network, None, action_size)
+    player.tree_store = 'array'
+    baseline, _ = search_speed(args.rules, player, args.sims, args.moves)
+    print('  sequential:          {:10.1f} sims/s'.format(baseline))
+
+    for mode in parallel_mcts.MODES:
+        for workers in args.workers:
+            np.random.seed(args.seed)
+            random.seed(args.seed)
+            player = agent.Agent(mode, network, None, action_size)
+            player.parallel = parallel_mcts.ParallelSearch(network, action_size, mode, workers)
+            # the first search starts the workers, it isn't timed
+            player.parallel.search(hnef_game.init_state(args.rules), args.sims)
+            batch_start = len(player.parallel.batch_sizes())
+            speed, _ = search_speed(args.rules, player, args.sims, args.moves)
+            batch_sizes = player.parallel.batch_sizes()[batch_start:]
+            print('  {:4s} {:3d} workers:    {:10.1f} sims/s  speedup {:5.2f}x  mean network batch {:5.2f}'.format(
+                mode, workers, speed, speed / baseline, np.mean(batch_sizes) if len(batch_sizes) > 0 else 0))
+            if args.report:
+                print(player.parallel.server.report())
+            player.parallel.close()
+
+# Per move time and simulations of Agent.act with tau = 0 under the limits of a search: the simulation count alone,
+# with early stopping once the most visited action is settled, and with a time limit per move
+def search_limits(args):
+    size = hnef_game.init_state(args.rules).shape[1]
+    action_size = action_codec.num_actions(size)
+    if args.model == 'cnn':
+        network = small_network(args.rules, action_size)
+    else:
+        network = RandomModel(action_size, args.seed)
+
+    print('Search limits ({}, {} model, {} sims per move, {} moves)'.format(args.rules, args.model, args.sims, args.moves))
+    for name, early_stop, time_limit in (('simulations', False, None), ('early stop', True, None), ('{} s limit'.format(args.time), False, args.time)):
+        np.random.seed(args.seed)
+        random.seed(args.seed)
+        player = agent.Agent(name, network, None, action_size)
+        player.num_sims = args.sims
+        player.early_stop = early_stop
+        player.time_limit = time_limit
+
+        state = hnef_game.init_state(args.rules)
+        times = []
+        sims = []
+        for move in range(args.moves):
+            action, _ = player.act(state, 0)
+            times.append(player.search_time)
+            sims.append(player.search_sims)
+            state = hnef_game.next_state(state, action)
+            if hnef_game.is_over(state, action)[0]:
+                break
+        print('  {:12s}: {:8.3f} s mean {:8.3f} s max per move  {:8.1f} sims per move'.format(name, np.mean(times), np.max(times), np.mean(sims)))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hnefatafl benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    parser_env = subparsers.add_parser('env_steps', help='env steps per second when playing random games')
+    parser_env.add_argument('--rules', type=str, default='historical')
+    parser_env.add_argument('--backend', type=str, default='array')
+    parser_env.add_argument('--games', type=int, default=5)
+    parser_env.add_argument('--seed', type=int, default=0)
+    parser_env.set_defaults(func=env_steps)
+
+    parser_movegen = subparsers.add_parser('movegen_batch', help='valid move generation for a batch of positions')
+    parser_movegen.add_argument('--rules', type=str, default='historical')
+    parser_movegen.add_argument('--batch', type=int, default=256)
+    parser_movegen.add_argument('--repeats', type=int, default=10)
+    parser_movegen.add_argument('--seed', type=int, default=0)
+    parser_movegen.set_defaults(func=movegen_batch)
+
+    parser_step = subparsers.add_parser('step_batch', help='state transitions for a batch of positions')
+    parser_step.add_argument('--rules', type=str, default='historical')
+    parser_step.add_argument('--batch', type=int, default=1024)
+    parser_step.add_argument('--repeats', type=int, default=10)
+    parser_step.add_argument('--seed', type=int, default=0)
+    parser_step.set_defaults(func=step_batch)
+
+    parser_enclosure = subparsers.add_parser('enclosure', help='time per check_enclosure call against a per move budget')
+    parser_enclosure.add_argument('--rules', type=str, default='historical')
+    parser_enclosure.add_argument('--positions', type=int, default=200)
+    parser_enclosure.add_argument('--repeats', type=int, default=20)
+    parser_enclosure.add_argument('--budget', type=float, default=50.0, help='per move budget in microseconds')
+    parser_enclosure.add_argument('--seed', type=int, default=0)
+    parser_enclosure.set_defaults(func=enclosure)
+
+    parser_policy = subparsers.add_parser('policy_layouts', help='policy size and masking cost of the action id layouts')
+    parser_policy.add_argument('--rules', type=str, default='copenhagen')
+    parser_policy.add_argument('--batch', type=int, default=64)
+    parser_policy.add_argument('--repeats', type=int, default=10)
+    parser_policy.add_argument('--seed', type=int, default=0)
+    parser_policy.set_defaults(func=policy_layouts)
+
+    parser_trees = subparsers.add_parser('mcts_trees', help='simulations per second of the object and array search trees')
+    parser_trees.add_argument('--rules', type=str, default='historical')
+    parser_trees.add_argument('--sims', type=int, default=200)
+    parser_trees.add_argument('--moves', type=int, default=4)
+    parser_trees.add_argument('--seed', type=int, default=0)
+    parser_trees.set_defaults(func=mcts_trees)
+
+    parser_leaf = subparsers.add_parser('leaf_batch', help='simulations per second by number of leaves per network call')
+    parser_leaf.add_argument('--rules', type=str, default='historical')
+    parser_leaf.add_argument('--model', type=str, default='cnn', help='cnn (small Residual_CNN) or random')
+    parser_leaf.add_argument('--tree', type=str, default='object', help='object or array (see config.MCTS_TREE)')
+    parser_leaf.add_argument('--k', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser_leaf.add_argument('--sims', type=int, default=128)
+    parser_leaf.add_argument('--moves', type=int, default=2)
+    parser_leaf.add_argument('--seed', type=int, default=0)
+    parser_leaf.set_defaults(func=leaf_batch)
+
+    parser_cache = subparsers.add_parser('eval_cache', help='hit rate and speed of the evaluation cache in self-play')
+    parser_cache.add_argument('--rules', type=str, default='historical')
+    parser_cache.add_argument('--model', type=str, default='cnn', help='cnn (small Residual_CNN) or random')
+    parser_cache.add_argument('--cache_mb', type=int, default=64)
+    parser_cache.add_argument('--games', type=int, default=3)
+    parser_cache.add_argument('--moves', type=int, default=4)
+    parser_cache.add_argument('--sims', type=int, default=64)
+    parser_cache.add_argument('--seed', type=int, default=0)
+    parser_cache.set_defaults(func=evaluation_cache)
+
+    parser_reuse = subparsers.add_parser('tree_reuse', help='nodes kept and freed by the search tree across the moves of a game')
+    parser_reuse.add_argument('--rules', type=str, default='historical')
+    parser_reuse.add_argument('--tree', type=str, default='object', help='object or array (see config.MCTS_TREE)')
+    parser_reuse.add_argument('--sims', type=int, default=100)
+    parser_reuse.add_argument('--moves', type=int, default=60)
+    parser_reuse.add_argument('--budget', type=int, default=200000)
+    parser_reuse.add_argument('--every', type=int, default=10, help='print every this many moves')
+    parser_reuse.add_argument('--seed', type=int, default=0)
+    parser_reuse.set_defaults(func=tree_reuse)
+
+    parser_parallel = subparsers.add_parser('parallel_search', help='simulations per second of the parallel search by number of workers')
+    parser_parallel.add_argument('--rules', type=str, default='historical')
+    parser_parallel.add_argument('--model', type=str, default='random', help='cnn (small Residual_CNN) or random')
+    parser_parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser_parallel.add_argument('--sims', type=int, default=256)
+    parser_parallel.add_argument('--moves', type=int, default=2)
+    parser_parallel.add_argument('--report', action='store_true', help='print the batch sizes and queue latency of the inference server')
+    parser_parallel.add_argument('--seed', type=int, default=0)
+    parser_parallel.set_defaults(func=parallel_search)
+
+    parser_limits = subparsers.add_parser('search_limits', help='time and simulations per move with early stopping and a time limit')
+    parser_limits.add_argument('--rules', type=str, default='historical')
+    parser_limits.add_argument('--model', type=str, default='random', help='cnn (small Residual_CNN) or random')
+    parser_limits.add_argument('--sims', type=int, default=400)
+    parser_limits.add_argument('--time', type=float, default=0.2, help='time limit per move in seconds')
+    parser_limits.add_argument('--moves', type=int, default=20)
+    parser_limits.add_argument('--seed', type=int, default=0)
+    parser_limits.set_defaults(func=search_limits)
+
+    parser_server = subparsers.add_parser('inference_server', help='concurrent searches sharing the network through the inference server')
+    parser_server.add_argument('--rules', type=str, default='historical')
+    parser_server.add_argument('--model', type=str, default='cnn', help='cnn (small Residual_CNN) or random')
+    parser_server.add_argument('--searches', type=int, default=8)
+    parser_server.add_argument('--max_batch', type=int, default=64)
+    parser_server.add_argument('--max_wait', type=float, default=2.0, help='milliseconds')
+    parser_server.add_argument('--sims', type=int, default=64)
+    parser_server.add_argument('--moves', type=int, default=2)
+    parser_server.add_argument('--seed', type=int, default=0)
+    parser_server.set_defaults(func=inference_server)
+
+    parser_compiled = subparsers.add_parser('compiled_inference', help='latency of Model.predict against the compiled forward pass')
+    parser_compiled.add_argument('--rules', type=str, default='historical')
+    parser_compiled.add_argument('--batch', type=int, nargs='+', default=[1, 8, 64])
+    parser_compiled.add_argument('--repeats', type=int, default=50)
+    parser_compiled.add_argument('--seed', type=int, default=0)
+    parser_compiled.set_defaults(func=compiled_inference)
+
+    parser_quantized = subparsers.add_parser('quantized_inference', help='accuracy and latency of the int8 TFLite export of the network')
+    parser_quantized.add_argument('--rules', type=str, default='historical')
+    parser_quantized.add_argument('--positions', type=int, default=256, help='positions to calibrate on and to test on')
+    parser_quantized.add_argument('--batch', type=int, nargs='+', default=[1, 8, 64])
+    parser_quantized.add_argument('--repeats', type=int, default=50)
+    parser_quantized.add_argument('--save', type=str, default=None, help='path to save the .tflite flatbuffer to')
+    parser_quantized.add_argument('--seed', type=int, default=0)
+    parser_quantized.set_defaults(func=quantized_inference)
+
+    args = parser.parse_args()
+    args.func(args)
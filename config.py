@@ -12,6 +12,26 @@ TURNS_UNTIL_TAU0 = 10 # turn on which it starts playing deterministically
 CPUCT = 1
 EPSILON = 0.2
 ALPHA = 0.8
+MCTS_LEAF_BATCH = 1 # leaves gathered per call to the neural network in Agent.simulate_batch, 1 runs one simulation at a time
+                    # (more than 1 is faster but the virtual losses change the visit counts that self-play trains on,
+                    # see benchmark.py leaf_batch)
+VIRTUAL_LOSS = 1 # visits (each counted as a loss) added to the edges of a path while its leaf waits to be evaluated
+EVAL_CACHE_MB = 64 # memory cap of the cache of neural network evaluations of each agent (see eval_cache.py), 0 turns it off
+GAME_BACKEND = 'array' # implementation of the game rules, 'array' or 'bitboard' (see gym_hnef/hnef_backend.py)
+MCTS_TREE = 'object' # storage of the search tree, 'object' (Node and Edge objects, see mcts.py) or 'array' (see mcts_array.py)
+MCTS_NODE_BUDGET = 200000 # most nodes a search tree keeps, the search stops early when it's reached
+MCTS_TIME_LIMIT = None # seconds a search may take, None for no limit (the search still stops after MCTS_SIMS simulations)
+MCTS_EARLY_STOP = False # stop a search when the most visited action can't be overtaken any more, only when the action is chosen with tau = 0
+                        # (play and evaluation only, it cuts short the visit counts that self-play records as the policy target)
+SYMMETRY = True # share search nodes and cached evaluations between the 8 symmetric versions of a position (see gym_hnef/hnef_symmetry.py)
+MEMORY_DEDUPLICATE = False # merge the long term memory entries of positions that are the same up to symmetry (see Memory.commit_ltmemory),
+                           # the memory then fills up more slowly so replay starts later
+MCTS_PARALLEL = None # runs the simulations of a search in worker processes, None, 'root' (a tree per worker) or 'tree' (one shared tree, see parallel_mcts.py)
+MCTS_WORKERS = 4 # worker processes of a parallel search
+INFERENCE_MAX_BATCH = 64 # most positions the inference server (see inference.py) runs through the network at once
+INFERENCE_MAX_WAIT_MS = 2 # most milliseconds the inference server waits for more positions before running a batch
+INFERENCE_WARM_UP_BATCHES = (1, 8) # batch sizes run through a new Residual_CNN once so that the first predictions are fast
+QUANTIZE_CALIBRATION_SAMPLES = 500 # positions of the long term memory the int8 export is calibrated on (see quantize.py)
 
 
 #### RETRAINING
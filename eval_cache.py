@@ -0,0 +1,66 @@
+# Purpose: Cache of neural network evaluations so that positions that come up again (in later simulations,
+# after the tree is rebuilt, or in the shared openings of self-play games) aren't evaluated again.
+# Entries are keyed by the Zobrist hash of the position (plus anything else the network sees, see Agent.cache_key)
+# and hold the value and the masked prior over the legal moves. The least recently used entries are evicted
+# once the entries take more memory than the cap. Every entry belongs to one version of the model's weights
+# (see Gen_Model.version), the cache is emptied when it is used with a different version.
+
+from collections import OrderedDict
+
+# rough size of the key, tuple and dict entry around the arrays of an entry
+ENTRY_OVERHEAD = 256
+
+class EvaluationCache():
+    # In: max_bytes (memory cap of the entries, 0 turns the cache off)
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.num_bytes = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return "Evaluation cache: {} entries, {:.1f} MB, {} hits, {} misses, hit rate {:.2f}".format(
+            len(self), self.num_bytes / 2**20, self.hits, self.misses, self.hit_rate())
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    # Empties the cache if the model's weights changed since the entries were stored
+    def check_version(self, version):
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        self.entries = OrderedDict()
+        self.num_bytes = 0
+
+    # Returns the entry of a key (and marks it as recently used), None if it isn't cached
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    # Stores an entry (value, priors over the legal moves, action ids of the legal moves)
+    def put(self, key, entry):
+        if self.max_bytes <= 0 or key in self.entries:
+            return
+        self.entries[key] = entry
+        self.num_bytes += self.entry_size(entry)
+        while self.num_bytes > self.max_bytes and len(self.entries) > 0:
+            key, old_entry = self.entries.popitem(last=False)
+            self.num_bytes -= self.entry_size(old_entry)
+
+    def entry_size(self, entry):
+        value, priors, action_ids = entry
+        return priors.nbytes + action_ids.nbytes + ENTRY_OVERHEAD
@@ -11,7 +11,6 @@ from model import Residual_CNN
 from agent import Agent
 import config
 import memory
-import action_ids
 import gym
 
 # Method for playing a number of matches between two agents
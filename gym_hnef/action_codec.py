@@ -0,0 +1,135 @@
+# Purpose: Converts actions ((x, y), (new_x, new_y)) to and from the action ids used by the policy of the
+# neural network, for any board size. There are two layouts of the action ids:
+#       square:      one id for every pair of squares (board size^4 ids), the id of an action is
+#                           ((x * size + y) * size + new_x) * size + new_y
+#                    which gives the same order as the old lists of every action (action_ids.py and small_action_space.py)
+#       directional: one id for every square, direction and distance (board size^2 * 4 * (board size - 1) ids),
+#                    the id of a move of k squares in direction d (see hnef_tables.DIRECTIONS) is
+#                           ((x * size + y) * 4 + d) * (size - 1) + k - 1
+#                    pieces only move in straight lines, so this leaves out the diagonal moves and the moves
+#                    to the same square, e.g. 4840 ids instead of 14641 for an 11x11 board
+# In both layouts the ids are computed arithmetically instead of searching through a list, and sorting the ids
+# of the valid moves gives the same order as hnef_game.compute_valid_moves
+
+import numpy as np
+
+from gym_hnef import hnef_tables
+
+SQUARE = 'square'
+DIRECTIONAL = 'directional'
+LAYOUTS = (SQUARE, DIRECTIONAL)
+
+# Number of action ids for a board size (including impossible actions such as diagonal or off board moves)
+def num_actions(size, layout=SQUARE):
+    assert layout in LAYOUTS, "*Error: Unknown action layout '{}', expected one of {}".format(layout, LAYOUTS)
+    if layout == SQUARE:
+        return size ** 4
+    return size * size * len(hnef_tables.DIRECTIONS) * (size - 1)
+
+# Board size for a number of action ids in either layout, e.g. 6561 -> 9 and 4840 -> 11
+def board_size(num_actions):
+    return _size_and_layout(num_actions)[0]
+
+# Layout of a number of action ids, e.g. 6561 -> 'square' and 4840 -> 'directional'
+def layout(num_actions):
+    return _size_and_layout(num_actions)[1]
+
+def _size_and_layout(count):
+    size = int(round(count ** 0.25))
+    if size ** 4 == count:
+        return size, SQUARE
+    size = 2
+    while num_actions(size, DIRECTIONAL) < count:
+        size += 1
+    assert num_actions(size, DIRECTIONAL) == count, "*Error: {} is not the number of actions of a board".format(count)
+    return size, DIRECTIONAL
+
+# Gets the id of an action
+def encode(action, size, layout=SQUARE):
+    (x, y), (new_x, new_y) = action
+    if layout == SQUARE:
+        return ((x * size + y) * size + new_x) * size + new_y
+
+    dx, dy = new_x - x, new_y - y
+    assert (dx == 0) != (dy == 0), "*Error: {} is not a move in a straight line".format(action)
+    direction = hnef_tables.DIRECTIONS.index((int(np.sign(dx)), int(np.sign(dy))))
+    distance = abs(dx + dy)
+    return ((x * size + y) * len(hnef_tables.DIRECTIONS) + direction) * (size - 1) + distance - 1
+
+# Gets the action of an id
+def decode(action_id, size, layout=SQUARE):
+    action_id = int(action_id)
+    if layout == SQUARE:
+        rest, new_y = divmod(action_id, size)
+        rest, new_x = divmod(rest, size)
+        x, y = divmod(rest, size)
+        return ((x, y), (new_x, new_y))
+
+    rest, distance = divmod(action_id, size - 1)
+    rest, direction = divmod(rest, len(hnef_tables.DIRECTIONS))
+    x, y = divmod(rest, size)
+    dx, dy = hnef_tables.DIRECTIONS[direction]
+    return ((x, y), (x + dx * (distance + 1), y + dy * (distance + 1)))
+
+# Gets the ids of many actions at once
+# In: actions (list of actions or array of shape (M, 2, 2)), board size, layout
+# Out: int array of M action ids
+def encode_batch(actions, size, layout=SQUARE):
+    actions = np.asarray(actions, dtype=np.int64).reshape(-1, 4)
+    square_ids = ((actions[:, 0] * size + actions[:, 1]) * size + actions[:, 2]) * size + actions[:, 3]
+    if layout == SQUARE:
+        return square_ids
+    return square_to_directional(size)[square_ids]
+
+# Gets the actions of many ids at once
+# In: array of M action ids, board size, layout
+# Out: int array of shape (M, 2, 2)
+def decode_batch(action_ids, size, layout=SQUARE):
+    action_ids = np.asarray(action_ids, dtype=np.int64)
+    if layout == DIRECTIONAL:
+        action_ids = directional_to_square(size)[action_ids]
+    digits = [(action_ids // size ** p) % size for p in (3, 2, 1, 0)]
+    return np.stack(digits, axis=-1).reshape(-1, 2, 2)
+
+_directional_to_square = {}
+_square_to_directional = {}
+
+# Square layout id of every directional layout id, -1 for the moves that leave the board
+def directional_to_square(size):
+    if size not in _directional_to_square:
+        table = np.full(num_actions(size, DIRECTIONAL), -1, dtype=np.int64)
+        for action_id in range(len(table)):
+            (x, y), (new_x, new_y) = decode(action_id, size, DIRECTIONAL)
+            if 0 <= new_x < size and 0 <= new_y < size:
+                table[action_id] = encode(((x, y), (new_x, new_y)), size)
+        _directional_to_square[size] = table
+    return _directional_to_square[size]
+
+# Directional layout id of every square layout id, -1 for the moves that aren't in a straight line
+def square_to_directional(size):
+    if size not in _square_to_directional:
+        forward = directional_to_square(size)
+        table = np.full(num_actions(size, SQUARE), -1, dtype=np.int64)
+        on_board = forward >= 0
+        table[forward[on_board]] = np.flatnonzero(on_board)
+        _square_to_directional[size] = table
+    return _square_to_directional[size]
+
+# Converts policies (or any values per action id) from one layout to the other, the ids that don't exist in
+# the other layout get 0 (they can't be valid moves so the policies give them no probability anyway)
+# In: policies (array of shape (..., number of action ids of from_layout)), board size, from_layout, to_layout
+# Out: array of shape (..., number of action ids of to_layout) with the same dtype
+def convert_policy(policies, size, from_layout, to_layout):
+    policies = np.asarray(policies)
+    if from_layout == to_layout:
+        return policies.copy()
+
+    if from_layout == SQUARE:
+        table = directional_to_square(size)
+    else:
+        table = square_to_directional(size)
+    exists = table >= 0
+
+    converted = np.zeros(policies.shape[:-1] + (len(table),), dtype=policies.dtype)
+    converted[..., exists] = policies[..., table[exists]]
+    return converted
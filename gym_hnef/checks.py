@@ -0,0 +1,254 @@
+# Purpose: Deterministic consistency checks of the game functions that have more than one implementation.
+# Every check runs both implementations on the same positions (the stored positions of perft.py and positions
+# reached by seeded random play) and reports the positions where they disagree, so that a faster version can be
+# compared to the one it replaces after every change.
+#       movegen: compute_valid_moves_batch (both action id layouts) and the bitboard backend against compute_valid_moves
+#       transitions: next_state_batch (both action id layouts) and the bitboard backend against simulate_step, for every
+#                    valid move of every position
+#       enclosure: check_enclosure of both backends and check_enclosure_batch against a breadth first search, on the
+#                  positions and on copies of them with random attackers or walled in defenders (see walled_board)
+#       symmetry: the 8 orientations of every position (see hnef_symmetry) against the hashes, valid moves, action ids
+#                 and policies turned by the same transform, and the round trip of every transform and its inverse
+# Usage: python -m gym_hnef.checks --rules historical --positions 200 --seed 0
+
+import argparse
+import random
+from collections import deque
+
+import numpy as np
+
+from gym_hnef import hnef_game, hnef_bitboard, hnef_vars, hnef_symmetry, action_codec, perft
+
+# Returns the stored positions of a rule set (see perft.POSITIONS) followed by positions of random games
+# that aren't over, every position of a game is kept with probability 1 / 8 so that they come from many games
+# In: rule set, number of random positions, seed of the random games
+# Out: list of array states
+def positions(rule_set, count, seed):
+    rng = random.Random(seed)
+    result = [state for name, state in perft.positions(rule_set)]
+    total = len(result) + count
+    while len(result) < total:
+        state = hnef_game.init_state(rule_set)
+        for ply in range(300):
+            valid_moves = hnef_game.compute_valid_moves(state)
+            if len(valid_moves) == 0:
+                break
+            action = valid_moves[rng.randrange(len(valid_moves))]
+            hnef_game.make_move(state, action)
+            if hnef_game.is_over(state, action)[0]:
+                break
+            if rng.randrange(8) == 0 and len(result) < total:
+                result.append(state.copy())
+    return result
+
+# The valid moves of every state as sets of action ids of the given layout, from compute_valid_moves
+def scalar_moves(states, layout):
+    size = states[0].shape[1]
+    return [set(action_codec.encode(action, size, layout) for action in hnef_game.compute_valid_moves(state)) for state in states]
+
+# compute_valid_moves_batch in both layouts and the bitboard compute_valid_moves against compute_valid_moves
+# Out: number of states whose moves differ
+def check_movegen(states):
+    mismatches = 0
+    for layout in (action_codec.SQUARE, action_codec.DIRECTIONAL):
+        valid = hnef_game.compute_valid_moves_batch(np.array(states), layout)
+        for i, moves in enumerate(scalar_moves(states, layout)):
+            if set(np.flatnonzero(valid[i]).tolist()) != moves:
+                mismatches += 1
+
+    for state in states:
+        bitboard_moves = hnef_bitboard.compute_valid_moves(hnef_bitboard.from_array(state))
+        if sorted(bitboard_moves) != sorted(hnef_game.compute_valid_moves(state)):
+            mismatches += 1
+    return mismatches
+
+# next_state_batch in both layouts and the bitboard simulate_step against simulate_step, on every valid move
+# Out: number of moves whose new state, reward or end of the game differ
+def check_transitions(states):
+    size = states[0].shape[1]
+    batch_states = []
+    actions = []
+    for state in states:
+        for action in hnef_game.compute_valid_moves(state):
+            batch_states.append(state)
+            actions.append(action)
+    batch_states = np.array(batch_states)
+
+    expected = [hnef_game.simulate_step(state, action) for state, action in zip(batch_states, actions)]
+
+    mismatches = 0
+    for layout in (action_codec.SQUARE, action_codec.DIRECTIONAL):
+        action_ids = np.array([action_codec.encode(action, size, layout) for action in actions])
+        new_states, rewards, done = hnef_game.next_state_batch(batch_states, action_ids, layout)
+        for i, (new_state, reward, is_done) in enumerate(expected):
+            # the batch reward is 1 where the player who moved won and 0 otherwise
+            if not np.array_equal(new_states[i], new_state) or rewards[i] != (reward == 1) or done[i] != is_done:
+                mismatches += 1
+
+    for state, action, (new_state, reward, is_done) in zip(batch_states, actions, expected):
+        bitboard_state, bitboard_reward, bitboard_done = hnef_bitboard.simulate_step(hnef_bitboard.from_array(state), action)
+        if not np.array_equal(hnef_bitboard.to_array(bitboard_state), new_state) or bitboard_reward != reward or bitboard_done != is_done:
+            mismatches += 1
+    return mismatches
+
+# The enclosure rule by a breadth first search from the squares on the edge of the board without attackers
+# Out: True if no defender (king included) can be reached without crossing an attacker
+def enclosed(state):
+    size = state.shape[1]
+    open_squares = state[hnef_vars.ATTACKER] == 0
+    reached = np.zeros((size, size), dtype=bool)
+    queue = deque()
+    for x in range(size):
+        for y in range(size):
+            if (x in (0, size - 1) or y in (0, size - 1)) and open_squares[x, y]:
+                reached[x, y] = True
+                queue.append((x, y))
+
+    while queue:
+        x, y = queue.popleft()
+        for new_x, new_y in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if 0 <= new_x < size and 0 <= new_y < size and open_squares[new_x, new_y] and not reached[new_x, new_y]:
+                reached[new_x, new_y] = True
+                queue.append((new_x, new_y))
+
+    return not np.any(reached & (state[hnef_vars.DEFENDER] > 0))
+
+# Copy of a state where the defenders inside a random rectangle are walled in by attackers on its border, the other
+# defenders are removed (a king is put inside if there is none) and there are random attackers around the wall.
+# Half of the walls get a gap, which the random attackers may close again
+def walled_board(state, rng):
+    size = state.shape[1]
+    x0 = rng.randint(size - 2)
+    x1 = rng.randint(x0 + 2, size)
+    y0 = rng.randint(size - 2)
+    y1 = rng.randint(y0 + 2, size)
+
+    inside = np.zeros((size, size), dtype=bool)
+    inside[x0 + 1:x1, y0 + 1:y1] = True
+    wall = np.zeros((size, size), dtype=bool)
+    wall[x0:x1 + 1, y0:y1 + 1] = True
+    wall &= ~inside
+
+    board = state.copy()
+    board[hnef_vars.DEFENDER][~inside] = 0
+    if not np.any(board[hnef_vars.DEFENDER] == 2):
+        squares = np.flatnonzero(inside)
+        board[hnef_vars.DEFENDER].ravel()[squares[rng.randint(len(squares))]] = 2
+    board[hnef_vars.ATTACKER] = (wall | (rng.random_sample((size, size)) < 0.3)) & (board[hnef_vars.DEFENDER] == 0)
+    if rng.randint(2) == 0:
+        gaps = np.flatnonzero(wall)
+        board[hnef_vars.ATTACKER].ravel()[gaps[rng.randint(len(gaps))]] = 0
+    return board
+
+# check_enclosure of both backends and check_enclosure_batch against enclosed, on the states, on copies of them
+# where the attackers are placed at random on the squares without defenders (from sparse to dense) and on
+# copies where the defenders are walled in (see walled_board)
+# Out: number of states on which they differ
+def check_enclosure(states):
+    rng = np.random.RandomState(0)
+    boards = list(states)
+    for density in (0.3, 0.5, 0.7):
+        for state in states:
+            board = state.copy()
+            board[hnef_vars.ATTACKER] = (rng.random_sample(board.shape[1:]) < density) & (board[hnef_vars.DEFENDER] == 0)
+            boards.append(board)
+    boards += [walled_board(state, rng) for state in states for i in range(3)]
+
+    batch = hnef_game.check_enclosure_batch(np.array(boards))
+    mismatches = 0
+    for i, board in enumerate(boards):
+        expected = enclosed(board)
+        if (hnef_game.check_enclosure(board, None)[0] != expected or batch[i] != expected
+                or hnef_bitboard.check_enclosure(hnef_bitboard.from_array(board), None)[0] != expected):
+            mismatches += 1
+    return mismatches
+
+# For every state and transform t checks that
+#       symmetric_hashes of both backends give hash_state of the transformed state, and the same canonical hash
+#       update_symmetric_hashes after a move (the first few valid moves) gives symmetric_hashes of the new state
+#       the valid moves of the transformed state are the transformed valid moves, as actions and as ids of both layouts
+#       transform_state and transform_policy (random policies, both layouts) are undone by INVERSE[t]
+# Out: number of failed checks, at most one for every (state, transform) pair
+def check_symmetry(states):
+    rng = np.random.RandomState(0)
+    size = states[0].shape[1]
+    layouts = (action_codec.SQUARE, action_codec.DIRECTIONAL)
+    mismatches = 0
+    for state in states:
+        hashes = hnef_game.symmetric_hashes(state)
+        canonical_hash = hnef_game.canonical_hash(state)[0]
+        valid_moves = hnef_game.compute_valid_moves(state)
+        if hnef_bitboard.symmetric_hashes(hnef_bitboard.from_array(state)) != hashes:
+            mismatches += 1
+
+        # the hashes after a move
+        for action in valid_moves[:5]:
+            new_state = state.copy()
+            undo = hnef_game.make_move(new_state, action)
+            if hnef_game.update_symmetric_hashes(hashes, new_state, undo) != hnef_game.symmetric_hashes(new_state):
+                mismatches += 1
+
+        for t in range(hnef_symmetry.NUM_TRANSFORMS):
+            inverse = hnef_symmetry.INVERSE[t]
+            transformed = hnef_game.transform_state(state, t)
+            ok = (hashes[t] == hnef_game.hash_state(transformed)
+                  and hnef_game.canonical_hash(transformed)[0] == canonical_hash
+                  and np.array_equal(hnef_game.transform_state(transformed, inverse), state))
+
+            transformed_moves = hnef_game.compute_valid_moves(transformed)
+            ok = ok and sorted(hnef_symmetry.transform_action(action, t, size) for action in valid_moves) == sorted(transformed_moves)
+            for layout in layouts:
+                ids = np.array([action_codec.encode(action, size, layout) for action in valid_moves])
+                transformed_ids = np.array([action_codec.encode(hnef_symmetry.transform_action(action, t, size), size, layout) for action in valid_moves])
+                ok = ok and np.array_equal(hnef_symmetry.transform_action_ids(ids, t, size, layout), transformed_ids)
+
+                policy = rng.random_sample(action_codec.num_actions(size, layout))
+                round_trip = hnef_symmetry.transform_policy(hnef_symmetry.transform_policy(policy, t, size, layout), inverse, size, layout)
+                ok = ok and np.array_equal(round_trip, policy)
+
+            if not ok:
+                mismatches += 1
+    return mismatches
+
+CHECKS = {
+    'movegen': check_movegen,
+    'transitions': check_transitions,
+    'enclosure': check_enclosure,
+    'symmetry': check_symmetry,
+}
+
+# Runs the checks on the positions of the given rule sets and prints the results
+# Out: True if no check found a mismatch
+def run(rule_sets, checks, count, seed):
+    all_match = True
+
+    print('Checks on {} random positions per rule set (seed {})'.format(count, seed))
+    for rule_set in rule_sets:
+        states = positions(rule_set, count, seed)
+        for name in checks:
+            mismatches = CHECKS[name](states)
+            all_match = all_match and mismatches == 0
+            result = 'ok' if mismatches == 0 else 'MISMATCH ({})'.format(mismatches)
+            print('  {:10s} {:12s} {:6d} positions  {}'.format(rule_set, name, len(states), result))
+
+    return all_match
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hnefatafl consistency checks')
+    parser.add_argument('--rules', type=str, default='all', help='mini, historical, copenhagen or all')
+    parser.add_argument('--checks', type=str, default='all', help='comma separated names of checks ({}) or all'.format(', '.join(CHECKS)))
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.rules == 'all':
+        rule_sets = list(perft.POSITIONS)
+    else:
+        rule_sets = [args.rules]
+    if args.checks == 'all':
+        checks = list(CHECKS)
+    else:
+        checks = args.checks.split(',')
+
+    if not run(rule_sets, checks, args.positions, args.seed):
+        raise SystemExit(1)
@@ -10,7 +10,7 @@ import numpy as np
 import random
 import pyglet
 
-from gym_hnef import hnef_game, hnef_vars, rendering_helpers
+from gym_hnef import hnef_game, hnef_vars, hnef_backend, hnef_compact, action_codec, rendering_helpers
 
 # custom gym Env object built to play Hnefatafl (aka Viking Chess)
 # contains important information about the game environment
@@ -20,29 +20,37 @@ class HnefEnv(gym.Env):
     hnef_vars = hnef_vars
     hnef_game = hnef_game
 
-    def __init__(self, rule_set, render_mode):
+    # backend selects the implementation of the game rules used to step the game (see hnef_backend),
+    # the state returned to the user is always the array state
+    # action_layout selects the layout of the action ids of the action space (see action_codec), the actions
+    # given to step are always ((x, y), (new_x, new_y))
+    def __init__(self, rule_set, render_mode, backend='array', action_layout=action_codec.SQUARE):
         self.rule_set = rule_set
+        self.action_layout = action_layout
         self.render_mode = render_mode
+        self.game = hnef_backend.get_backend(backend)
         self.all_states = list()
         self.all_actions = list()
+        self.valid_moves = None     # valid moves of the current state, computed once per state (see compute_valid_moves)
+        self.valid_move_set = None
 
         if rule_set.lower() == 'historical':
             self.size = 9
             self.state = hnef_game.init_state('historical')
             self.observation_space = gym.spaces.Box(np.float32(0), np.float32(hnef_vars.NUM_CHNLS), shape=(hnef_vars.NUM_CHNLS, 9, 9))
-            self.action_space = gym.spaces.Discrete(6561)
+            self.action_space = gym.spaces.Discrete(action_codec.num_actions(9, action_layout))
 
         elif rule_set.lower() == 'mini':
             self.size = 5
             self.state = hnef_game.init_state('mini')
             self.observation_space = gym.spaces.Box(np.float32(0), np.float32(hnef_vars.NUM_CHNLS), shape=(hnef_vars.NUM_CHNLS, 5, 5))
-            self.action_space = gym.spaces.Discrete(625)
+            self.action_space = gym.spaces.Discrete(action_codec.num_actions(5, action_layout))
             
         else:
             self.size = 11
             self.state = hnef_game.init_state('copenhagen')
             self.observation_space = gym.spaces.Box(np.float32(0), np.float32(hnef_vars.NUM_CHNLS), shape=(hnef_vars.NUM_CHNLS, 11, 11))
-            self.action_space = gym.spaces.Discrete(14641)
+            self.action_space = gym.spaces.Discrete(action_codec.num_actions(11, action_layout))
             
         self.done = False
 
@@ -50,6 +58,7 @@ class HnefEnv(gym.Env):
     def reset(self):
         self.state = hnef_game.init_state(self.rule_set)
         self.done = False
+        self.valid_moves = None
         return np.copy(self.state)
 
     # In: tuple of tuples action ((pos_x, pos_y), (new_pos_x, new_pos_y))
@@ -58,10 +67,13 @@ class HnefEnv(gym.Env):
 
         assert not self.done    # make sure that the game is not over
         
-        self.all_states.append(self.state)  # keep track of all game states
+        self.all_states.append(hnef_compact.pack(self.state))  # keep track of all game states (packed, see hnef_compact)
         self.all_actions.append(action)  # keep track of all actions taken
-        self.state = hnef_game.next_state(self.state, action)   # get next state
-        self.done, winner = hnef_game.is_over(self.state, action)       # check if the game is over
+        self.compute_valid_moves()
+        board = self.game.next_state(self.game.from_array(self.state), action, self.valid_move_set)   # get next state
+        self.valid_moves = None
+        self.done, winner = self.game.is_over(board, action)       # check if the game is over
+        self.state = self.game.to_array(board)
 
         # check for repetition
         if len(self.all_actions) > 6 and not self.done:
@@ -95,8 +107,12 @@ class HnefEnv(gym.Env):
     def turn(self):
         return hnef_game.turn(self.state)
 
+    # the valid moves are only generated once per state and reused by random_action and step
     def compute_valid_moves(self):
-        return hnef_game.compute_valid_moves(self.state)
+        if self.valid_moves is None:
+            self.valid_moves = self.game.compute_valid_moves(self.game.from_array(self.state))
+            self.valid_move_set = set(self.valid_moves)
+        return self.valid_moves
 
     def random_action(self):
         valid_moves = self.compute_valid_moves()
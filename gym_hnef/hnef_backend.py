@@ -0,0 +1,18 @@
+# Purpose: Selects which implementation of the game methods is used.
+# Every backend module exposes the functions of hnef_game (init_state, turn, compute_valid_moves,
+# actions_for_piece, check_capture, next_state, make_move, unmake_move, is_over, simulate_step,
+# simulate_next_state, hash_state, update_hash, str)
+# as well as from_array and to_array for converting to and from the array state and
+# pack_state and unpack_state for converting to and from the form states are stored in.
+
+from gym_hnef import hnef_game, hnef_bitboard
+
+BACKENDS = {
+    'array': hnef_game,
+    'bitboard': hnef_bitboard,
+}
+
+# Returns the module implementing the given backend
+def get_backend(name):
+    assert name in BACKENDS, "*Error: Unknown game backend '{}', existing backends are: {}".format(name, ', '.join(BACKENDS))
+    return BACKENDS[name]
@@ -0,0 +1,475 @@
+# Purpose: Bitboard implementation of the Hnefatafl game methods in hnef_game. Pieces are stored as
+# python ints where square (x, y) is bit x * board_size + y, moves are generated by shifting whole
+# bitboards and captures are detected with masks. Exposes the same functions as hnef_game so the
+# two can be swapped through hnef_backend.
+
+# References:
+# https://www.chessprogramming.org/Bitboards
+# https://www.chessprogramming.org/Dumb7Fill
+
+import numpy as np
+
+from gym_hnef import hnef_game, hnef_vars, hnef_zobrist, hnef_symmetry
+
+# Directions in the same order that hnef_game.actions_for_piece looks at them
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Class holding a game state as bitboards
+#       attackers: every attacker piece
+#       defenders: every defender piece except the king
+#       king: the king (0 once it has been captured)
+#       turn, done, time: same meaning as state[2], state[3] and state[4] of the array state
+class BitState():
+    __slots__ = ('size', 'attackers', 'defenders', 'king', 'turn', 'done', 'time')
+
+    def __init__(self, size, attackers=0, defenders=0, king=0, turn=0, done=0, time=0):
+        self.size = size
+        self.attackers = attackers
+        self.defenders = defenders
+        self.king = king
+        self.turn = turn
+        self.done = done
+        self.time = time
+
+    def copy(self):
+        return BitState(self.size, self.attackers, self.defenders, self.king, self.turn, self.done, self.time)
+
+    def __eq__(self, other):
+        return (isinstance(other, BitState) and self.size == other.size
+                and self.attackers == other.attackers and self.defenders == other.defenders
+                and self.king == other.king and self.turn == other.turn
+                and self.done == other.done and self.time == other.time)
+
+# Class holding the masks needed for a single board size
+class BoardMasks():
+    def __init__(self, size):
+        self.size = size
+        self.full = (1 << (size * size)) - 1
+
+        first_col = 0
+        for i in range(size):
+            first_col |= 1 << (i * size)
+        last_col = first_col << (size - 1)
+        first_row = (1 << size) - 1
+        last_row = first_row << (size * (size - 1))
+
+        # used to stop left and right shifts from wrapping around to the next row
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~last_col
+        self.edges = first_col | last_col | first_row | last_row
+
+        t = size // 2
+        self.throne = square_bit(t, t, size)
+        self.throne_neighbours = [shift(self.throne, d, self) for d in DIRECTIONS]
+
+        # squares beside the throne where the king can be captured by three attackers,
+        # paired with the three squares the attackers need to occupy (same order as hnef_game.check_capture)
+        self.beside_throne = [(square_bit(t-1, t, size), square_bit(t-1, t-1, size) | square_bit(t-1, t+1, size) | square_bit(t-2, t, size)),
+                              (square_bit(t+1, t, size), square_bit(t+1, t-1, size) | square_bit(t+1, t+1, size) | square_bit(t+2, t, size)),
+                              (square_bit(t, t-1, size), square_bit(t-1, t-1, size) | square_bit(t+1, t-1, size) | square_bit(t, t-2, size)),
+                              (square_bit(t, t+1, size), square_bit(t-1, t+1, size) | square_bit(t+1, t+1, size) | square_bit(t, t+2, size))]
+
+        # change in square index when moving one step in each direction
+        self.delta = (-size, size, -1, 1)
+
+_masks = {}
+
+# Returns the (cached) masks for a given board size
+def board_masks(size):
+    if size not in _masks:
+        _masks[size] = BoardMasks(size)
+    return _masks[size]
+
+# Returns the bit of square (x, y)
+def square_bit(x, y, size):
+    if x < 0 or y < 0 or x >= size or y >= size:
+        return 0
+    return 1 << (x * size + y)
+
+# Moves every piece of a bitboard one step in the given direction, pieces pushed off the board disappear
+def shift(board, direction, masks):
+    if direction == UP:
+        return board >> masks.size
+    elif direction == DOWN:
+        return (board << masks.size) & masks.full
+    elif direction == LEFT:
+        return (board & masks.not_first_col) >> 1
+    else:
+        return (board & masks.not_last_col) << 1
+
+# Yields the index of every set bit, lowest first
+def iter_bits(board):
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+# Converts an array state (see hnef_game.init_state) to a BitState
+def from_array(state):
+    size = state.shape[1]
+    attackers = 0
+    defenders = 0
+    king = 0
+    for i in np.flatnonzero(state[hnef_vars.ATTACKER] > 0):
+        attackers |= 1 << int(i)
+    for i in np.flatnonzero(state[hnef_vars.DEFENDER] == 1):
+        defenders |= 1 << int(i)
+    for i in np.flatnonzero(state[hnef_vars.DEFENDER] == 2):
+        king |= 1 << int(i)
+
+    return BitState(size, attackers, defenders, king,
+                    turn=int(np.max(state[hnef_vars.TURN_CHNL])),
+                    done=int(np.max(state[hnef_vars.DONE_CHNL])),
+                    time=int(np.max(state[hnef_vars.TIME_CHNL])))
+
+# Converts a BitState back to the array state used by hnef_game and the neural network
+def to_array(state):
+    size = state.size
+    array = np.zeros((hnef_vars.NUM_CHNLS, size * size))
+    for i in iter_bits(state.attackers):
+        array[hnef_vars.ATTACKER, i] = 1
+    for i in iter_bits(state.defenders):
+        array[hnef_vars.DEFENDER, i] = 1
+    for i in iter_bits(state.king):
+        array[hnef_vars.DEFENDER, i] = 2
+    array[hnef_vars.TURN_CHNL, 0] = state.turn
+    array[hnef_vars.DONE_CHNL] = state.done
+    array[hnef_vars.TIME_CHNL] = state.time
+    return array.reshape((hnef_vars.NUM_CHNLS, size, size))
+
+# A BitState is already compact, so it is stored as it is
+def pack_state(state):
+    return state
+
+def unpack_state(packed):
+    return packed
+
+# Initialization function that gives the initial state of the game as a BitState
+# In: rule set string, copenhagen, historical or mini
+# Out: BitState, or -1 if the rule set doesn't exist
+def init_state(rule_set):
+    state = hnef_game.init_state(rule_set)
+    if isinstance(state, int):
+        return state
+    return from_array(state)
+
+# Returns whose turn it is based on the state given
+def turn(state):
+    if state is not None:
+        return state.turn
+
+# Method for checking whether a capture has taken place, follows the same rules as hnef_game.check_capture
+# In: state (current state), action (action taken by current player)
+# Out: state (new state)
+def check_capture(state, action):
+    masks = board_masks(state.size)
+    x, y = action[1]
+    moved = square_bit(x, y, state.size)
+
+    if state.turn == hnef_vars.ATTACKER:
+        own = state.attackers
+    else:
+        own = state.defenders | state.king
+
+    ## capturing normal pieces normally
+    for d in DIRECTIONS:
+        neighbour = shift(moved, d, masks)
+        if state.turn == hnef_vars.ATTACKER:
+            victim = neighbour & state.defenders
+        else:
+            victim = neighbour & state.attackers
+        if victim and shift(victim, d, masks) & own:
+            if state.turn == hnef_vars.ATTACKER:
+                state.defenders &= ~victim
+            else:
+                state.attackers &= ~victim
+
+    king_on_throne = state.king & masks.throne
+
+    ## capturing normal pieces with the throne
+    # if the king is on the throne then the white pieces cant be captured in this way
+    if state.turn == hnef_vars.ATTACKER and not king_on_throne:
+        for d in DIRECTIONS:
+            victim = shift(moved, d, masks) & state.defenders
+            if victim and shift(victim, d, masks) & masks.throne:
+                state.defenders &= ~victim
+                break
+
+    ## capturing the king normally
+    if not king_on_throne:
+        for d in DIRECTIONS:
+            king = shift(moved, d, masks) & state.king
+            if king and shift(king, d, masks) & state.attackers:
+                state.king = 0
+                state.done = 1
+                return state
+
+    ## capturing the king on the throne
+    if king_on_throne and all(n & state.attackers for n in masks.throne_neighbours):
+        state.king = 0
+        state.done = 1
+        return state
+
+    ## capturing the king next to the throne
+    if state.turn == hnef_vars.ATTACKER:
+        for king_square, required in masks.beside_throne:
+            if state.king & king_square:
+                if state.attackers & required == required:
+                    state.king = 0
+                    state.done = 1
+                    return state
+                break
+
+    return state
+
+# Moves the piece at action[0] to action[1] for the current player, without any checks
+def move_piece(state, action):
+    src = square_bit(action[0][0], action[0][1], state.size)
+    dest = square_bit(action[1][0], action[1][1], state.size)
+    if state.king & src:
+        state.king = dest
+    elif state.turn == hnef_vars.ATTACKER:
+        state.attackers = (state.attackers & ~src) | dest
+    else:
+        state.defenders = (state.defenders & ~src) | dest
+
+# Method for making a move in place, without checking whether it is valid
+# In: state (current state, changed in place), action (action taken by current player)
+# Out: undo record that unmake_move uses to restore the state, since the bitboards are
+#      plain ints the record is simply their previous values
+def make_move(state, action):
+    undo = (state.attackers, state.defenders, state.king, state.turn, state.done, state.time)
+
+    move_piece(state, action)
+
+    # check if the player just captured a piece and update the state if so
+    check_capture(state, action)
+
+    # switch turns
+    state.turn = 1 - undo[3]
+
+    return undo
+
+# Method for taking back a move made by make_move
+# In: state (state after the move, changed in place), undo record returned by make_move
+# Out: state (state before the move)
+def unmake_move(state, undo):
+    state.attackers, state.defenders, state.king, state.turn, state.done, state.time = undo
+    return state
+
+# Method for computing the Zobrist hash of a state from scratch, equal to hnef_game.hash_state
+# In: state (current state)
+# Out: 64 bit integer hash of the pieces on the board and whose turn it is
+def hash_state(state):
+    keys = hnef_zobrist.zobrist_keys(state.size)
+    state_hash = 0
+    for kind, board in ((hnef_zobrist.ATTACKER_KEY, state.attackers),
+                        (hnef_zobrist.DEFENDER_KEY, state.defenders),
+                        (hnef_zobrist.KING_KEY, state.king)):
+        piece_keys = keys.piece_keys[kind]
+        for i in iter_bits(board):
+            state_hash ^= piece_keys[i]
+    if state.turn == hnef_vars.DEFENDER:
+        state_hash ^= keys.turn
+    return state_hash
+
+# Method for updating a Zobrist hash after a move, only the squares that changed are hashed
+# In: state_hash (hash before the move), state (state after the move), undo record returned by make_move
+# Out: hash of the state after the move
+def update_hash(state_hash, state, undo):
+    keys = hnef_zobrist.zobrist_keys(state.size)
+    for kind, before, after in ((hnef_zobrist.ATTACKER_KEY, undo[0], state.attackers),
+                                (hnef_zobrist.DEFENDER_KEY, undo[1], state.defenders),
+                                (hnef_zobrist.KING_KEY, undo[2], state.king)):
+        piece_keys = keys.piece_keys[kind]
+        for i in iter_bits(before ^ after):
+            state_hash ^= piece_keys[i]
+    return state_hash ^ keys.turn
+
+# Method for computing the Zobrist hash of the state in each orientation of the board, equal to hnef_game.symmetric_hashes
+# Out: list of 8 hashes, hashes[t] is the hash of the state after transform t
+def symmetric_hashes(state):
+    keys = hnef_zobrist.symmetric_keys(state.size)
+    hashes = []
+    for piece_keys in keys.piece_keys:
+        state_hash = 0
+        for kind, board in ((hnef_zobrist.ATTACKER_KEY, state.attackers),
+                            (hnef_zobrist.DEFENDER_KEY, state.defenders),
+                            (hnef_zobrist.KING_KEY, state.king)):
+            for i in iter_bits(board):
+                state_hash ^= piece_keys[kind][i]
+        if state.turn == hnef_vars.DEFENDER:
+            state_hash ^= keys.turn
+        hashes.append(state_hash)
+    return hashes
+
+# Method for updating the hashes of symmetric_hashes after a move, like update_hash
+def update_symmetric_hashes(hashes, state, undo):
+    keys = hnef_zobrist.symmetric_keys(state.size)
+    changes = []
+    for kind, before, after in ((hnef_zobrist.ATTACKER_KEY, undo[0], state.attackers),
+                                (hnef_zobrist.DEFENDER_KEY, undo[1], state.defenders),
+                                (hnef_zobrist.KING_KEY, undo[2], state.king)):
+        changes += [(kind, i) for i in iter_bits(before ^ after)]
+
+    new_hashes = []
+    for state_hash, piece_keys in zip(hashes, keys.piece_keys):
+        for kind, square in changes:
+            state_hash ^= piece_keys[kind][square]
+        new_hashes.append(state_hash ^ keys.turn)
+    return new_hashes
+
+# Canonical orientation of a state, see hnef_game.canonical_hash and hnef_game.canonical_state
+def canonical_hash(state):
+    return hnef_symmetry.canonical(symmetric_hashes(state))
+
+def transform_state(state, t):
+    return from_array(hnef_game.transform_state(to_array(state), t))
+
+def canonical_state(state):
+    canonical, t = canonical_hash(state)
+    return transform_state(state, t), t
+
+# State transition function, checks that the action is valid before making it
+# (use make_move or simulate_next_state to skip the check for actions that are known to be valid)
+# In: state (current state), action (action taken by current player),
+#     valid_moves (optional, the valid moves of the state if they are already known, a set makes the check O(1))
+# Out: state (new state)
+def next_state(state, action, valid_moves=None):
+    # assert that the action is valid i.e. that the action is in state[valid_actions]
+    if valid_moves is None:
+        valid_moves = compute_valid_moves(state)
+
+    if action not in valid_moves:
+        print("Action not in valid moves")
+        assert False
+
+    make_move(state, action)
+
+    return state
+
+# Generates moves for the given pieces by sliding the whole bitboard one step at a time
+# In: pieces bitboard, bitboard of squares the pieces may land on, empty squares, board masks
+# Out: list of (source square, direction, distance, destination square)
+def slide(pieces, landing, empty, masks):
+    moves = []
+    for d in DIRECTIONS:
+        frontier = pieces
+        dist = 0
+        while frontier:
+            frontier = shift(frontier, d, masks) & empty
+            dist += 1
+            for dest in iter_bits(frontier & landing):
+                moves.append((dest - dist * masks.delta[d], d, dist, dest))
+    return moves
+
+# Converts the moves generated by slide into actions, in the same order as hnef_game.compute_valid_moves
+def to_actions(moves, size):
+    moves.sort()
+    return [((src // size, src % size), (dest // size, dest % size)) for src, _, _, dest in moves]
+
+# Function for finding all actions for a given piece located at (x, y) on the board
+# In: state (current state), x-position of piece, y-position of piece
+# Out: list of all possible actions where action a = ((x, y), (new_x, new_y))
+def actions_for_piece(state, x, y):
+    masks = board_masks(state.size)
+    piece = square_bit(x, y, state.size)
+    empty = masks.full & ~(state.attackers | state.defenders | state.king)
+
+    # only the king can land on the throne, but the other pieces can pass through it
+    if piece & state.king:
+        landing = empty
+    else:
+        landing = empty & ~masks.throne
+
+    return to_actions(slide(piece, landing, empty, masks), state.size)
+
+# Function that computes all valid moves for a given state
+# In: state (current state)
+# Out: list of all possible actions for all pieces of the current player
+#      where action a = ((x, y), (new_x, new_y))
+def compute_valid_moves(state):
+    masks = board_masks(state.size)
+    empty = masks.full & ~(state.attackers | state.defenders | state.king)
+
+    if state.turn == hnef_vars.ATTACKER:
+        moves = slide(state.attackers, empty & ~masks.throne, empty, masks)
+    else:
+        moves = slide(state.defenders, empty & ~masks.throne, empty, masks)
+        moves += slide(state.king, empty, empty, masks)
+
+    return to_actions(moves, state.size)
+
+# Function for checking whether the attackers have enclosed every defender, same rule as hnef_game.check_enclosure
+# The squares reachable from the edge without crossing an attacker are found by shifting the whole
+# reachable bitboard in every direction until it stops growing
+# In: state (current state), action (action that was just taken)
+# Out: boolean (are the defenders enclosed?), player who won (the attacker) or -1
+def check_enclosure(state, action):
+    masks = board_masks(state.size)
+    open_squares = masks.full & ~state.attackers
+    defenders = state.defenders | state.king
+
+    reachable = masks.edges & open_squares
+    while not reachable & defenders:
+        grown = reachable
+        for d in DIRECTIONS:
+            grown |= shift(reachable, d, masks)
+        grown &= open_squares
+        if grown == reachable:
+            return True, hnef_vars.ATTACKER
+        reachable = grown
+
+    return False, -1
+
+# Function for checking if the game is over
+# In: state (current state), action (action that was just taken)
+# Out: boolean (is the game over?), player who won
+def is_over(state, action):
+    masks = board_masks(state.size)
+    # has the king been captured?
+    if not state.king:
+        return True, hnef_vars.ATTACKER
+    # has the king escaped?
+    elif state.king & masks.edges:
+        return True, hnef_vars.DEFENDER
+    # has the attacker enclosed the defender?
+    elif check_enclosure(state, action)[0]:
+        return True, hnef_vars.ATTACKER
+    else:
+        return False, -1
+
+# Method for simulating a step taken, without changing the current state
+# The end of the game is checked on the state after the action, and the reward is for the player who took it
+# In: state (current state), action (action selected)
+# Out: New state, int reward (1 if the action won the game, -1 if it lost it, 0 otherwise), boolean representing whether the game is finished
+def simulate_step(state, action):
+    new_state = simulate_next_state(state, action)
+    done, winner = is_over(new_state, action)
+
+    if not done:
+        reward = 0
+    elif turn(state) == winner:
+        reward = 1
+    else:
+        reward = -1
+
+    return new_state, reward, done
+
+# State transition simulation method, the action is trusted to be valid
+# In: state (current state), action (action taken by current player)
+# Out: state (new state)
+def simulate_next_state(state, action):
+    state_copy = state.copy()
+    make_move(state_copy, action)
+    return state_copy
+
+# String method to show the state of the board
+# In: state (current state)
+# Out: board_str string of the board
+def str(state):
+    return hnef_game.str(to_array(state))
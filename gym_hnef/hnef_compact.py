@@ -0,0 +1,87 @@
+# Purpose: Compact representations of the game state for storing many states (MCTS nodes, replay memory,
+# game history). The array state from hnef_game uses a float64 plane for every channel even though the
+# turn, done and time channels only hold a single number each.
+#       CompactState: int8 piece planes plus scalar turn, done and time fields
+#       packed state: bytes holding the board as three bit planes (attackers, defenders, king) after a small
+#                     header, e.g. 36 bytes for a 9x9 board instead of 3240 for the float64 array state
+# The float input of the neural network is only built from these at the model boundary (see network_input)
+
+import struct
+
+import numpy as np
+
+from gym_hnef import hnef_vars
+
+# size, turn, done, time
+HEADER = struct.Struct('<BBBH')
+
+# Class holding a game state as int8 piece planes and scalar fields
+#       pieces: int8 array of shape (2, board size, board size), same values as state[0] and state[1] of the array state
+#       turn, done, time: the values of state[2], state[3] and state[4] of the array state
+class CompactState():
+    __slots__ = ('pieces', 'turn', 'done', 'time')
+
+    def __init__(self, pieces, turn=0, done=0, time=0):
+        self.pieces = pieces
+        self.turn = turn
+        self.done = done
+        self.time = time
+
+    @property
+    def size(self):
+        return self.pieces.shape[1]
+
+# Converts an array state (see hnef_game.init_state) to a CompactState
+def from_array(state):
+    return CompactState(state[:2].astype(np.int8),
+                        turn=int(np.max(state[hnef_vars.TURN_CHNL])),
+                        done=int(np.max(state[hnef_vars.DONE_CHNL])),
+                        time=int(np.max(state[hnef_vars.TIME_CHNL])))
+
+# Converts a CompactState back to an array state
+# In: compact state, dtype of the array (float64 like hnef_game.init_state by default)
+# Out: array of shape (5, board size, board size)
+def to_array(compact, dtype=np.float64):
+    size = compact.size
+    state = np.zeros((hnef_vars.NUM_CHNLS, size, size), dtype=dtype)
+    state[:2] = compact.pieces
+    state[hnef_vars.TURN_CHNL, 0, 0] = compact.turn
+    state[hnef_vars.DONE_CHNL] = compact.done
+    state[hnef_vars.TIME_CHNL] = compact.time
+    return state
+
+# Packs a state into bytes
+# In: CompactState or array state
+# Out: bytes, see the top of this file
+def pack(state):
+    if not isinstance(state, CompactState):
+        state = from_array(state)
+    pieces = state.pieces
+    planes = np.stack([pieces[hnef_vars.ATTACKER] > 0, pieces[hnef_vars.DEFENDER] == 1, pieces[hnef_vars.DEFENDER] == 2])
+    return HEADER.pack(state.size, state.turn, state.done, state.time) + np.packbits(planes).tobytes()
+
+# Unpacks bytes made by pack
+# Out: CompactState
+def unpack(packed):
+    size, turn, done, time = HEADER.unpack_from(packed)
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8, offset=HEADER.size), count=3 * size * size)
+    planes = bits.reshape((3, size, size)).astype(np.int8)
+
+    pieces = np.empty((2, size, size), dtype=np.int8)
+    pieces[hnef_vars.ATTACKER] = planes[0]
+    pieces[hnef_vars.DEFENDER] = planes[1] + 2 * planes[2]
+    return CompactState(pieces, turn, done, time)
+
+# Builds the float input of the neural network for a batch of states
+# In: list of CompactStates or packed states (all of the same board size)
+# Out: float32 array of shape (B, 5, board size, board size)
+def network_input(states):
+    states = [unpack(s) if isinstance(s, bytes) else s for s in states]
+    size = states[0].size
+    batch = np.zeros((len(states), hnef_vars.NUM_CHNLS, size, size), dtype=np.float32)
+    for i, s in enumerate(states):
+        batch[i, :2] = s.pieces
+        batch[i, hnef_vars.TURN_CHNL, 0, 0] = s.turn
+        batch[i, hnef_vars.DONE_CHNL] = s.done
+        batch[i, hnef_vars.TIME_CHNL] = s.time
+    return batch
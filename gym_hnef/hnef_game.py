@@ -11,6 +11,7 @@ from scipy import ndimage
 from sklearn import preprocessing
 
 import hnef_vars
+from gym_hnef import hnef_zobrist, hnef_tables, hnef_compact, hnef_symmetry, action_codec
 
 # Initialization function that gives the initial state of the game
 # In: rule set string, copenhagen or historical, copenhagen isn't implemented yet
@@ -99,15 +100,39 @@ def init_state(rule_set):
         print("*Error: Given rule set has not been implemented.\n Existing rule sets are:\n-copenhagen\n-historial")
         return -1
 
+# The array state is the native state of this module, these exist so that it can be used
+# interchangeably with the other backends (see hnef_backend)
+def from_array(state):
+    return state
+
+def to_array(state):
+    return state
+
+# Packs the state into the compact bytes form used for storing states (see hnef_compact)
+def pack_state(state):
+    return hnef_compact.pack(state)
+
+def unpack_state(packed):
+    return hnef_compact.to_array(hnef_compact.unpack(packed))
+
 # Returns whose turn it is based on the state given
 def turn(state):
     if state is not None:
         return int(np.max(state[hnef_vars.TURN_CHNL]))
 
+# Removes the piece at (x, y) from the given player's channel
+# In: state (current state), player whose piece is removed, position of the piece,
+#     captured (optional list that (player, x, y, piece value) is appended to)
+def remove_piece(state, player, x, y, captured=None):
+    if captured is not None:
+        captured.append((player, x, y, state[player][x][y]))
+    state[player][x][y] = 0
+
 # Method for checking whether a capture has taken place
-# In: state (current state), action (action taken by current player)
+# In: state (current state), action (action taken by current player),
+#     captured (optional list that every captured piece is appended to, see remove_piece)
 # Out: state (new state)
-def check_capture(state, action):
+def check_capture(state, action, captured=None):
     # current player
     current_player = turn(state)
     # other player
@@ -116,194 +141,233 @@ def check_capture(state, action):
     df = hnef_vars.DEFENDER
     # attacker
     at = hnef_vars.ATTACKER
-    # board size
-    board_size = state.shape[1]
-    # throne location
-    throne = (board_size // 2, board_size // 2)
+    # lookup tables for this board size
+    tables = hnef_tables.board_tables(state.shape[1])
+    throne = tables.throne
 
     # new location of moved piece
     x, y = action[1]
+    # (neighbour, square beyond the neighbour) in every direction
+    partners = tables.capture_partners[x][y]
 
     ## capturing normal pieces normally
-    
-    # capturing upwards
-    if x > 1 and state[other_player][x-1][y] == 1 and state[current_player][x-2][y] > 0:
-        state[other_player][x-1][y] = 0
-
-    # capturing downwards
-    if x < board_size - 2 and state[other_player][x+1][y] == 1 and state[current_player][x+2][y] > 0:
-        state[other_player][x+1][y] = 0
-    
-    # capturing left
-    if y > 1 and state[other_player][x][y-1] == 1 and state[current_player][x][y-2] > 0:
-        state[other_player][x][y-1] = 0
+    for neighbour, beyond in partners:
+        if state[other_player][neighbour] == 1 and state[current_player][beyond] > 0:
+            remove_piece(state, other_player, neighbour[0], neighbour[1], captured)
 
-    # capturing right
-    if y < board_size - 2 and state[other_player][x][y+1] == 1 and state[current_player][x][y+2] > 0:
-        state[other_player][x][y+1] = 0
-    
     ## capturing normal pieces with the throne
-    
-    # if the king is on the throne then the white pieces cant be captured in this way
-    if (current_player == at and state[df][throne[0]][throne[0]] < 2):
-        # capturing upwards
-        if x > 1 and state[other_player][x-1][y] == 1 and np.mean((x-2, y) == throne):
-            state[other_player][x-1][y] = 0
-        # capturing downwards
-        elif x < board_size - 2 and state[other_player][x+1][y] == 1 and np.mean((x+2, y) == throne):
-            state[other_player][x+1][y] = 0
-        # capturing left
-        elif y > 1 and state[other_player][x][y-1] == 1 and np.mean((x, y-2) == throne):
-            state[other_player][x][y-1] = 0
-        # capturing right
-        elif y < board_size - 2 and state[other_player][x][y+1] == 1 and np.mean((x, y+2) == throne):
-            state[other_player][x][y+1] = 0
-    
-    ## capturing the king normally
-
-    # capturing upwards
-    if x > 1 and state[df][x-1][y] == 2 and state[at][x-2][y] > 0 and state[df][throne[0]][throne[0]] < 2:
-        state[df][x-1][y] = 0
-        state[hnef_vars.DONE_CHNL] = 1
-        return state
 
-    # capturing downwards
-    if x < board_size - 2 and state[df][x+1][y] == 2 and state[at][x+2][y] > 0 and state[df][throne[0]][throne[0]] < 2:
-        state[df][x+1][y] = 0
-        state[hnef_vars.DONE_CHNL] = 1
-        return state
-    
-    # capturing left
-    if y > 1 and state[df][x][y-1] == 2 and state[at][x][y-2] > 0 and state[df][throne[0]][throne[0]] < 2:
-        state[df][x][y-1] = 0
-        state[hnef_vars.DONE_CHNL] = 1
-        return state
+    # if the king is on the throne then the white pieces cant be captured in this way
+    if current_player == at and state[df][throne] < 2:
+        for neighbour, beyond in partners:
+            if state[other_player][neighbour] == 1 and beyond == throne:
+                remove_piece(state, other_player, neighbour[0], neighbour[1], captured)
+                break
 
-    # capturing right
-    if y < board_size - 2 and state[df][x][y+1] == 2 and state[at][x][y+2] > 0 and state[df][throne[0]][throne[0]] < 2:
-        state[df][x][y+1] = 0
-        state[hnef_vars.DONE_CHNL] = 1
-        return state
+    ## capturing the king normally
+    if state[df][throne] < 2:
+        for neighbour, beyond in partners:
+            if state[df][neighbour] == 2 and state[at][beyond] > 0:
+                remove_piece(state, df, neighbour[0], neighbour[1], captured)
+                state[hnef_vars.DONE_CHNL] = 1
+                return state
 
     ## capturing the king on the throne
-    if (state[df][throne[0]][throne[0]] == 2 
-        and state[at][throne[0]-1][throne[0]] > 0
-        and state[at][throne[0]+1][throne[0]] > 0
-        and state[at][throne[0]][throne[0]-1] > 0
-        and state[at][throne[0]][throne[0]+1] > 0):
-        state[df][throne[0]][throne[0]] = 0
+    if state[df][throne] == 2 and all(state[at][square] > 0 for square in tables.throne_neighbours):
+        remove_piece(state, df, throne[0], throne[1], captured)
         state[hnef_vars.DONE_CHNL] = 1
         return state
 
     ## capturing the king next to the throne
-
     if current_player == at:
-        # king is above throne
-        if state[df][throne[0]-1][throne[0]] == 2 and state[at][throne[0]-1][throne[0]-1] > 0 and state[at][throne[0]-1][throne[0]+1] > 0 and state[at][throne[0]-2][throne[0]] > 0:
-            state[df][throne[0]-1][throne[0]] = 0
-            state[hnef_vars.DONE_CHNL] = 1
-            return state
-        # king is below throne  
-        elif state[df][throne[0]+1][throne[0]] == 2 and state[at][throne[0]+1][throne[0]-1] > 0 and state[at][throne[0]+1][throne[0]+1] > 0 and state[at][throne[0]+2][throne[0]] > 0:
-            state[df][throne[0]+1][throne[0]] = 0
-            state[hnef_vars.DONE_CHNL] = 1
-            return state
-        # king is left of throne 
-        elif state[df][throne[0]][throne[0]-1] == 2 and state[at][throne[0]-1][throne[0]-1] > 0 and state[at][throne[0]+1][throne[0]-1] > 0 and state[at][throne[0]][throne[0]-2] > 0:
-            state[df][throne[0]][throne[0]-1] = 0
-            state[hnef_vars.DONE_CHNL] = 1
-            return state
-        # king is right of throne 
-        elif state[df][throne[0]][throne[0]+1] == 2 and state[at][throne[0]-1][throne[0]+1] > 0 and state[at][throne[0]+1][throne[0]+1] > 0 and state[at][throne[0]][throne[0]+2] > 0:
-            state[df][throne[0]][throne[0]+1] = 0
-            state[hnef_vars.DONE_CHNL] = 1
-            return state
+        for king_square, required in tables.beside_throne:
+            if state[df][king_square] == 2:
+                if all(state[at][square] > 0 for square in required):
+                    remove_piece(state, df, king_square[0], king_square[1], captured)
+                    state[hnef_vars.DONE_CHNL] = 1
+                    return state
+                break
 
     return state
 
-# State transition function
-# In: state (current state), action (action taken by current player)
-# Out: state (new state)
-def next_state(state, action):
-
-    # define the current player
+# Method for making a move in place, without checking whether it is valid
+# In: state (current state, changed in place), action (action taken by current player)
+# Out: undo record (action, moved piece value, list of captured pieces, previous turn, done and time values)
+#      that unmake_move uses to restore the state
+def make_move(state, action):
     current_player = turn(state)
-    
-    # assert that the action is valid i.e. that the action is in state[valid_actions]
-    valid_moves = compute_valid_moves(state)
+    (x, y), (new_x, new_y) = action
 
-    if action not in valid_moves:
-        print("Action not in valid moves")
-        assert False
+    piece = state[current_player][x][y]
+    undo = (action, piece, [], current_player,
+            state[hnef_vars.DONE_CHNL][0][0], state[hnef_vars.TIME_CHNL][0][0])
 
-    if state[current_player][action[0][0]][action[0][1]] == 2:
-        state[current_player][action[0][0]][action[0][1]] = 0
-        state[current_player][action[1][0]][action[1][1]] = 2
-    else:
-        state[current_player][action[0][0]][action[0][1]] = 0
-        state[current_player][action[1][0]][action[1][1]] = 1
+    state[current_player][x][y] = 0
+    state[current_player][new_x][new_y] = piece
 
     # check if the player just captured a piece and update the state if so
-    state = check_capture(state, action)
+    check_capture(state, action, undo[2])
 
     # switch turns
     state[hnef_vars.TURN_CHNL][0][0] = np.abs(current_player - 1)
 
+    return undo
+
+# Method for taking back a move made by make_move
+# In: state (state after the move, changed in place), undo record returned by make_move
+# Out: state (state before the move)
+def unmake_move(state, undo):
+    action, piece, captured, current_player, done, time = undo
+    (x, y), (new_x, new_y) = action
+
+    for player, cap_x, cap_y, value in captured:
+        state[player][cap_x][cap_y] = value
+
+    state[current_player][new_x][new_y] = 0
+    state[current_player][x][y] = piece
+
+    state[hnef_vars.TURN_CHNL][0][0] = current_player
+    state[hnef_vars.DONE_CHNL] = done
+    state[hnef_vars.TIME_CHNL] = time
+
+    return state
+
+# Method for computing the Zobrist hash of a state from scratch
+# In: state (current state)
+# Out: 64 bit integer hash of the pieces on the board and whose turn it is
+def hash_state(state):
+    keys = hnef_zobrist.zobrist_keys(state.shape[1])
+    attackers = state[hnef_vars.ATTACKER].ravel()
+    defenders = state[hnef_vars.DEFENDER].ravel()
+
+    state_hash = int(np.bitwise_xor.reduce(keys.pieces[hnef_zobrist.ATTACKER_KEY][attackers > 0]))
+    state_hash ^= int(np.bitwise_xor.reduce(keys.pieces[hnef_zobrist.DEFENDER_KEY][defenders == 1]))
+    state_hash ^= int(np.bitwise_xor.reduce(keys.pieces[hnef_zobrist.KING_KEY][defenders == 2]))
+    if turn(state) == hnef_vars.DEFENDER:
+        state_hash ^= keys.turn
+    return state_hash
+
+# Method for updating a Zobrist hash after a move instead of hashing the new state from scratch
+# In: state_hash (hash before the move), state (state after the move), undo record returned by make_move
+# Out: hash of the state after the move
+def update_hash(state_hash, state, undo):
+    action, piece, captured, current_player, _, _ = undo
+    size = state.shape[1]
+    keys = hnef_zobrist.zobrist_keys(size)
+
+    piece_keys = keys.piece_keys[hnef_zobrist.piece_kind(current_player, piece)]
+    state_hash ^= piece_keys[action[0][0] * size + action[0][1]] ^ piece_keys[action[1][0] * size + action[1][1]]
+
+    for player, x, y, value in captured:
+        state_hash ^= keys.piece_keys[hnef_zobrist.piece_kind(player, value)][x * size + y]
+
+    return state_hash ^ keys.turn
+
+# Method for computing the Zobrist hash of the state in each of the 8 orientations of the board (see hnef_symmetry)
+# In: state (current state)
+# Out: list of 8 hashes, hashes[t] is the hash_state of the state after transform t
+def symmetric_hashes(state):
+    keys = hnef_zobrist.symmetric_keys(state.shape[1])
+    attackers = state[hnef_vars.ATTACKER].ravel()
+    defenders = state[hnef_vars.DEFENDER].ravel()
+
+    hashes = np.bitwise_xor.reduce(keys.pieces[:, hnef_zobrist.ATTACKER_KEY, attackers > 0], axis=1)
+    hashes ^= np.bitwise_xor.reduce(keys.pieces[:, hnef_zobrist.DEFENDER_KEY, defenders == 1], axis=1)
+    hashes ^= np.bitwise_xor.reduce(keys.pieces[:, hnef_zobrist.KING_KEY, defenders == 2], axis=1)
+    hashes = hashes.tolist()
+    if turn(state) == hnef_vars.DEFENDER:
+        hashes = [h ^ keys.turn for h in hashes]
+    return hashes
+
+# Method for updating the hashes of symmetric_hashes after a move, like update_hash
+# In: hashes (before the move), state (state after the move), undo record returned by make_move
+# Out: list of the 8 hashes of the state after the move
+def update_symmetric_hashes(hashes, state, undo):
+    action, piece, captured, current_player, _, _ = undo
+    size = state.shape[1]
+    keys = hnef_zobrist.symmetric_keys(size)
+
+    # squares whose key changes, as (kind, flat index)
+    changes = [(hnef_zobrist.piece_kind(current_player, piece), action[0][0] * size + action[0][1]),
+               (hnef_zobrist.piece_kind(current_player, piece), action[1][0] * size + action[1][1])]
+    for player, x, y, value in captured:
+        changes.append((hnef_zobrist.piece_kind(player, value), x * size + y))
+
+    new_hashes = []
+    for state_hash, piece_keys in zip(hashes, keys.piece_keys):
+        for kind, square in changes:
+            state_hash ^= piece_keys[kind][square]
+        new_hashes.append(state_hash ^ keys.turn)
+    return new_hashes
+
+# Method for finding the canonical orientation of a state, the one with the smallest hash, so that symmetric
+# states get the same canonical hash
+# In: state (current state)
+# Out: canonical hash, transform that turns the state into its canonical orientation
+def canonical_hash(state):
+    return hnef_symmetry.canonical(symmetric_hashes(state))
+
+# Returns the state after transform t (see hnef_symmetry), only the pieces move
+def transform_state(state, t):
+    size = state.shape[1]
+    squares = hnef_symmetry.symmetry_tables(size).squares[t]
+    new_state = state.copy()
+    for channel in (hnef_vars.ATTACKER, hnef_vars.DEFENDER):
+        new_state[channel].ravel()[squares] = state[channel].ravel()
+    return new_state
+
+# Returns the state in its canonical orientation and the transform that turned it into it
+# The valid actions of the canonical state are the valid actions of the state after the same transform
+# (see hnef_symmetry.transform_action and transform_action_ids), and a policy of the canonical state is
+# turned back into a policy of the state with the inverse transform (hnef_symmetry.transform_policy with INVERSE[t])
+def canonical_state(state):
+    canonical, t = canonical_hash(state)
+    return transform_state(state, t), t
+
+# State transition function, checks that the action is valid before making it
+# (use make_move or simulate_next_state to skip the check for actions that are known to be valid)
+# In: state (current state), action (action taken by current player),
+#     valid_moves (optional, the valid moves of the state if they are already known, a set makes the check O(1))
+# Out: state (new state)
+def next_state(state, action, valid_moves=None):
+    # assert that the action is valid i.e. that the action is in state[valid_actions]
+    if valid_moves is None:
+        valid_moves = compute_valid_moves(state)
+
+    if action not in valid_moves:
+        print("Action not in valid moves")
+        assert False
+
+    make_move(state, action)
+
     return state
 
 # Function for finding all actions for a given piece located at (x, y) on the board
 # In: state (current state), x-position of piece, y-position of piece
 # Out: list of all possible actions where action a = ((x, y), (new_x, new_y))
 def actions_for_piece(state, x, y):
-    actions = []
+    # the position of every piece
+    full_board = (state[hnef_vars.ATTACKER] + state[hnef_vars.DEFENDER]).tolist()
+    tables = hnef_tables.board_tables(state.shape[1])
 
-    board_size = state.shape[1]
+    return slide_piece(full_board, x, y, tables)
 
-    # the position of every piece
-    full_board = state[hnef_vars.ATTACKER] + state[hnef_vars.DEFENDER]
+# Finds the actions of the piece at (x, y) by walking the precomputed rays until another piece is hit
+# In: full_board (nested list of the position of every piece, 2 for the king), position of the piece, lookup tables
+# Out: list of all possible actions where action a = ((x, y), (new_x, new_y))
+def slide_piece(full_board, x, y, tables):
+    actions = []
+    is_king = full_board[x][y] == 2
+    throne = tables.throne
 
-    throne = (board_size // 2, board_size // 2)
-    # can the piece move up?
-    if x > 0:
-        pos_x = x
-        pos_y = y 
+    for ray in tables.rays[x][y]:
         # continue until on the edge or about to collide with another piece
-        while pos_x > 0 and not full_board[pos_x - 1, y]:
-            pos_x -= 1
+        for square in ray:
+            if full_board[square[0]][square[1]]:
+                break
             # the action isn't possible if the destination is the throne, except if the piece is the king
-            if ((full_board[x, y] == 2 and ((pos_x, y) == throne))) or (((pos_x, y) != throne)):
-                actions.append(((x, y), (pos_x, y)))
-
-    # can the piece move down?
-    if x < board_size - 1:
-        pos_x = x
-        pos_y = y
-        # continue until on the edge or about to collide with another piece
-        while pos_x < board_size - 1 and not full_board[pos_x + 1, y]:
-            pos_x += 1
-
-            if ((full_board[x, y] == 2 and ((pos_x, y) == throne))) or (((pos_x, y) != throne)):
-                actions.append(((x, y), (pos_x, y)))
-
-    # can the piece move left?
-    if y > 0:
-        pos_x = x
-        pos_y = y
-        while pos_y > 0 and not full_board[x, pos_y - 1]:
-            pos_y -= 1
-
-            if ((full_board[x, y] == 2 and ((x, pos_y) == throne))) or (((x, pos_y) != throne)):
-                actions.append(((x, y), (x, pos_y)))
-                
-    # can the piece move right?
-    if y < board_size - 1:
-        pos_x = x
-        pos_y = y
-        while pos_y < board_size - 1 and not full_board[x, pos_y + 1]:
-            pos_y += 1
-
-            if ((full_board[x, y] == 2 and ((x, pos_y) == throne))) or (((x, pos_y) != throne)):
-                actions.append(((x, y), (x, pos_y)))
+            if is_king or square != throne:
+                actions.append(((x, y), square))
 
     return actions
 
@@ -314,60 +378,203 @@ def actions_for_piece(state, x, y):
 def compute_valid_moves(state):
     actions = []
 
-    board_size = state.shape[1]
-
     current_player = turn(state)
 
-    # Iterate through the entire board
-    for i in range(board_size):
-            for j in range(board_size):
-                # if the current player has a piece at (i,j), check for valid actions
-                if state[current_player, i, j]:
-                    piece_actions = actions_for_piece(state, i, j)
+    full_board = (state[hnef_vars.ATTACKER] + state[hnef_vars.DEFENDER]).tolist()
+    tables = hnef_tables.board_tables(state.shape[1])
+
+    # every piece of the current player, in the same row by row order as looping through the board
+    for i, j in np.argwhere(state[current_player]).tolist():
+        actions += slide_piece(full_board, i, j, tables)
 
-                    for a in piece_actions:
-                        actions.append(a)
     return actions
 
-## Not finished, will probably need DFS to properly check
-# In: state (current state), action (possible actions for current player)
-# Out: list of all possible actions for all pieces of the current player 
-#      where action a = ((x, y), (new_x, new_y))
-def check_enclosure(state, action):
-    board_size = state.shape[1] # get board size
-    wall_positions = [] # holds wall positions for specific board size
-
-    # populate wall positions array with tuples of (row_index, col_index)
-    for i in range(board_size): # row index loop
-        for j in range(board_size): # col index loop
-            # bottom or top wall indices
-            if i == 0 or i == board_size - 1:
-                wall_positions.append((i,j))
-            # side walls
-            elif j == 0 or j == board_size -1:
-                wall_positions.append((i,j))
-
-    # list comprehension to check if a wall position is within the list of 
-    # possible actions for the defender
-    # appends those locations if they exist in the action list
-    # wall_moves = [pos for pos in wall_positions if pos in action]
-
-    # not as pretty but still works
-    # should we break early or add some terminating condition?
-    wall_moves = []
-    
-    for pos in wall_positions:
-        for a in action:
-            if a[1] == pos:
-                wall_moves.append(pos)
-
-    # if no defender pieces can move to a wall then they are either enclosed or 
-    # there are no remaining defender pieces
-    # either way the game is over and the attacker wins
-    if len(wall_moves) == 0:
-        return True, hnef_vars.ATTACKER
+# Function that computes the valid moves of many states at once with array operations
+# A piece can move k squares in a direction if it could move k - 1 squares and the k-th square is empty,
+# so the moves are found by stepping every piece on every board forward one square at a time
+# In: states (array of shape (B, 5, board size, board size)), layout of the action ids (see action_codec)
+# Out: boolean array of shape (B, number of action ids), True where the action id is valid, e.g. where
+#      ((x * size + y) * size + new_x) * size + new_y is valid for the square layout
+def compute_valid_moves_batch(states, layout=action_codec.SQUARE):
+    num_states, _, size, _ = states.shape
+    num_squares = size * size
+    tables = hnef_tables.board_tables(size)
+    throne = tables.throne[0] * size + tables.throne[1]
+
+    attackers = states[:, hnef_vars.ATTACKER].reshape(num_states, num_squares)
+    defenders = states[:, hnef_vars.DEFENDER].reshape(num_states, num_squares)
+    empty = (attackers == 0) & (defenders == 0)
+    kings = defenders == 2
+
+    # pieces of the player whose turn it is on each board
+    defenders_turn = np.max(states[:, hnef_vars.TURN_CHNL].reshape(num_states, num_squares), axis=1) == 1
+    pieces = np.where(defenders_turn[:, None], defenders > 0, attackers > 0)
+
+    directional = layout == action_codec.DIRECTIONAL
+    if directional:
+        valid = np.zeros((num_states, num_squares, len(hnef_tables.DIRECTIONS), size - 1), dtype=bool)
     else:
+        valid = np.zeros((num_states, num_squares, num_squares), dtype=bool)
+    for d, direction_steps in enumerate(tables.steps):
+        # reach[b, s]: the piece on square s of board b can move at least k squares in this direction
+        reach = pieces
+        for k, (src, dest) in enumerate(direction_steps):
+            reach_k = np.zeros_like(reach)
+            reach_k[:, src] = reach[:, src] & empty[:, dest]
+            reach = reach_k
+
+            # only the king can land on the throne, but the other pieces can pass through it
+            landing = reach[:, src]
+            throne_moves = dest == throne
+            if throne_moves.any():
+                landing[:, throne_moves] &= kings[:, src[throne_moves]]
+            if directional:
+                valid[:, src, d, k] = landing
+            else:
+                valid[:, src, dest] = landing
+
+    return valid.reshape(num_states, -1)
+
+# State transition function for many states at once, applies one action per state and resolves the
+# captures of every board with array operations, following the same rules as check_capture
+# The actions are trusted to be valid, use compute_valid_moves_batch to find the valid ones
+# In: states (array of shape (B, 5, board size, board size)), action_ids (array of B action ids, see compute_valid_moves_batch),
+#     layout of the action ids (see action_codec)
+# Out: new states (the given states aren't changed), rewards (1 where the player who moved won, 0 otherwise),
+#      done (boolean array, True where the game is over after the move)
+def next_state_batch(states, action_ids, layout=action_codec.SQUARE):
+    num_states, _, size, _ = states.shape
+    num_squares = size * size
+    tables = hnef_tables.board_tables(size)
+    throne = tables.throne[0] * size + tables.throne[1]
+    at = hnef_vars.ATTACKER
+    df = hnef_vars.DEFENDER
+
+    rows = np.arange(num_states)
+    action_ids = np.asarray(action_ids)
+    if layout == action_codec.DIRECTIONAL:
+        action_ids = action_codec.directional_to_square(size)[action_ids]
+    src = action_ids // num_squares
+    dest = action_ids % num_squares
+
+    current_player = np.max(states[:, hnef_vars.TURN_CHNL].reshape(num_states, num_squares), axis=1).astype(np.intp)
+    other_player = 1 - current_player
+    attackers_turn = current_player == at
+
+    # piece planes with an extra empty square at index num_squares that off board neighbours point to
+    pieces = np.zeros((num_states, 2, num_squares + 1), dtype=states.dtype)
+    pieces[:, :, :num_squares] = states[:, :2].reshape(num_states, 2, num_squares)
+
+    # move the pieces
+    moved = pieces[rows, current_player, src]
+    pieces[rows, current_player, src] = 0
+    pieces[rows, current_player, dest] = moved
+
+    ## capturing normal pieces normally
+    for d in range(len(hnef_tables.DIRECTIONS)):
+        neighbour = tables.neighbours[d, dest]
+        beyond = tables.beyond[d, dest]
+        captured = (pieces[rows, other_player, neighbour] == 1) & (pieces[rows, current_player, beyond] > 0)
+        pieces[rows[captured], other_player[captured], neighbour[captured]] = 0
+
+    king_on_throne = pieces[:, df, throne] == 2
+
+    ## capturing normal pieces with the throne
+    # if the king is on the throne then the white pieces cant be captured in this way
+    # (only one direction can have the throne beyond the neighbour)
+    for d in range(len(hnef_tables.DIRECTIONS)):
+        neighbour = tables.neighbours[d, dest]
+        beyond = tables.beyond[d, dest]
+        captured = attackers_turn & ~king_on_throne & (pieces[rows, df, neighbour] == 1) & (beyond == throne)
+        pieces[rows[captured], df, neighbour[captured]] = 0
+
+    king_captured = np.zeros(num_states, dtype=bool)
+
+    ## capturing the king normally
+    for d in range(len(hnef_tables.DIRECTIONS)):
+        neighbour = tables.neighbours[d, dest]
+        beyond = tables.beyond[d, dest]
+        captured = ~king_on_throne & (pieces[rows, df, neighbour] == 2) & (pieces[rows, at, beyond] > 0)
+        pieces[rows[captured], df, neighbour[captured]] = 0
+        king_captured |= captured
+
+    ## capturing the king on the throne
+    throne_neighbours = [x * size + y for x, y in tables.throne_neighbours]
+    captured = king_on_throne & np.all(pieces[:, at, throne_neighbours] > 0, axis=1)
+    pieces[captured, df, throne] = 0
+    king_captured |= captured
+
+    ## capturing the king next to the throne
+    for king_square, required in tables.beside_throne:
+        king_square = king_square[0] * size + king_square[1]
+        required = [x * size + y for x, y in required]
+        captured = attackers_turn & (pieces[:, df, king_square] == 2) & np.all(pieces[:, at, required] > 0, axis=1)
+        pieces[captured, df, king_square] = 0
+        king_captured |= captured
+
+    new_states = np.copy(states)
+    new_states[:, :2] = pieces[:, :, :num_squares].reshape(num_states, 2, size, size)
+    new_states[king_captured, hnef_vars.DONE_CHNL] = 1
+    # switch turns
+    new_states[:, hnef_vars.TURN_CHNL, 0, 0] = other_player
+
+    # is the game over? (see is_over)
+    defenders = pieces[:, df, :num_squares]
+    king_escaped = np.any(defenders[:, tables.edges.ravel()] == 2, axis=1)
+    king_missing = ~np.any(defenders == 2, axis=1)
+    enclosed = ~king_missing & ~king_escaped & check_enclosure_batch(new_states)
+    done = king_missing | king_escaped | enclosed
+    winner = np.where(king_missing | enclosed, at, df)
+    rewards = (done & (winner == current_player)).astype(np.int64)
+
+    return new_states, rewards, done
+
+# Function for checking whether the attackers have enclosed every defender
+# Flood fills the squares without attackers from the edges of the board, the defenders are enclosed
+# if none of them (the king included) can be reached this way
+# In: state (current state), action (action that was just taken)
+# Out: boolean (are the defenders enclosed?), player who won (the attacker) or -1
+def check_enclosure(state, action):
+    tables = hnef_tables.board_tables(state.shape[1])
+    defenders = state[hnef_vars.DEFENDER] > 0
+
+    # a defender on the edge can't be enclosed
+    if np.any(defenders[tables.edges]):
+        return False, -1
+
+    # connected groups of squares without attackers
+    labels, num_labels = ndimage.label(state[hnef_vars.ATTACKER] == 0)
+    # groups that touch the edge of the board
+    open_labels = set(labels[tables.edges].tolist())
+    open_labels.discard(0)
+
+    if open_labels.intersection(labels[defenders].tolist()):
         return False, -1
+    else:
+        return True, hnef_vars.ATTACKER
+
+# Function for checking whether the attackers have enclosed every defender for many states at once,
+# same as check_enclosure but the flood fill is done for every board together by repeatedly growing
+# the reachable squares by one step until they stop changing
+# In: states (array of shape (B, 5, board size, board size))
+# Out: boolean array, True where the defenders are enclosed
+def check_enclosure_batch(states):
+    tables = hnef_tables.board_tables(states.shape[2])
+    open_squares = states[:, hnef_vars.ATTACKER] == 0
+
+    reachable = open_squares & tables.edges
+    while True:
+        grown = reachable.copy()
+        grown[:, 1:] |= reachable[:, :-1]
+        grown[:, :-1] |= reachable[:, 1:]
+        grown[:, :, 1:] |= reachable[:, :, :-1]
+        grown[:, :, :-1] |= reachable[:, :, 1:]
+        grown &= open_squares
+        if np.array_equal(grown, reachable):
+            break
+        reachable = grown
+
+    return ~np.any(reachable & (states[:, hnef_vars.DEFENDER] > 0), axis=(1, 2))
 
 # Function for checking if the game is over
 # In: state (current state), action (action that was just taken)
@@ -375,77 +582,48 @@ def check_enclosure(state, action):
 def is_over(state, action):
     at = hnef_vars.ATTACKER
     df = hnef_vars.DEFENDER
-    full_board = state[at] + state[df]
-    board_size = state.shape[1]    
-    # current player
-    player = int(np.max(state[hnef_vars.TURN_CHNL]))
-    # other player
-    other_player = np.abs(player - 1)
+    tables = hnef_tables.board_tables(state.shape[1])
     # has the king been captured?
     if np.max(state[df]) < 2:
         # print("***King captured")
         return True, at
     # has the king escaped?
-    elif np.max(state[df][0]) == 2 or np.max(state[df][:,0]) == 2 or np.max(state[df][:,board_size-1]) == 2 or np.max(state[df][board_size-1]) == 2:
+    elif np.max(state[df][tables.edges]) == 2:
         # print("***King escaped")
         return True, df
-    # has the attacker enclosed the defender? NOT IMPLEMENTED
-    # elif check_enclosure(state,action)[0]:
-    #     return True, at
+    # has the attacker enclosed the defender?
+    elif check_enclosure(state, action)[0]:
+        return True, at
     # no win
     else:
         return False, -1
 
 # Method for simulating a step taken, without changing the current state
+# The end of the game is checked on the state after the action, and the reward is for the player who took it
 # In: state (current state), action (action selected)
-# Out: New state, int reward, boolean representing whether the game is finished
+# Out: New state, int reward (1 if the action won the game, -1 if it lost it, 0 otherwise), boolean representing whether the game is finished
 def simulate_step(state, action):
-    state_copy = np.copy(state)
-    new_state = simulate_next_state(state_copy, action)
-    done, winner = is_over(state_copy, action) 
+    new_state = simulate_next_state(state, action)
+    done, winner = is_over(new_state, action)
 
     if not done:
-            reward = 0
+        reward = 0
+    elif turn(state) == winner:
+        reward = 1
     else:
-        current_player = turn(state_copy)
-        if current_player == winner:
-            reward =  1
-        else:
-            reward = 0
+        reward = -1
 
-    return np.copy(new_state), reward, done
+    return new_state, reward, done
 
-# State transition simulation method
+# State transition simulation method, the action is trusted to be valid
 # In: state (current state), action (action taken by current player)
 # Out: state (new state)
 def simulate_next_state(state, action):
     state_copy = np.copy(state)
 
-    # define the current player
-    current_player = turn(state_copy)
-
-    # assert that the action is valid i.e. that the action is in state[valid_actions]
-    valid_moves = compute_valid_moves(state)
-
-    # if action not in valid_moves:
-    #     print("Valid moves: ", valid_moves)
-    #     print(str(state))
-    #     print("***Invalid action: ", action)
-    #     assert False
-
-    if state_copy[current_player][action[0][0]][action[0][1]] == 2:
-        state_copy[current_player][action[0][0]][action[0][1]] = 0
-        state_copy[current_player][action[1][0]][action[1][1]] = 2
-    else:
-        state_copy[current_player][action[0][0]][action[0][1]] = 0
-        state_copy[current_player][action[1][0]][action[1][1]] = 1
-
-    # check if the player just captured a piece and update the state if so
-    state_copy = check_capture(state_copy, action)
-
-    state_copy[hnef_vars.TURN_CHNL][0][0] = np.abs(current_player - 1)
+    make_move(state_copy, action)
 
-    return np.copy(state_copy)
+    return state_copy
 
 # String method to show the state of the board
 # In: state (current state)
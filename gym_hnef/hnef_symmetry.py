@@ -0,0 +1,93 @@
+# Purpose: The 8 symmetries of the square board (4 rotations, each with or without a reflection). The rules of
+# every rule set look the same from each of them, so symmetric positions have the same value and symmetric
+# policies. These tables map squares, actions and policies from one orientation to another, they only depend
+# on the board size so they are built once for every size and cached like hnef_tables.
+# The canonical orientation of a state is the one with the smallest Zobrist hash (see hnef_game.canonical_hash).
+
+# References:
+# https://en.wikipedia.org/wiki/Dihedral_group
+
+import numpy as np
+
+from gym_hnef import action_codec
+
+NUM_TRANSFORMS = 8
+
+# Position of (x, y) after transform t, t % 4 is the number of quarter turns and t >= 4 reflects the board first
+def transform_square(t, x, y, size):
+    if t >= 4:
+        x, y = y, x
+    for i in range(t % 4):
+        x, y = y, size - 1 - x
+    return x, y
+
+# Class holding the symmetry tables for a single board size
+#       squares[t]: flat index (x * size + y) of every square after transform t
+#       actions[layout][t]: action id of every action id of the layout after transform t (see action_codec)
+class SymmetryTables():
+    def __init__(self, size):
+        self.size = size
+
+        self.squares = np.zeros((NUM_TRANSFORMS, size * size), dtype=np.intp)
+        for t in range(NUM_TRANSFORMS):
+            for x in range(size):
+                for y in range(size):
+                    new_x, new_y = transform_square(t, x, y, size)
+                    self.squares[t, x * size + y] = new_x * size + new_y
+
+        self.actions = {}
+        for layout in action_codec.LAYOUTS:
+            count = action_codec.num_actions(size, layout)
+            moves = action_codec.decode_batch(np.arange(count), size, layout) if layout == action_codec.SQUARE else None
+            table = np.zeros((NUM_TRANSFORMS, count), dtype=np.int64)
+            for t in range(NUM_TRANSFORMS):
+                if layout == action_codec.SQUARE:
+                    source = self.squares[t][moves[:, 0, 0] * size + moves[:, 0, 1]]
+                    dest = self.squares[t][moves[:, 1, 0] * size + moves[:, 1, 1]]
+                    table[t] = source * size * size + dest
+                else:
+                    # the moves that leave the board don't have a square layout id, so they are mapped one by one
+                    for action_id in range(count):
+                        (x, y), (new_x, new_y) = action_codec.decode(action_id, size, layout)
+                        table[t, action_id] = action_codec.encode((transform_square(t, x, y, size), transform_square(t, new_x, new_y, size)), size, layout)
+            self.actions[layout] = table
+
+_tables = {}
+
+# Returns the (cached) symmetry tables for a given board size
+def symmetry_tables(size):
+    if size not in _tables:
+        _tables[size] = SymmetryTables(size)
+    return _tables[size]
+
+# Action ((x, y), (new_x, new_y)) after transform t
+def transform_action(action, t, size):
+    (x, y), (new_x, new_y) = action
+    return (transform_square(t, x, y, size), transform_square(t, new_x, new_y, size))
+
+# Action ids after transform t
+# In: array of action ids, transform, board size, layout of the ids
+def transform_action_ids(action_ids, t, size, layout=action_codec.SQUARE):
+    return symmetry_tables(size).actions[layout][t][action_ids]
+
+# Policy (or any values per action id) after transform t, the value of an action moves to the id of the transformed action
+# In: array of shape (..., number of action ids), transform, board size, layout of the ids
+def transform_policy(policy, t, size, layout=action_codec.SQUARE):
+    policy = np.asarray(policy)
+    transformed = np.empty_like(policy)
+    transformed[..., symmetry_tables(size).actions[layout][t]] = policy
+    return transformed
+
+# The transforms form a group that doesn't depend on the board size, so it is worked out once on a 3x3 board
+#       COMPOSE[a][b]: the transform that is the same as transform b followed by transform a
+#       INVERSE[t]: the transform that undoes transform t
+_squares = [list(s) for s in SymmetryTables(3).squares]
+COMPOSE = [[_squares.index([a[i] for i in b]) for b in _squares] for a in _squares]
+INVERSE = [COMPOSE[t].index(0) for t in range(NUM_TRANSFORMS)]
+
+# Canonical hash and orientation from the hashes of every orientation (see hnef_game.symmetric_hashes)
+# In: list of 8 hashes
+# Out: smallest hash, transform that gives it
+def canonical(hashes):
+    canonical_hash = min(hashes)
+    return canonical_hash, hashes.index(canonical_hash)
@@ -0,0 +1,89 @@
+# Purpose: Lookup tables used by the game methods in hnef_game. They only depend on the board size,
+# so they are built once for every size the first time it is used and then cached.
+
+import numpy as np
+
+# Directions in the order the game methods look at them
+# (up, down, left, right) as (row change, column change)
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Class holding the lookup tables for a single board size
+#       rays[x][y]: for each direction, the squares a piece at (x, y) passes over, closest first
+#       capture_partners[x][y]: for each direction where both exist, the neighbour of (x, y) and the square beyond it
+#       throne: the throne square
+#       throne_neighbours: the four squares next to the throne
+#       beside_throne: for each of the four squares next to the throne, the squares attackers need to
+#                      occupy to capture the king standing there (the throne being the fourth side)
+#       edges, corners: boolean (size, size) masks of the squares on the edge and in the corners of the board
+#       steps[d][k - 1]: (source, destination) arrays of flat square indices (x * size + y) for every move of
+#                        k squares in direction d that stays on the board, used by the batched methods
+#       neighbours[d], beyond[d]: flat index of the neighbour of every square in direction d and of the square beyond it,
+#                                 size * size (one past the last square) where either is off the board
+class BoardTables():
+    def __init__(self, size):
+        self.size = size
+
+        self.rays = [[[self.ray(x, y, dx, dy) for dx, dy in DIRECTIONS] for y in range(size)] for x in range(size)]
+
+        self.capture_partners = [[[] for y in range(size)] for x in range(size)]
+        for x in range(size):
+            for y in range(size):
+                for dx, dy in DIRECTIONS:
+                    if self.on_board(x + 2*dx, y + 2*dy):
+                        self.capture_partners[x][y].append(((x + dx, y + dy), (x + 2*dx, y + 2*dy)))
+
+        t = size // 2
+        self.throne = (t, t)
+        self.throne_neighbours = [(t + dx, t + dy) for dx, dy in DIRECTIONS]
+        self.beside_throne = []
+        for kx, ky in self.throne_neighbours:
+            required = [(kx + dx, ky + dy) for dx, dy in DIRECTIONS if (kx + dx, ky + dy) != self.throne]
+            self.beside_throne.append(((kx, ky), required))
+
+        self.edges = np.zeros((size, size), dtype=bool)
+        self.edges[0, :] = True
+        self.edges[-1, :] = True
+        self.edges[:, 0] = True
+        self.edges[:, -1] = True
+
+        self.corners = np.zeros((size, size), dtype=bool)
+        self.corners[0, 0] = self.corners[0, -1] = self.corners[-1, 0] = self.corners[-1, -1] = True
+
+        self.steps = []
+        for dx, dy in DIRECTIONS:
+            direction_steps = []
+            for k in range(1, size):
+                src = [x * size + y for x in range(size) for y in range(size) if self.on_board(x + k*dx, y + k*dy)]
+                dest = [s + k * (dx * size + dy) for s in src]
+                direction_steps.append((np.array(src, dtype=np.intp), np.array(dest, dtype=np.intp)))
+            self.steps.append(direction_steps)
+
+        num_squares = size * size
+        self.neighbours = np.full((len(DIRECTIONS), num_squares), num_squares, dtype=np.intp)
+        self.beyond = np.full((len(DIRECTIONS), num_squares), num_squares, dtype=np.intp)
+        for x in range(size):
+            for y in range(size):
+                for d, (dx, dy) in enumerate(DIRECTIONS):
+                    if self.on_board(x + 2*dx, y + 2*dy):
+                        self.neighbours[d, x * size + y] = (x + dx) * size + y + dy
+                        self.beyond[d, x * size + y] = (x + 2*dx) * size + y + 2*dy
+
+    def on_board(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    # Squares from (x, y) in direction (dx, dy) up to the edge of the board, not including (x, y)
+    def ray(self, x, y, dx, dy):
+        squares = []
+        x, y = x + dx, y + dy
+        while self.on_board(x, y):
+            squares.append((x, y))
+            x, y = x + dx, y + dy
+        return squares
+
+_tables = {}
+
+# Returns the (cached) lookup tables for a given board size
+def board_tables(size):
+    if size not in _tables:
+        _tables[size] = BoardTables(size)
+    return _tables[size]
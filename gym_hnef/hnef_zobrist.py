@@ -0,0 +1,64 @@
+# Purpose: Zobrist keys used to hash game states into 64 bit integers. A state's hash is the XOR of
+# the key of every (piece, square) pair on the board and the turn key when it is the defender's turn,
+# so a move only needs a few XORs to update it (see hash_state and update_hash in the backends).
+
+# References:
+# https://www.chessprogramming.org/Zobrist_Hashing
+
+import numpy as np
+
+from gym_hnef import hnef_symmetry
+
+# Rows of ZobristKeys.pieces
+ATTACKER_KEY = 0
+DEFENDER_KEY = 1
+KING_KEY = 2
+
+# Fixed seed so that the hashes are the same in every process
+SEED = 856
+
+# Class holding the Zobrist keys for a single board size
+#       pieces: uint64 array of shape (3, size * size), one key per piece kind and square
+#       piece_keys: the same keys as nested lists of python ints, faster to index one at a time
+#       turn: key XORed in when it is the defender's turn
+class ZobristKeys():
+    def __init__(self, size):
+        rng = np.random.default_rng(SEED + size)
+        self.size = size
+        self.pieces = rng.integers(0, 2**64, size=(3, size * size), dtype=np.uint64, endpoint=False)
+        self.piece_keys = self.pieces.tolist()
+        self.turn = int(rng.integers(0, 2**64, dtype=np.uint64, endpoint=False))
+
+_keys = {}
+
+# Returns the (cached) Zobrist keys for a given board size
+def zobrist_keys(size):
+    if size not in _keys:
+        _keys[size] = ZobristKeys(size)
+    return _keys[size]
+
+# Returns the row of ZobristKeys.pieces for a piece of the given player with the given value (2 for the king)
+def piece_kind(player, value):
+    if value == 2:
+        return KING_KEY
+    return int(player)
+
+# Class holding the Zobrist keys of every orientation of the board (see hnef_symmetry) for a single board size
+#       pieces[t]: the keys of ZobristKeys.pieces moved to the squares they land on after transform t, so hashing a
+#                  state with pieces[t] gives the hash of the state after transform t
+#       piece_keys[t]: the same keys as nested lists of python ints
+class SymmetricZobristKeys():
+    def __init__(self, size):
+        keys = zobrist_keys(size)
+        squares = hnef_symmetry.symmetry_tables(size).squares
+        self.pieces = np.stack([keys.pieces[:, squares[t]] for t in range(hnef_symmetry.NUM_TRANSFORMS)])
+        self.piece_keys = self.pieces.tolist()
+        self.turn = keys.turn
+
+_symmetric_keys = {}
+
+# Returns the (cached) Zobrist keys of every orientation for a given board size
+def symmetric_keys(size):
+    if size not in _symmetric_keys:
+        _symmetric_keys[size] = SymmetricZobristKeys(size)
+    return _symmetric_keys[size]
@@ -0,0 +1,180 @@
+# Purpose: Perft (performance test) for the move generation and state transition of the game backends.
+# Counts the leaf nodes of the game tree up to a given depth from the initial position of each rule set and
+# from a set of stored mid-game positions, and reports the number of nodes per second.
+# The counts are compared to reference counts so that faster backends can be checked against the array backend.
+# Usage: python -m gym_hnef.perft --rules historical --depth 3 --backend bitboard
+
+# References:
+# https://www.chessprogramming.org/Perft
+
+import argparse
+import time
+
+import numpy as np
+
+from gym_hnef import hnef_game, hnef_vars, hnef_backend
+
+# Mid-game positions reached by random play, as rows of A (attacker), D (defender), K (king) and . (empty)
+# and whose turn it is
+POSITIONS = {
+    'mini': {
+        'midgame1': (['.A.A.',
+                      'AAD..',
+                      '..KD.',
+                      'AA...',
+                      '..DAA'], hnef_vars.ATTACKER),
+        'midgame2': (['ADA..',
+                      'D..AA',
+                      '...K.',
+                      'AA.DA',
+                      '..A..'], hnef_vars.DEFENDER),
+    },
+    'historical': {
+        'midgame1': (['...AAA.AA',
+                      '..A......',
+                      '.......D.',
+                      'A...D.A..',
+                      'AA.DKDD..',
+                      '.A.A....A',
+                      '....D.D..',
+                      '..D.A....',
+                      '....AA...'], hnef_vars.ATTACKER),
+        'midgame2': (['A.A...A..',
+                      '.AA...AAA',
+                      '........D',
+                      '...DD....',
+                      'A..DKD...',
+                      '.....A...',
+                      'D....A...',
+                      'A...A....',
+                      '.A.AA..D.'], hnef_vars.DEFENDER),
+    },
+    'copenhagen': {
+        'midgame1': (['...AAAA..A.',
+                      '.D........A',
+                      '...........',
+                      '...D...DA.A',
+                      'A....D....A',
+                      'AA..DKD..AA',
+                      'A.A..DD....',
+                      'A....DA...A',
+                      '...........',
+                      '....DA.D...',
+                      '...AA.AA...'], hnef_vars.ATTACKER),
+        'midgame2': (['...AAAA.A..',
+                      'A...A.D....',
+                      '....D....D.',
+                      '...D.......',
+                      'A.ADD..A..A',
+                      '.A..D..K.A.',
+                      '...A.A.....',
+                      'A.A..D....D',
+                      '...D....A.A',
+                      '....AA.....',
+                      '.....AAAD..'], hnef_vars.DEFENDER),
+    },
+}
+
+# Node counts of the array backend for depths 1, 2, 3, ... of every position (the bitboard backend agrees on all of them)
+REFERENCE_COUNTS = {
+    'mini': {
+        'start': [24, 280, 6320, 71912, 1443104],
+        'midgame1': [20, 225, 4319, 48925, 914403],
+        'midgame2': [11, 203, 2224, 39121, 422213],
+    },
+    'historical': {
+        'start': [80, 4400, 353200, 19913864],
+        'midgame1': [92, 5097, 467794, 25503824],
+        'midgame2': [55, 5385, 293867, 28785393],
+    },
+    'copenhagen': {
+        'start': [124, 7276, 920688],
+        'midgame1': [134, 12024, 1637864],
+        'midgame2': [86, 13493, 1141220],
+    },
+}
+
+# Builds an array state from the rows of a stored position
+def parse_position(rows, turn):
+    size = len(rows)
+    state = np.zeros((hnef_vars.NUM_CHNLS, size, size))
+    for x, row in enumerate(rows):
+        for y, square in enumerate(row):
+            if square == 'A':
+                state[hnef_vars.ATTACKER, x, y] = 1
+            elif square == 'D':
+                state[hnef_vars.DEFENDER, x, y] = 1
+            elif square == 'K':
+                state[hnef_vars.DEFENDER, x, y] = 2
+    state[hnef_vars.TURN_CHNL, 0, 0] = turn
+    return state
+
+# Returns the array state of every position of a rule set as (name, state) pairs
+def positions(rule_set):
+    result = [('start', hnef_game.init_state(rule_set))]
+    for name, (rows, turn) in POSITIONS[rule_set].items():
+        result.append((name, parse_position(rows, turn)))
+    return result
+
+# Counts the leaf nodes of the game tree below the given state, finished games aren't expanded further
+# In: game (backend module), state (changed during the search but restored before returning), depth
+# Out: number of move sequences of length depth
+def perft(game, state, depth):
+    if depth == 0:
+        return 1
+
+    valid_moves = game.compute_valid_moves(state)
+    # bulk counting, every valid move leads to one leaf
+    if depth == 1:
+        return len(valid_moves)
+
+    nodes = 0
+    for action in valid_moves:
+        undo = game.make_move(state, action)
+        if not game.is_over(state, action)[0]:
+            nodes += perft(game, state, depth - 1)
+        game.unmake_move(state, undo)
+    return nodes
+
+# Runs perft on every position of the given rule sets and prints the results
+# Out: True if every count matched its reference count (when there is one)
+def run(rule_sets, depth, backend):
+    game = hnef_backend.get_backend(backend)
+    all_match = True
+
+    print('Perft depth {} ({} backend)'.format(depth, backend))
+    for rule_set in rule_sets:
+        for name, state in positions(rule_set):
+            state = game.from_array(state)
+
+            start = time.perf_counter()
+            nodes = perft(game, state, depth)
+            elapsed = time.perf_counter() - start
+
+            reference = REFERENCE_COUNTS[rule_set][name]
+            if 1 <= depth <= len(reference):
+                match = nodes == reference[depth - 1]
+                all_match = all_match and match
+                result = 'ok' if match else 'MISMATCH (expected {})'.format(reference[depth - 1])
+            else:
+                result = 'no reference'
+
+            print('  {:10s} {:8s} {:12d} nodes {:8.2f} s {:12.1f} nodes/s  {}'.format(
+                rule_set, name, nodes, elapsed, nodes / max(elapsed, 1e-9), result))
+
+    return all_match
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Hnefatafl perft')
+    parser.add_argument('--rules', type=str, default='all', help='mini, historical, copenhagen or all')
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--backend', type=str, default='array')
+    args = parser.parse_args()
+
+    if args.rules == 'all':
+        rule_sets = list(POSITIONS)
+    else:
+        rule_sets = [args.rules]
+
+    if not run(rule_sets, args.depth, args.backend):
+        raise SystemExit(1)
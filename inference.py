@@ -0,0 +1,160 @@
+# Purpose: Lets many searches share one neural network, whether they run in other processes (see parallel_mcts.py)
+# or in threads of this process (e.g. several self-play games at once), so that the network is called with a
+# batch of positions from all of them instead of once per search, and its weights are never copied.
+#       InferenceServer: thread of the main process that takes the positions sent by the clients from a queue,
+#                        gathers them into a batch until it holds max_batch positions or max_wait seconds have passed
+#                        since the first one arrived, runs the batch through the network in one call to predict and
+#                        sends the values and logits back to each client's own queue
+#       RemoteModel:     stand-in for the model inside a client, with the convert_to_input and predict used by Agent
+# The server keeps the size of every batch and how long every request waited in the queue (see report).
+# If the network fails on a batch, every client of the batch gets an InferenceError instead of its answer, which
+# RemoteModel.predict raises, and the server goes on with the next batch.
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+import config
+
+# Error of a batch the server couldn't run, sent to the clients in place of their answers (it holds the message of
+# the original exception only, so that it can be sent to other processes)
+class InferenceError(RuntimeError):
+    pass
+
+class InferenceServer():
+    # In: model (anything with the predict of Gen_Model), number of clients, multiprocessing context of the clients
+    #     (None when the clients are threads of this process), most positions per batch, most seconds to wait for a batch
+    def __init__(self, model, num_clients, context=None, max_batch=config.INFERENCE_MAX_BATCH, max_wait=config.INFERENCE_MAX_WAIT_MS / 1000):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        if context is None:
+            self.requests = queue.Queue()
+            self.responses = [queue.Queue() for i in range(num_clients)]
+        else:
+            self.requests = context.Queue()
+            self.responses = [context.Queue() for i in range(num_clients)]
+        self.batch_sizes = []       # positions given to the network by every call to predict
+        self.queue_latencies = []   # seconds every request waited before its batch was run
+        self.thread = None
+
+    # Starts the thread that serves the requests
+    def start(self):
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    # Returns the RemoteModel of a client that is a thread of this process
+    def client(self, client):
+        return RemoteModel(self.requests, self.responses[client], client, self.model)
+
+    def serve(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            requests = [request]
+            size = len(request[1])
+
+            # wait for more requests until the batch is full or the first request has waited long enough
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                requests.append(request)
+                size += len(request[1])
+
+            self.run_batch(requests)
+            if stop:
+                return
+
+    def run_batch(self, requests):
+        start = time.perf_counter()
+        try:
+            model_input = np.concatenate([x for client, x, sent in requests])
+            version = self.model.version
+            values, logits = self.model.predict(model_input)
+        except Exception as e:
+            # the clients are waiting for an answer, they would wait forever if the thread died
+            error = InferenceError("*Error: The inference server couldn't run a batch of {} requests: {!r}".format(len(requests), e))
+            for client, x, sent in requests:
+                self.responses[client].put(error)
+            return
+        self.batch_sizes.append(len(model_input))
+        self.queue_latencies.extend(start - sent for client, x, sent in requests)
+
+        first = 0
+        for client, x, sent in requests:
+            last = first + len(x)
+            self.responses[client].put((values[first:last], logits[first:last], version))
+            first = last
+
+    # Stops the serving thread once the requests before it are answered
+    def stop(self):
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
+
+    # Number of batches of each size, in buckets of powers of two (1, 2-3, 4-7, ...)
+    # Out: list of (smallest size of the bucket, number of batches)
+    def histogram(self):
+        if len(self.batch_sizes) == 0:
+            return []
+        buckets = np.floor(np.log2(self.batch_sizes)).astype(np.int64)
+        counts = np.bincount(buckets)
+        return [(2 ** b, int(count)) for b, count in enumerate(counts)]
+
+    # Returns the statistics of the served batches as a string
+    def report(self):
+        if len(self.batch_sizes) == 0:
+            return "Inference server: no batches"
+        latencies = np.array(self.queue_latencies) * 1000
+        lines = ["Inference server: {} batches, {} positions, mean batch {:.2f}, queue latency p50 {:.2f} ms p95 {:.2f} ms max {:.2f} ms".format(
+            len(self.batch_sizes), int(np.sum(self.batch_sizes)), np.mean(self.batch_sizes),
+            np.percentile(latencies, 50), np.percentile(latencies, 95), np.max(latencies))]
+        for size, count in self.histogram():
+            lines.append("  batch size {:5d}-{:5d}: {:6d} {}".format(size, 2 * size - 1, count, '#' * int(np.ceil(40 * count / len(self.batch_sizes)))))
+        return "\n".join(lines)
+
+# Model of a client that sends its positions to an InferenceServer and waits for the answer
+# version is the version of the served model (see Gen_Model.version): a client in a thread of the server's process
+# reads it from the model, a client in another process gets it with every answer (or from whoever runs the client,
+# see parallel_mcts.py) since the model can't be shared with it
+class RemoteModel():
+    # In: request queue of the server, response queue of the client, client number, served model (thread clients only)
+    def __init__(self, requests, responses, client, model=None):
+        self.requests = requests
+        self.responses = responses
+        self.client = client
+        self.model = model
+        self.served_version = 0
+
+    @property
+    def version(self):
+        if self.model is not None:
+            return self.model.version
+        return self.served_version
+
+    @version.setter
+    def version(self, version):
+        self.served_version = version
+
+    def convert_to_input(self, state):
+        return np.expand_dims(state, axis=0).astype(np.float32)
+
+    def predict(self, x):
+        self.requests.put((self.client, x, time.perf_counter()))
+        response = self.responses.get()
+        if isinstance(response, InferenceError):
+            raise response
+        values, logits, self.served_version = response
+        return [values, logits]
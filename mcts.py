@@ -12,21 +12,83 @@ import numpy as np
 import random
 import string
 
-from gym_hnef import hnef_game, hnef_vars
+from gym_hnef import hnef_game, hnef_vars, hnef_backend
 from gym_hnef.envs import hnef_env
 import config
 
+game = hnef_backend.get_backend(config.GAME_BACKEND)
+
+# Proven results of a node for the player to move in it, or of an edge for the player making its move (MCTS-solver)
+WIN = 1
+LOSS = -1
+UNKNOWN = 0
+
+# Visit counts of the root's edges with the proven results taken into account: if a move is a proven win only
+# the winning moves keep their visits (at least one each), otherwise the proven losses lose theirs unless every move is one
+# In: visits and proven results of the root's edges
+def solved_visits(visits, solved):
+    if np.any(solved == WIN):
+        return np.where(solved == WIN, np.maximum(visits, 1), 0)
+    if np.any(solved == LOSS) and not np.all(solved == LOSS):
+        return np.where(solved == LOSS, 0, visits)
+    return visits
+
+# Proven result of a new node for the player to move in it, WIN or LOSS if the game is over in its state (the player who
+# just moved won or lost) and UNKNOWN otherwise. It is worked out once when the node is made, so the traversals that
+# reach the node later don't make the move again to find out whether the game is over
+# In: state of the node, action that led to it
+def terminal_result(state, action):
+    done, winner = game.is_over(state, action)
+    if not done:
+        return UNKNOWN
+    return WIN if winner == game.turn(state) else LOSS
+
+# Returns the key of a state in MCTS.tree, the Zobrist hash of the state or, with config.SYMMETRY, its
+# canonical hash so that the 8 symmetric versions of a state share one node (see hnef_symmetry)
+def state_id(state):
+    if config.SYMMETRY:
+        return game.canonical_hash(state)[0]
+    return game.hash_state(state)
+
 # Class to represent game states (as Nodes) in the Monte Carlo Search Tree
 class Node():
-    def __init__(self, state):
-        self.state = state
-        self.id = self.get_state_id(state)
-        self.turn = hnef_game.turn(state)
+    # id can be given when the hash of the state is already known (see MCTS.expand)
+    # with config.SYMMETRY the hashes of every orientation are kept so that the canonical hash of the
+    # children can be updated from them, and the id is the smallest of them
+    def __init__(self, state, id=None, hashes=None):
+        # the state is stored packed (see hnef_compact) and only unpacked when it is needed
+        self.packed_state = game.pack_state(state)
+        self.hashes = None
+        if config.SYMMETRY:
+            if hashes is None:
+                hashes = game.symmetric_hashes(state)
+            self.hashes = hashes
+            id = min(hashes)
+        elif id is None:
+            id = self.get_state_id(state)
+        self.id = id
+        self.turn = game.turn(state)
 
         self.edges = [] # tuple pairs of (action, Edge)
 
+        # statistics of the edges, entry i belongs to self.edges[i] (see MCTS.expand)
+        # priors are the priors of the network, P is what selection uses, the priors mixed with
+        # Dirichlet noise while the node is the root of a search (see MCTS.add_noise)
+        self.N = None
+        self.W = None
+        self.priors = None
+        self.P = None
+
+        # proven result of the node (WIN, LOSS or UNKNOWN) and of each of its edges, see MCTS.backpropagation
+        self.proven = UNKNOWN
+        self.solved = None
+
+    @property
+    def state(self):
+        return game.unpack_state(self.packed_state)
+
     def __str__(self):
-        return "State: " + self.id + "\nPlayer's Turn: " + str(self.turn) + "\nNumber of Edges: " + str(len(self.edges))
+        return "State: " + str(self.id) + "\nPlayer's Turn: " + str(self.turn) + "\nNumber of Edges: " + str(len(self.edges))
         
     def is_leaf(self):
         # returns true if edges list is empty
@@ -35,11 +97,10 @@ class Node():
         else:
             return False
 
-    # Method that sets the id for each node equal to the board positions of the given state
+    # Method that sets the id for each node equal to the Zobrist hash of the given state
     # associated with a node
     def get_state_id(self, state):
-        id = hash(str([state[0], state[1]]))
-        return str(id)
+        return game.hash_state(state)
 
     def set_node_id(self, id):
         self.id = id
@@ -47,29 +108,41 @@ class Node():
 # Class to represent connections between game states (Edges)
 # Each edge is directed meaning that there is a source node and
 # a destination node, i.e., state 1 (source) + action -> state 2 (dest)
+# The destination node is None until the edge is first taken (see MCTS.add_dest)
+# The statistics of an edge are kept in the arrays of its source node, at index
+#       N: How many times has this action been taken?
+#       W: Total value for the next state
+#       Q: Mean value for the next state
+#       P: Probability of picking this action
 class Edge():
-    def __init__(self, source, dest, prior, action):
+    def __init__(self, source, dest, index, action):
         self.source = source    # input node
         self.dest = dest        # output node
-        self.turn = hnef_game.turn(source.state)    # current players turn
+        self.index = index      # index of the edge in source.edges and the statistics arrays of source
+        self.turn = source.turn    # current players turn
         self.action = action    # action taken to get from source to dest
-        
-        # N: How many times has this action been taken?
-        # W: Total value for the next state
-        # Q: Mean value for the next state
-        # P: Probability of picking this action
-        self.metrics = {
-            'N': 0,
-            'W': 0,
-            'Q': 0,
-            'P': prior,
-        }
-    
+
+    @property
+    def N(self):
+        return self.source.N[self.index]
+
+    @property
+    def W(self):
+        return self.source.W[self.index]
+
+    @property
+    def Q(self):
+        return self.W / self.N if self.N > 0 else 0
+
+    @property
+    def P(self):
+        return self.source.P[self.index]
+
     def __str__(self):
         return "Edge => Source State:" + str(self.source) + ", Action: " + str(self.action) + ", Turn: " + str(self.turn) + ", Destination State:" + str(self.dest)
 
 # Class that represents a Monte Carlo Search tree with 
-# a dict representing the tree itself, containing Nodes and Edges
+# a dict representing the tree itself, containing Nodes and Edges keyed by the id of their state (see state_id)
 class MCTS():
     def __init__(self, root):
         self.root = root
@@ -78,6 +151,12 @@ class MCTS():
         # the tree and exploiting the discovered paths
         # Cp in UCT (Upper confidence bound for tree)
         self.cpuct = config.CPUCT
+        self.nodes_allocated = 0    # nodes created since the tree was made
+        self.num_simulations = 0    # simulations backed up since the tree was made
+        self.nodes_kept = 0         # nodes kept and freed by the last prune
+        self.nodes_freed = 0
+        self.total_nodes_freed = 0
+        self.noisy_root = None      # node whose priors hold the Dirichlet noise of the search (see add_noise)
         self.add_node(root)
 
     def __len__(self):
@@ -96,76 +175,93 @@ class MCTS():
 
     # Method to traverse/build the tree by simulating actions with the highest expected value
     # and keeping track of the actions taken
+    #       Q + U is computed for all the edges of a node at once from its statistics arrays, the root's priors
+    #       are mixed with Dirichlet noise once per search (see add_noise)
+    #       moves that are proven losses are never taken, and the traversal stops at proven nodes, which include the
+    #       nodes where the game is over (see terminal_result)
+    #       the value returned is for the player to move at the leaf
+    # Out: leaf node, value (its proven result, 0 if it has none) and done flag (1 if it has one), path (list of edges taken)
     def traverse_tree(self):
-        alpha = config.ALPHA    # learning rate
-
         done = 0    # environment termination criteria
         value = 0   # holds predicted value of next state
         path = []   # holds edges taken during tree traversal
         prev_actions = []   # used to detect repetition problem
 
         current_node = self.root    # always begin traversal at the root of the tree
+        if self.noisy_root is not current_node and not current_node.is_leaf():
+            self.add_noise()
+
+        prev_nodes = {current_node.id}  # ids of the nodes on the path
+
+        # until you reach the end of the tree (no more actions can be taken) or a node whose result is known
+        while not current_node.is_leaf() and current_node.proven == UNKNOWN:
+            N = current_node.N
+            # calculate upper bound of for state value approximation
+            Q = np.divide(current_node.W, N, out=np.zeros(len(N)), where=N > 0)
+            QU = Q + self.cpuct * current_node.P * np.sqrt(np.sum(N)) / (1 + N)
+            QU[current_node.solved == LOSS] = -np.inf
+
+            # set the next simulated action/edge pair as the action/edge that produces the highest value for the resulting
+            # state, an edge can't lead back to a node on the path, which is only known once its destination exists
+            while True:
+                best = int(np.argmax(QU))
+                if QU[best] == -np.inf:
+                    # every move leads back to the path (or is a proven loss), finish the traversal like a repetition
+                    return current_node, 0, 1, path
+
+                next_simulated_action, next_simulated_edge = current_node.edges[best]
+                # the destination of an edge is only created the first time the edge is taken
+                if next_simulated_edge.dest is None:
+                    self.add_dest(next_simulated_edge)
+                if next_simulated_edge.dest.id not in prev_nodes:
+                    break
+                QU[best] = -np.inf
+
+            prev_actions.append(next_simulated_action) # keep track of all simulated actions chosen
+            prev_nodes.add(next_simulated_edge.dest.id)
 
-        prev_nodes = [current_node.id]
-
-        # until you reach the end of the tree (no more actions can be taken)
-        while not current_node.is_leaf():
-            if current_node == self.root:
-                epsilon = config.EPSILON
-                NU = np.random.dirichlet([alpha] * len(current_node.edges)) # dirichlet distributed random variables
-            else:
-                epsilon = 0
-                NU = [0] * len(current_node.edges)
-
-            NB = 0
-            for action, edge in current_node.edges:
-                NB = NB + edge.metrics['N']
-
-            max_QU = float('-inf')
-            # loop through all actions to find the action that will maximize the expected value
-            for i, (action, edge) in enumerate(current_node.edges):
-                # calculate upper bound of for state value approximation
-                U = self.cpuct * ((1 - epsilon) * edge.metrics['P'] + epsilon * NU[i]) * np.sqrt(NB) / (1 + edge.metrics['N'])
-                Q = edge.metrics['Q']
-                # set the next simulated action/edge pair as the action/edge that produces the highest value for the resulting state
-                
-                if (Q + U > max_QU and (edge.dest.id not in prev_nodes)):
-                    max_QU = Q + U
-                    next_simulated_action = action
-                    next_simulated_edge = edge
-
-            prev_actions.append(action) # keep track of all simulated actions chosen
-            prev_nodes.append(next_simulated_edge.dest.id)
-
-            # check to see if that last 6 actions were repetitions
-            if len(prev_actions) > 6:
-                this_last   = prev_actions[-1]
-                this_next   = prev_actions[-3]
-                this_first  = prev_actions[-5]
-                other_last  = prev_actions[-2]
-                other_next  = prev_actions[-4]
-                other_first = prev_actions[-6]
-                # if a repetition is found, finish the tree traversal
-                if (np.mean(this_last == this_next) == 1 and np.mean(this_last == this_first) == 1) and (np.mean(other_last == other_next) == 1 and np.mean(other_last == other_first) == 1):
-                    new_state, value, done = hnef_game.simulate_step(current_node.state, next_simulated_action)
-                    current_node = next_simulated_edge.dest
-                    path.append(next_simulated_edge)
-                    print("***Repitition condition met in MCTS")
-                    return current_node, value, done, path
-
-
-            new_state, value, done = hnef_game.simulate_step(current_node.state, next_simulated_action)    
             current_node = next_simulated_edge.dest # new current node is the destination of the next simulated action
             path.append(next_simulated_edge)    # store the edge taken
 
+            # check to see if that last 6 actions were repetitions, if so finish the tree traversal
+            if len(prev_actions) > 6 and prev_actions[-1] == prev_actions[-3] == prev_actions[-5] and prev_actions[-2] == prev_actions[-4] == prev_actions[-6]:
+                print("***Repitition condition met in MCTS")
+                break
+
+        if current_node.proven != UNKNOWN:
+            value = current_node.proven
+            done = 1
+
         return current_node, value, done, path
 
+    # Method that mixes Dirichlet noise into the priors of the root's edges, sampled once per search so that
+    # every traversal of the search sees the same noise
+    def add_noise(self):
+        root = self.root
+        self.clear_noise()
+        epsilon = config.EPSILON
+        noise = np.random.dirichlet([config.ALPHA] * len(root.edges))
+        root.P = (1 - epsilon) * root.priors + epsilon * noise
+        self.noisy_root = root
+
+    # Method that puts back the priors of the node holding the noise, new noise is sampled at the start of the next search
+    # (called at the start of every search, see Agent.search)
+    def clear_noise(self):
+        if self.noisy_root is not None:
+            self.noisy_root.P = self.noisy_root.priors
+            self.noisy_root = None
+
     # Method that update the edges contained within path with
     # the results of the previous tree traversal
+    #       the proven result of the leaf is passed up the path minimax style: a node is a proven win if one of
+    #       its moves leads to a proven loss for the opponent, and a proven loss if all of them lead to proven wins
     # In: node that MCTS terminated at, value of the outcome of the tree traversal, path taken during tree traversal
     # Out: None
     def backpropagation(self, leaf_node, value, path):
-        current_player = hnef_game.turn(leaf_node.state)
+        current_player = leaf_node.turn
+        self.num_simulations += 1
+        if leaf_node.proven != UNKNOWN:
+            self.propagate_proof(path)
 
         for edge in path:
             # print(str(edge))
@@ -176,10 +272,131 @@ class MCTS():
             else:
                 direction = -1
 
-            edge.metrics['N'] += 1
-            edge.metrics['W'] = edge.metrics['W'] + value * direction
-            edge.metrics['Q'] = edge.metrics['W'] / edge.metrics['N']
+            edge.source.N[edge.index] += 1
+            edge.source.W[edge.index] += value * direction
+
+    def propagate_proof(self, path):
+        for edge in reversed(path):
+            dest = edge.dest
+            source = edge.source
+            if dest.proven == UNKNOWN:
+                return
+            source.solved[edge.index] = dest.proven if dest.turn == source.turn else -dest.proven
+            if source.solved[edge.index] == WIN:
+                source.proven = WIN
+            elif np.all(source.solved == LOSS):
+                source.proven = LOSS
+            else:
+                return
+
+    def is_solved(self, node):
+        return node.proven != UNKNOWN
+
+    # Methods that add and remove a virtual loss on the edges of a path, used while the leaf of the path
+    # waits to be evaluated (see Agent.simulate_batch)
+    # every virtual visit counts as a loss for the player making the move of the edge
+    def add_virtual_loss(self, path, amount):
+        for edge in path:
+            edge.source.N[edge.index] += amount
+            edge.source.W[edge.index] -= amount
+
+    def remove_virtual_loss(self, path, amount):
+        for edge in path:
+            edge.source.N[edge.index] -= amount
+            edge.source.W[edge.index] += amount
+
+    def is_leaf(self, node):
+        return node.is_leaf()
 
     # Method to add a new node to the tree
     def add_node(self, node):
-        self.tree[node.id] = node
\ No newline at end of file
+        self.tree[node.id] = node
+        self.nodes_allocated += 1
+
+    # Method that expands a leaf with an edge for every possible action, only the action and prior are stored
+    # until the edge is first taken, most edges of a wide position never are
+    # In: leaf node, possible actions in the leaf's state, prior probability of each action
+    # Out: None
+    def expand(self, leaf, actions, priors):
+        leaf.edges = [(action, Edge(leaf, None, i, action)) for i, action in enumerate(actions)]
+        leaf.N = np.zeros(len(actions), dtype=np.float64)
+        leaf.W = np.zeros(len(actions), dtype=np.float64)
+        leaf.priors = np.asarray(priors, dtype=np.float64)
+        leaf.P = leaf.priors
+        leaf.solved = np.zeros(len(actions), dtype=np.int8)
+
+    # Method that creates (or finds, for a transposition) the destination node of an edge, a new node
+    # gets its proven result if the game is over in it (see terminal_result)
+    # In: edge whose destination is None
+    # Out: None
+    def add_dest(self, edge):
+        source = edge.source
+        new_state = source.state.copy()
+        undo = game.make_move(new_state, edge.action)
+        # the id of the new node is updated from the source's id rather than hashing the new state
+        if config.SYMMETRY:
+            hashes = game.update_symmetric_hashes(source.hashes, new_state, undo)
+            new_node_id = min(hashes)
+        else:
+            hashes = None
+            new_node_id = game.update_hash(source.id, new_state, undo)
+
+        # if the node doesn't already exist in the tree, create it
+        if new_node_id not in self.tree:
+            node = Node(new_state, new_node_id, hashes)
+            node.proven = terminal_result(new_state, edge.action)
+            self.add_node(node)
+        else:
+            node = self.tree[new_node_id]
+        edge.dest = node
+
+    # Method that moves the root to the destination of one of its edges after that action is played,
+    # creating the destination if the search never took the edge, and frees the rest of the tree
+    # In: action of one of the root's edges
+    def advance(self, action):
+        for edge_action, edge in self.root.edges:
+            if edge_action == action:
+                if edge.dest is None:
+                    self.add_dest(edge)
+                self.prune(edge.dest)
+                return
+
+    # Method that makes new_root the root and frees every node that can't be reached from it,
+    # which is everything except its subtree (and the transpositions into it)
+    # In: new root node
+    # Out: number of nodes kept, number of nodes freed
+    def prune(self, new_root):
+        self.clear_noise()
+        kept = {new_root.id: new_root}
+        stack = [new_root]
+        while len(stack) > 0:
+            node = stack.pop()
+            for action, edge in node.edges:
+                if edge.dest is not None and edge.dest.id not in kept:
+                    kept[edge.dest.id] = edge.dest
+                    stack.append(edge.dest)
+
+        self.nodes_kept = len(kept)
+        self.nodes_freed = len(self.tree) - len(kept)
+        self.total_nodes_freed += self.nodes_freed
+        self.tree = kept
+        self.root = new_root
+        return self.nodes_kept, self.nodes_freed
+
+    # Number of nodes created per simulation since the tree was made
+    def nodes_per_simulation(self):
+        return self.nodes_allocated / max(self.num_simulations, 1)
+
+    # Returns the game state of a node
+    def get_state(self, node):
+        return node.state
+
+    # Returns the actions of the root's edges with their visit counts and mean values
+    def root_statistics(self):
+        root = self.root
+        actions = [action for action, edge in root.edges]
+        if root.is_leaf():
+            return actions, np.zeros(0), np.zeros(0)
+        visits = root.N.copy()
+        values = np.divide(root.W, visits, out=np.zeros(len(visits)), where=visits > 0)
+        return actions, solved_visits(visits, root.solved), values
\ No newline at end of file
@@ -0,0 +1,356 @@
+# Purpose: Monte Carlo Search Tree stored in preallocated NumPy arrays instead of Node and Edge objects (see mcts.py).
+# The statistics of the edges are kept as a struct of arrays and every node owns a contiguous slice of the edge
+# arrays, so choosing the next edge is a single argmax over Q + U instead of a Python loop over Edge objects.
+# Nodes and edges are referred to by their index in these arrays:
+#       node arrays: edge_start, edge_count (-1 until the node is expanded), turn, proven (see mcts.WIN), plus the id and
+#                    packed state of every node
+#       edge arrays: N, W, P, child (index of the destination node, -1 until the edge is taken), action (action id), turn,
+#                    solved (proven result of the edge's move)
+# The destination node of an edge is only created the first time the edge is taken, with its proven result if the
+# game is over in it (see mcts.terminal_result), so the later traversals never make the move again. The arrays grow geometrically when they are full and are kept when the tree is
+# reset for a new search.
+
+import numpy as np
+
+from gym_hnef import hnef_backend, action_codec
+import config
+from mcts import state_id, solved_visits, terminal_result, WIN, LOSS, UNKNOWN
+
+game = hnef_backend.get_backend(config.GAME_BACKEND)
+
+# Returns a copy of array with room for at least size elements, at least doubling its length
+def grow(array, size):
+    new_array = np.empty(max(size, 2 * len(array)), dtype=array.dtype)
+    new_array[:len(array)] = array
+    return new_array
+
+# Indices of the edges of many nodes, the concatenation of range(start, start + count) for every node
+def edge_indices(starts, counts):
+    counts = np.maximum(counts, 0)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + np.arange(np.sum(counts)) - offsets
+
+# Class that represents a Monte Carlo Search tree with the same interface as mcts.MCTS, where nodes are indices
+# tree is a dict from the id of a state (see mcts.state_id) to the index of its node
+class ArrayMCTS():
+    def __init__(self, state, board_size, node_capacity=1024, edge_capacity=32768):
+        self.board_size = board_size
+        self.cpuct = config.CPUCT
+
+        self.node_edge_start = np.zeros(node_capacity, dtype=np.int64)
+        self.node_edge_count = np.zeros(node_capacity, dtype=np.int64)
+        self.node_turn = np.zeros(node_capacity, dtype=np.int8)
+        self.node_proven = np.zeros(node_capacity, dtype=np.int8)
+        self.node_on_path = np.zeros(node_capacity, dtype=bool)   # marks the nodes of the current traversal
+
+        self.edge_N = np.zeros(edge_capacity, dtype=np.float64)
+        self.edge_W = np.zeros(edge_capacity, dtype=np.float64)
+        self.edge_P = np.zeros(edge_capacity, dtype=np.float64)
+        self.edge_child = np.zeros(edge_capacity, dtype=np.int64)
+        self.edge_action = np.zeros(edge_capacity, dtype=np.int64)
+        self.edge_turn = np.zeros(edge_capacity, dtype=np.int8)
+        self.edge_solved = np.zeros(edge_capacity, dtype=np.int8)
+
+        self.reset(state)
+
+    def __len__(self):
+        return self.num_nodes
+
+    def __str__(self):
+        return "Root: " + str(self.node_ids[self.root]) + "\nTree Length: " + str(len(self)) + "\nNumber of Edges: " + str(self.num_edges)
+
+    # Method that empties the tree and starts a new one from the given state, keeping the allocated arrays
+    def reset(self, state):
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.tree = {}
+        self.nodes_allocated = 0    # nodes created since the last reset
+        self.num_simulations = 0    # simulations backed up since the last reset
+        self.nodes_kept = 0         # nodes kept and freed by the last prune
+        self.nodes_freed = 0
+        self.total_nodes_freed = 0
+        self.noisy_root = -1        # node whose edges hold the Dirichlet noise of the search (see add_noise)
+        self.root_priors = None     # priors of its edges without the noise
+        self.node_ids = []      # id of every node (see mcts.state_id)
+        self.node_states = []   # packed state of every node (see hnef_compact)
+        self.root = self.add_node(state)
+
+    # Method to add a new node to the tree
+    # In: state of the node, its id (see mcts.state_id) if it's already known
+    # Out: index of the node
+    def add_node(self, state, id=None):
+        if id is None:
+            id = state_id(state)
+
+        if self.num_nodes == len(self.node_turn):
+            self.node_edge_start = grow(self.node_edge_start, self.num_nodes + 1)
+            self.node_edge_count = grow(self.node_edge_count, self.num_nodes + 1)
+            self.node_turn = grow(self.node_turn, self.num_nodes + 1)
+            self.node_proven = grow(self.node_proven, self.num_nodes + 1)
+            self.node_on_path = grow(self.node_on_path, self.num_nodes + 1)
+
+        node = self.num_nodes
+        self.node_edge_start[node] = 0
+        self.node_edge_count[node] = -1
+        self.node_turn[node] = game.turn(state)
+        self.node_proven[node] = UNKNOWN
+        self.node_on_path[node] = False
+        self.node_ids.append(id)
+        self.node_states.append(game.pack_state(state))
+        self.tree[id] = node
+        self.num_nodes += 1
+        self.nodes_allocated += 1
+        return node
+
+    # Method that sets the destination of an edge that is taken for the first time, to the node of new_state
+    # if it's already in the tree, otherwise to a new node with its proven result (see mcts.terminal_result)
+    # In: edge index, state after the edge's action, the action
+    # Out: index of the destination node
+    def add_child(self, edge, new_state, action):
+        child_id = state_id(new_state)
+        child = self.tree.get(child_id)
+        if child is None:
+            child = self.add_node(new_state, child_id)
+            self.node_proven[child] = terminal_result(new_state, action)
+        self.edge_child[edge] = child
+        return child
+
+    # Method that expands a leaf with an edge for every possible action, the destination nodes are created
+    # when the edges are first taken (see traverse_tree)
+    # In: leaf node, possible actions in the leaf's state, prior probability of each action
+    # Out: None
+    def expand(self, leaf, actions, priors):
+        count = len(actions)
+        start = self.num_edges
+        end = start + count
+        if end > len(self.edge_N):
+            for name in ('edge_N', 'edge_W', 'edge_P', 'edge_child', 'edge_action', 'edge_turn', 'edge_solved'):
+                setattr(self, name, grow(getattr(self, name), end))
+
+        self.edge_N[start:end] = 0
+        self.edge_W[start:end] = 0
+        self.edge_P[start:end] = priors
+        self.edge_child[start:end] = -1
+        self.edge_action[start:end] = action_codec.encode_batch(actions, self.board_size)
+        self.edge_turn[start:end] = self.node_turn[leaf]
+        self.edge_solved[start:end] = UNKNOWN
+
+        self.node_edge_start[leaf] = start
+        self.node_edge_count[leaf] = count
+        self.num_edges = end
+
+    def is_leaf(self, node):
+        return self.node_edge_count[node] <= 0
+
+    # Returns the game state of a node
+    def get_state(self, node):
+        return game.unpack_state(self.node_states[node])
+
+    # Returns the actions of the root's edges with their visit counts and mean values
+    def root_statistics(self):
+        start = self.node_edge_start[self.root]
+        end = start + max(self.node_edge_count[self.root], 0)
+        actions = [action_codec.decode(a, self.board_size) for a in self.edge_action[start:end]]
+        visits = self.edge_N[start:end].copy()
+        values = np.divide(self.edge_W[start:end], visits, out=np.zeros(end - start), where=visits > 0)
+        return actions, solved_visits(visits, self.edge_solved[start:end]), values
+
+    # Method to traverse the tree by simulating actions with the highest expected value, like MCTS.traverse_tree
+    # (including the proven results)
+    # Out: leaf node, value (its proven result, 0 if it has none) and done flag (1 if it has one), path (list of edge indices taken)
+    def traverse_tree(self):
+        done = 0
+        value = 0
+        path = []
+        prev_actions = []   # used to detect repetition problem
+
+        node = self.root
+        if self.noisy_root != node and not self.is_leaf(node):
+            self.add_noise()
+        path_nodes = [node]
+        self.node_on_path[node] = True
+
+        while not self.is_leaf(node) and self.node_proven[node] == UNKNOWN:
+            start = self.node_edge_start[node]
+            end = start + self.node_edge_count[node]
+            N = self.edge_N[start:end]
+            Q = np.divide(self.edge_W[start:end], N, out=np.zeros(len(N)), where=N > 0)
+            QU = Q + self.cpuct * self.edge_P[start:end] * np.sqrt(np.sum(N)) / (1 + N)
+            QU[self.edge_solved[start:end] == LOSS] = -np.inf
+
+            # the nodes that are already on the path can't be taken again
+            children = self.edge_child[start:end]
+            QU[(children >= 0) & self.node_on_path[children]] = -np.inf
+
+            # the state of the node is only needed to make the destination of an edge taken for the first time
+            state = None
+            while True:
+                best = int(np.argmax(QU))
+                if QU[best] == -np.inf:
+                    # every move leads back to the path (or is a proven loss), finish the traversal like a repetition
+                    self.clear_path(path_nodes)
+                    return node, 0, 1, path
+
+                edge = start + best
+                child = self.edge_child[edge]
+                if child < 0:
+                    if state is None:
+                        state = self.get_state(node)
+                    action = action_codec.decode(self.edge_action[edge], self.board_size)
+                    child = self.add_child(edge, game.simulate_next_state(state, action), action)
+
+                if not self.node_on_path[child]:
+                    break
+                QU[best] = -np.inf
+
+            prev_actions.append(self.edge_action[edge])
+            path.append(edge)
+            path_nodes.append(child)
+            self.node_on_path[child] = True
+            node = child
+
+            # check to see if that last 6 actions were repetitions
+            if len(prev_actions) > 6 and prev_actions[-1] == prev_actions[-3] == prev_actions[-5] and prev_actions[-2] == prev_actions[-4] == prev_actions[-6]:
+                print("***Repitition condition met in MCTS")
+                break
+
+        if self.node_proven[node] != UNKNOWN:
+            value = self.node_proven[node]
+            done = 1
+
+        self.clear_path(path_nodes)
+        return node, value, done, path
+
+    # Method that mixes Dirichlet noise into the priors of the root's edges once per search, like MCTS.add_noise
+    def add_noise(self):
+        self.clear_noise()
+        start = self.node_edge_start[self.root]
+        end = start + self.node_edge_count[self.root]
+        self.root_priors = self.edge_P[start:end].copy()
+        epsilon = config.EPSILON
+        self.edge_P[start:end] = (1 - epsilon) * self.root_priors + epsilon * np.random.dirichlet([config.ALPHA] * (end - start))
+        self.noisy_root = self.root
+
+    # Method that puts back the priors of the node holding the noise, new noise is sampled at the start of the next search
+    def clear_noise(self):
+        if self.noisy_root >= 0:
+            start = self.node_edge_start[self.noisy_root]
+            self.edge_P[start:start + len(self.root_priors)] = self.root_priors
+            self.noisy_root = -1
+            self.root_priors = None
+
+    # Methods that add and remove a virtual loss on the edges of a path, see MCTS.add_virtual_loss
+    def add_virtual_loss(self, path, amount):
+        self.edge_N[path] += amount
+        self.edge_W[path] -= amount
+
+    def remove_virtual_loss(self, path, amount):
+        self.edge_N[path] -= amount
+        self.edge_W[path] += amount
+
+    # Method that moves the root to the destination of one of its edges after that action is played,
+    # creating the destination if the search never took the edge, and frees the rest of the tree
+    # In: action of one of the root's edges
+    def advance(self, action):
+        start = self.node_edge_start[self.root]
+        end = start + max(self.node_edge_count[self.root], 0)
+        matches = np.flatnonzero(self.edge_action[start:end] == action_codec.encode(action, self.board_size))
+        if len(matches) == 0:
+            return
+
+        edge = start + matches[0]
+        if self.edge_child[edge] < 0:
+            self.add_child(edge, game.simulate_next_state(self.get_state(self.root), action), action)
+        self.prune(self.edge_child[edge])
+
+    # Method that makes new_root the root and frees every node that can't be reached from it by moving
+    # the nodes that are kept (and their edges) to the front of the arrays, the root becomes node 0
+    # In: index of the new root
+    # Out: number of nodes kept, number of nodes freed
+    def prune(self, new_root):
+        self.clear_noise()
+        reached = np.zeros(self.num_nodes, dtype=bool)
+        reached[new_root] = True
+        kept = [np.array([new_root])]
+        frontier = kept[0]
+        while len(frontier) > 0:
+            children = self.edge_child[edge_indices(self.node_edge_start[frontier], self.node_edge_count[frontier])]
+            children = np.unique(children[children >= 0])
+            frontier = children[~reached[children]]
+            reached[frontier] = True
+            kept.append(frontier)
+        kept = np.concatenate(kept)
+
+        new_index = np.full(self.num_nodes, -1, dtype=np.int64)
+        new_index[kept] = np.arange(len(kept))
+
+        # edges of the kept nodes, in the order of the kept nodes
+        counts = self.node_edge_count[kept]
+        edges = edge_indices(self.node_edge_start[kept], counts)
+        num_edges = len(edges)
+        for name in ('edge_N', 'edge_W', 'edge_P', 'edge_action', 'edge_turn', 'edge_solved'):
+            array = getattr(self, name)
+            array[:num_edges] = array[edges]
+        children = self.edge_child[edges]
+        self.edge_child[:num_edges] = np.where(children >= 0, new_index[np.maximum(children, 0)], -1)
+
+        num_kept = len(kept)
+        self.node_edge_start[:num_kept] = np.cumsum(np.maximum(counts, 0)) - np.maximum(counts, 0)
+        self.node_edge_count[:num_kept] = counts
+        self.node_turn[:num_kept] = self.node_turn[kept]
+        self.node_proven[:num_kept] = self.node_proven[kept]
+        self.node_on_path[:num_kept] = False
+        self.node_ids = [self.node_ids[i] for i in kept]
+        self.node_states = [self.node_states[i] for i in kept]
+        self.tree = {id: i for i, id in enumerate(self.node_ids)}
+
+        self.nodes_kept = num_kept
+        self.nodes_freed = self.num_nodes - num_kept
+        self.total_nodes_freed += self.nodes_freed
+        self.num_nodes = num_kept
+        self.num_edges = num_edges
+        self.root = 0
+        return self.nodes_kept, self.nodes_freed
+
+    # Number of nodes created per simulation since the last reset
+    def nodes_per_simulation(self):
+        return self.nodes_allocated / max(self.num_simulations, 1)
+
+    def clear_path(self, path_nodes):
+        self.node_on_path[path_nodes] = False
+
+    # Method that updates the edges of the path with the result of the traversal, vectorised over the path
+    # In: leaf node, value of the outcome of the traversal, path (edge indices) taken during the traversal
+    # Out: None
+    def backpropagation(self, leaf, value, path):
+        self.num_simulations += 1
+        if len(path) == 0:
+            return
+        if self.node_proven[leaf] != UNKNOWN:
+            self.propagate_proof(path)
+        path = np.array(path, dtype=np.int64)
+        direction = np.where(self.edge_turn[path] == self.node_turn[leaf], 1, -1)
+
+        self.edge_N[path] += 1
+        self.edge_W[path] += value * direction
+
+    # Method that passes the proven result of the leaf up the path, like MCTS.propagate_proof
+    def propagate_proof(self, path):
+        # the source of every edge of the path is the destination of the edge before it
+        sources = [self.root] + [self.edge_child[edge] for edge in path[:-1]]
+        for edge, node in zip(reversed(path), reversed(sources)):
+            child = self.edge_child[edge]
+            if self.node_proven[child] == UNKNOWN:
+                return
+            proven = self.node_proven[child] if self.node_turn[child] == self.node_turn[node] else -self.node_proven[child]
+            self.edge_solved[edge] = proven
+            start = self.node_edge_start[node]
+            if proven == WIN:
+                self.node_proven[node] = WIN
+            elif np.all(self.edge_solved[start:start + self.node_edge_count[node]] == LOSS):
+                self.node_proven[node] = LOSS
+            else:
+                return
+
+    def is_solved(self, node):
+        return self.node_proven[node] != UNKNOWN
@@ -5,9 +5,10 @@
 # Reference: https://github.com/AppliedDataSciencePartners/DeepReinforcementLearning/blob/master/memory.py
 
 import numpy as np
-from collections import deque
+from collections import deque, OrderedDict
 
 import config
+from gym_hnef import hnef_game, hnef_compact, hnef_symmetry, action_codec
 
 class Memory:
 	# Initialize the memory object
@@ -15,22 +16,68 @@ class Memory:
 		self.MEMORY_SIZE = config.MEMORY_SIZE
 		self.ltmemory = deque(maxlen=config.MEMORY_SIZE)
 		self.stmemory = deque(maxlen=config.MEMORY_SIZE)
+		# entries of the long term memory by the key of their canonical state, with config.MEMORY_DEDUPLICATE
+		self.canonical = OrderedDict()
 
-	# Commit to the short term memory
+	# Commit to the short term memory, the state is stored packed (see hnef_compact)
 	def commit_stmemory(self, state, action_values):
 		self.stmemory.append({
-			'board': state[0] + state[1]
-			, 'state': state
+			'state': hnef_compact.pack(state)
 			, 'AV': action_values
 			, 'player_turn': state[2, 0, 0]
 			})
 
 	# Commit to the long term memory, clears the short term memory after
+	# with config.MEMORY_DEDUPLICATE the entries of symmetric positions are merged (see merge)
 	def commit_ltmemory(self):
-		for i in self.stmemory:
-			self.ltmemory.append(i)
+		if config.MEMORY_DEDUPLICATE:
+			reordered = False
+			for i in self.stmemory:
+				reordered = self.merge(i) or reordered
+			# a merged entry moved to the newest end of the memory, so that the positions seen again are evicted last
+			if reordered:
+				self.ltmemory = deque(self.canonical.values(), maxlen=config.MEMORY_SIZE)
+		else:
+			for i in self.stmemory:
+				self.ltmemory.append(i)
 		self.clear_stmemory()
 
+	# Adds an entry to the long term memory, or merges it into the entry that holds the same position up to symmetry
+	# (see hnef_symmetry). The entries are kept by the key of their canonical state, oldest first, in the same order
+	# as the long term memory. A merged entry holds the canonical state, and the policies ('AV', turned to the canonical
+	# orientation) and values are averaged, weighted by the number of entries ('count') merged into each of them
+	# Out: True if the entry was merged into an older one (which is now the newest, but not yet in the long term memory)
+	def merge(self, move):
+		state = hnef_compact.to_array(hnef_compact.unpack(move['state']))
+		canonical, t = hnef_game.canonical_state(state)
+		policy = hnef_symmetry.transform_policy(move['AV'], t, state.shape[1], action_codec.layout(len(move['AV'])))
+		key = hnef_compact.pack(canonical)
+
+		if key in self.canonical:
+			entry = self.canonical[key]
+			total = entry['count'] + 1
+			entry['AV'] = (entry['AV'] * entry['count'] + policy) / total
+			entry['value'] = (entry['value'] * entry['count'] + move['value']) / total
+			entry['count'] = total
+			self.canonical.move_to_end(key)
+			return True
+
+		# the long term memory drops its oldest entry when it's full, which is also the oldest canonical key
+		if len(self.canonical) == config.MEMORY_SIZE:
+			self.canonical.popitem(last=False)
+		entry = {'state': key, 'AV': policy, 'value': move['value'], 'player_turn': move['player_turn'], 'count': 1}
+		self.canonical[key] = entry
+		self.ltmemory.append(entry)
+		return False
+
 	# Clears the short term memory
 	def clear_stmemory(self):
-		self.stmemory = deque(maxlen=config.MEMORY_SIZE)
\ No newline at end of file
+		self.stmemory = deque(maxlen=config.MEMORY_SIZE)
+
+	# Converts the stored policies ('AV') of both memories to another layout of the action ids (see action_codec),
+	# e.g. to train a network with a directional policy head on games played with a square one
+	# In: board size, layout of the stored policies, layout to convert them to
+	def convert_policies(self, size, from_layout, to_layout):
+		for memory in (self.stmemory, self.ltmemory):
+			for move in memory:
+				move['AV'] = action_codec.convert_policy(move['AV'], size, from_layout, to_layout)
@@ -12,6 +12,8 @@ from tensorflow.keras.layers import Input, Dense, Conv2D, Flatten, BatchNormaliz
 from tensorflow.keras.optimizers import SGD
 from tensorflow.keras.models import load_model
 
+import config
+
 # Method for calculating softmax cross entropy with logits
 # In: y_true target values, y_pred predicted values
 # Out: loss between y_true & y_pred
@@ -36,20 +38,33 @@ class Gen_Model():
 		self.learning_rate = learning_rate
 		self.input_dim = input_dim
 		self.output_dim = output_dim
+		# changes whenever the weights change, so that cached predictions of older weights aren't used (see eval_cache.py)
+		self.version = 0
 
 	def predict(self, x):
 		return self.model.predict(x)
 
 	def fit(self, states, targets, epochs, verbose, validation_split, batch_size):
+		self.version += 1
 		return self.model.fit(states, targets, epochs=epochs, verbose=verbose, validation_split = validation_split, batch_size = batch_size)
 
+	def get_weights(self):
+		return self.model.get_weights()
+
+	def set_weights(self, weights):
+		self.version += 1
+		self.model.set_weights(weights)
+
 # Class for the residual neural network
+# warm_up_batches: batch sizes run through the compiled forward pass once when the model is made (see warm_up)
 class Residual_CNN(Gen_Model):
-	def __init__(self, reg_const, learning_rate, input_dim,  output_dim, hidden_layers):
+	def __init__(self, reg_const, learning_rate, input_dim,  output_dim, hidden_layers, warm_up_batches=config.INFERENCE_WARM_UP_BATCHES):
 		Gen_Model.__init__(self, reg_const, learning_rate, input_dim, output_dim)
 		self.hidden_layers = hidden_layers
 		self.num_layers = len(hidden_layers)
 		self.model = self._build_model()
+		self.forward = self._build_forward()
+		self.warm_up(warm_up_batches)
 
 	# Method for generating a single residual layer
 	def residual_layer(self, input_block, filters, kernel_size):
@@ -133,6 +148,8 @@ class Residual_CNN(Gen_Model):
 		return (x)
 
 	# Method for generating our policy head
+	# It has one logit per action id, so output_dim picks the layout of the action ids (see gym_hnef/action_codec),
+	# e.g. 14641 (square) or 4840 (directional) for an 11x11 board
 	def policy_head(self, x):
 
 		x = Conv2D(
@@ -183,7 +200,32 @@ class Residual_CNN(Gen_Model):
 
 		return model
 
-	# Converts a single state into an input for our NN
+	# Method for building the forward pass used by predict, compiled by tf.function for the input shape of the board
+	# (any batch size) so that a call runs the graph straight away, unlike Model.predict which sets up a data
+	# pipeline and callbacks on every call. It uses the model's variables, so it follows fit and set_weights
+	def _build_forward(self):
+		model = self.model
+
+		@tf.function(input_signature=[tf.TensorSpec(shape=(None,) + tuple(self.input_dim), dtype=tf.float32)])
+		def forward(x):
+			return model(x, training=False)
+
+		return forward
+
+	# Method for predicting the values and policy logits of a batch of inputs with the compiled forward pass
+	# In: float array of shape (batch size,) + input_dim
+	# Out: [values of shape (batch size, 1), logits of shape (batch size, output_dim)] as NumPy arrays
+	def predict(self, x):
+		values, logits = self.forward(tf.convert_to_tensor(x, dtype=tf.float32))
+		return [values.numpy(), logits.numpy()]
+
+	# Method that runs the forward pass once for every batch size, so that the first searches don't pay for
+	# tracing the graph and setting up the kernels of each size
+	def warm_up(self, batch_sizes):
+		for batch_size in batch_sizes:
+			self.predict(np.zeros((batch_size,) + tuple(self.input_dim), dtype=np.float32))
+
+	# Converts a single state into an input for our NN, the network works in float32
 	def convert_to_input(self, state):
-		state = np.expand_dims(state, axis=0)
+		state = np.expand_dims(state, axis=0).astype(np.float32)
 		return state
\ No newline at end of file
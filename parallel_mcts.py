@@ -0,0 +1,319 @@
+# Purpose: Runs the simulations of one search in a pool of worker processes, so that a search can use more than
+# one core. The network stays in the main process and the workers send it their positions through an
+# InferenceServer (see inference.py). There are two ways of splitting the work (config.MCTS_PARALLEL):
+#       root: every worker grows its own tree from the root with its share of the simulations and its own
+#             Dirichlet noise, the visit counts and values of the roots' edges are merged at the end
+#       tree: the workers share one tree (SharedArrayMCTS) whose arrays are in shared memory, each traversal
+#             adds a virtual loss to its path (see config.VIRTUAL_LOSS) so that the other workers are steered
+#             away from the leaf it is waiting on
+# The workers are forked, so they start with the configuration of the main process. The shared tree is started
+# again for every search, it is sized for the number of simulations and grown (with a new pool) if a later
+# search needs more.
+
+# References:
+# https://dke.maastrichtuniversity.nl/m.winands/documents/multithreadedMCTS2.pdf
+
+import multiprocessing
+import ctypes
+
+import numpy as np
+
+from gym_hnef import hnef_backend, hnef_compact, hnef_vars
+import config
+import inference
+import mcts
+import mcts_array
+import agent
+
+game = hnef_backend.get_backend(config.GAME_BACKEND)
+
+MODES = ('root', 'tree')
+
+# Returns a NumPy array of the given shape and dtype in memory that is shared with the forked workers
+def shared_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    buffer = multiprocessing.RawArray(ctypes.c_byte, int(np.prod(shape)) * dtype.itemsize)
+    return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+
+# Largest number of moves a player can have in a game that starts from state: every piece can at most move
+# along its row and its column, and pieces are never added
+def max_moves(state):
+    size = state.shape[1]
+    pieces = max(np.count_nonzero(state[hnef_vars.ATTACKER]), np.count_nonzero(state[hnef_vars.DEFENDER]))
+    return max(pieces, 1) * 2 * (size - 1)
+
+# Search tree with the interface of mcts_array.ArrayMCTS whose arrays are in shared memory, so that the same
+# tree is searched by many processes. A node and its edges are written before they are linked into the tree, and
+# the changes to the structure and the statistics are made under a lock shared by the processes.
+# Unlike ArrayMCTS every edge gets its own destination node (there is no table of node ids to find transpositions
+# in) and the arrays have a fixed size.
+#       arrays: dict of the shared arrays made by make_arrays
+class SharedArrayMCTS(mcts_array.ArrayMCTS):
+    def __init__(self, arrays, lock, board_size):
+        self.board_size = board_size
+        self.cpuct = config.CPUCT
+        self.lock = lock
+
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.node_on_path = np.zeros(len(self.node_turn), dtype=bool)   # the path of this process' traversal
+
+        self.root = 0
+        self.noisy_root = -1
+        self.nodes_allocated = 0
+        self.num_simulations = 0
+
+    # Makes the shared arrays of a tree
+    # In: board size, most nodes, most edges
+    @staticmethod
+    def make_arrays(board_size, node_capacity, edge_capacity):
+        packed_size = len(hnef_compact.pack(np.zeros((hnef_vars.NUM_CHNLS, board_size, board_size))))
+        return {'counts': shared_array(3, np.int64),   # number of nodes, number of edges, 1 once the root has its noise
+                'node_edge_start': shared_array(node_capacity, np.int64),
+                'node_edge_count': shared_array(node_capacity, np.int64),
+                'node_turn': shared_array(node_capacity, np.int8),
+                'node_proven': shared_array(node_capacity, np.int8),
+                'node_packed': shared_array((node_capacity, packed_size), np.uint8),
+                'edge_N': shared_array(edge_capacity, np.float64),
+                'edge_W': shared_array(edge_capacity, np.float64),
+                'edge_P': shared_array(edge_capacity, np.float64),
+                'edge_child': shared_array(edge_capacity, np.int64),
+                'edge_action': shared_array(edge_capacity, np.int64),
+                'edge_turn': shared_array(edge_capacity, np.int8),
+                'edge_solved': shared_array(edge_capacity, np.int8)}
+
+    @property
+    def num_nodes(self):
+        return int(self.counts[0])
+
+    @num_nodes.setter
+    def num_nodes(self, value):
+        self.counts[0] = value
+
+    @property
+    def num_edges(self):
+        return int(self.counts[1])
+
+    @num_edges.setter
+    def num_edges(self, value):
+        self.counts[1] = value
+
+    def __str__(self):
+        return "Shared tree\nTree Length: " + str(len(self)) + "\nNumber of Edges: " + str(self.num_edges)
+
+    # Method that empties the tree and starts a new one from the given state, only while no worker is searching
+    def reset(self, state):
+        self.counts[:] = 0
+        self.noisy_root = -1
+        self.nodes_allocated = 0
+        self.num_simulations = 0
+        self.root = self.add_node(state)
+
+    # Method to add a new node to the tree, with the lock held
+    def add_node(self, state, id=None):
+        node = self.num_nodes
+        assert node < len(self.node_turn), "*Error: The shared search tree is full ({} nodes)".format(node)
+        self.node_edge_start[node] = 0
+        self.node_edge_count[node] = -1
+        self.node_turn[node] = game.turn(state)
+        self.node_proven[node] = mcts.UNKNOWN
+        self.node_packed[node] = np.frombuffer(hnef_compact.pack(game.to_array(state)), dtype=np.uint8)
+        self.num_nodes = node + 1
+        self.nodes_allocated += 1
+        return node
+
+    def get_state(self, node):
+        return game.from_array(hnef_compact.to_array(hnef_compact.unpack(self.node_packed[node].tobytes())))
+
+    # Method that sets the destination of an edge the first time it's taken, unless another process just did
+    def add_child(self, edge, new_state, action):
+        with self.lock:
+            child = self.edge_child[edge]
+            if child < 0:
+                child = self.add_node(new_state)
+                self.node_proven[child] = mcts.terminal_result(new_state, action)
+                self.edge_child[edge] = child
+        return child
+
+    # Method that expands a leaf like ArrayMCTS.expand, unless another process expanded it first
+    def expand(self, leaf, actions, priors):
+        with self.lock:
+            if self.node_edge_count[leaf] >= 0:
+                return
+            assert self.num_edges + len(actions) <= len(self.edge_N), "*Error: The shared search tree is out of edges ({})".format(len(self.edge_N))
+            super().expand(leaf, actions, priors)
+
+    # Method that mixes Dirichlet noise into the priors of the root's edges, only in the first process to get there
+    def add_noise(self):
+        with self.lock:
+            if self.counts[2] == 0:
+                start = self.node_edge_start[self.root]
+                end = start + self.node_edge_count[self.root]
+                epsilon = config.EPSILON
+                self.edge_P[start:end] = (1 - epsilon) * self.edge_P[start:end] + epsilon * np.random.dirichlet([config.ALPHA] * (end - start))
+                self.counts[2] = 1
+        self.noisy_root = self.root
+
+    # The tree is started again for every search, so the noise is never taken out
+    def clear_noise(self):
+        self.noisy_root = -1
+
+    def add_virtual_loss(self, path, amount):
+        with self.lock:
+            super().add_virtual_loss(path, amount)
+
+    def remove_virtual_loss(self, path, amount):
+        with self.lock:
+            super().remove_virtual_loss(path, amount)
+
+    def backpropagation(self, leaf, value, path):
+        with self.lock:
+            super().backpropagation(leaf, value, path)
+
+    def advance(self, action):
+        print("*Error: The shared search tree is started again for every search, it can't be advanced")
+
+    def prune(self, new_root):
+        print("*Error: The shared search tree is started again for every search, it can't be pruned")
+
+# State of a worker process, set by init_worker
+_worker = None
+
+class Worker():
+    def __init__(self, model, action_size, tree):
+        # the worker searches on its own, even if config asks for a parallel search
+        config.MCTS_PARALLEL = None
+        self.model = model
+        self.agent = agent.Agent('worker', model, None, action_size)
+        self.tree = tree
+
+def init_worker(requests, responses, client_ids, action_size, arrays, lock, board_size):
+    global _worker
+    client = client_ids.get()
+    model = inference.RemoteModel(requests, responses[client], client)
+    tree = SharedArrayMCTS(arrays, lock, board_size) if arrays is not None else None
+    _worker = Worker(model, action_size, tree)
+
+# Task of a root parallel worker: searches from the state with its own tree
+# In: (array state, number of simulations, seed of the Dirichlet noise, version of the model)
+# Out: actions of the root's edges, their visit counts and mean values
+def root_search(task):
+    state, num_sims, seed, version = task
+    np.random.seed(seed)
+    _worker.model.version = version
+    player = _worker.agent
+    player.num_sims = num_sims
+    player.search(game.from_array(state))
+    return player.root_statistics()
+
+# Task of a tree parallel worker: runs simulations in the shared tree
+# In: (number of simulations, seed of the Dirichlet noise, version of the model)
+# Out: number of simulations run
+def tree_search(task):
+    num_sims, seed, version = task
+    np.random.seed(seed)
+    _worker.model.version = version
+    tree = _worker.tree
+    player = _worker.agent
+    player.mcts = tree
+    tree.clear_noise()
+    for i in range(num_sims):
+        if tree.is_solved(tree.root):
+            return i
+        leaf, value, done, path = tree.traverse_tree()
+        tree.add_virtual_loss(path, config.VIRTUAL_LOSS)
+        value, path = player.evaluate_leaf(leaf, value, done, path)
+        tree.remove_virtual_loss(path, config.VIRTUAL_LOSS)
+        tree.backpropagation(leaf, value, path)
+    return num_sims
+
+# Class running the searches of an Agent in worker processes, the pool and the shared tree are made by the first search
+class ParallelSearch():
+    # In: model of the main process, number of action ids, mode ('root' or 'tree'), number of worker processes
+    def __init__(self, model, action_size, mode, workers):
+        assert mode in MODES, "*Error: Unknown parallel search mode '{}', expected one of {}".format(mode, MODES)
+        self.model = model
+        self.action_size = action_size
+        self.mode = mode
+        self.workers = workers
+        self.context = multiprocessing.get_context('fork')
+        self.server = None
+        self.pool = None
+        self.tree = None
+        self.node_capacity = 0
+        self.edge_capacity = 0
+
+    # Starts the inference server and the pool, with a shared tree big enough for num_sims simulations from state
+    def start(self, state, num_sims):
+        self.close()
+        board_size = state.shape[1]
+        # every worker waits on one request at a time (of up to MCTS_LEAF_BATCH positions in root mode),
+        # so a batch is full once every worker is waiting
+        max_batch = self.workers * (config.MCTS_LEAF_BATCH if self.mode == 'root' else 1)
+        self.server = inference.InferenceServer(self.model, self.workers, self.context, max_batch=max_batch)
+        client_ids = self.context.Queue()
+        for client in range(self.workers):
+            client_ids.put(client)
+
+        arrays = None
+        lock = None
+        if self.mode == 'tree':
+            # every simulation adds at most one node
+            self.node_capacity = num_sims + 2
+            self.edge_capacity = self.node_capacity * max_moves(state)
+            arrays = SharedArrayMCTS.make_arrays(board_size, self.node_capacity, self.edge_capacity)
+            lock = self.context.Lock()
+            self.tree = SharedArrayMCTS(arrays, lock, board_size)
+
+        self.pool = self.context.Pool(self.workers, init_worker,
+            (self.server.requests, self.server.responses, client_ids, self.action_size, arrays, lock, board_size))
+        # the serving thread is started after the workers are forked
+        self.server.start()
+
+    # Method that searches from a state with the workers
+    # In: array state, total number of simulations
+    # Out: actions of the root's edges, their visit counts and mean values
+    def search(self, state, num_sims):
+        if self.pool is None or (self.mode == 'tree' and (num_sims + 2 > self.node_capacity or
+                self.node_capacity * max_moves(state) > self.edge_capacity)):
+            self.start(state, num_sims)
+
+        shares = [num_sims // self.workers + (1 if i < num_sims % self.workers else 0) for i in range(self.workers)]
+        seeds = np.random.randint(2**31, size=self.workers)
+        version = self.model.version
+
+        if self.mode == 'root':
+            tasks = [(state, share, seed, version) for share, seed in zip(shares, seeds) if share > 0]
+            return self.merge(self.pool.map(root_search, tasks, chunksize=1))
+
+        self.tree.reset(game.from_array(state))
+        tasks = [(share, seed, version) for share, seed in zip(shares, seeds) if share > 0]
+        self.pool.map(tree_search, tasks, chunksize=1)
+        return self.tree.root_statistics()
+
+    # Adds up the visit counts of the roots of the workers and averages their values weighted by the visits
+    def merge(self, results):
+        visits = {}
+        totals = {}
+        for actions, worker_visits, worker_values in results:
+            for action, n, value in zip(actions, worker_visits, worker_values):
+                visits[action] = visits.get(action, 0) + n
+                totals[action] = totals.get(action, 0) + n * value
+
+        actions = sorted(visits)
+        merged_visits = np.array([visits[action] for action in actions], dtype=np.float64)
+        merged_values = np.array([totals[action] / visits[action] if visits[action] > 0 else 0 for action in actions])
+        return actions, merged_visits, merged_values
+
+    # Batch sizes of the calls to the network made for the workers
+    def batch_sizes(self):
+        return self.server.batch_sizes if self.server is not None else []
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
@@ -0,0 +1,129 @@
+# Purpose: Post-training int8 quantisation of a trained Residual_CNN for CPU-only self-play. The network is
+# exported to a TFLite flatbuffer with int8 weights and activations, calibrated on positions sampled from the long
+# term memory (Memory.ltmemory) so that the ranges of the activations are the ones met in real games.
+# Int8Model runs the flatbuffer with the TFLite interpreter and has the same prediction interface as Residual_CNN
+# (convert_to_input, predict and version), so an Agent can be given either one. It can't be trained, the export
+# is done again after the float network is retrained.
+# accuracy_report and latency_report compare it to the float network it was made from.
+
+# References:
+# https://www.tensorflow.org/lite/performance/post_training_integer_quant
+
+import random
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import config
+from gym_hnef import hnef_game, hnef_compact, action_codec
+
+# Samples network inputs from the long term memory
+# In: ltmemory (Memory.ltmemory), number of positions, seed of the sample
+# Out: float32 array of shape (positions, 5, board size, board size)
+def calibration_inputs(ltmemory, count=config.QUANTIZE_CALIBRATION_SAMPLES, seed=0):
+    rows = random.Random(seed).sample(list(ltmemory), min(count, len(ltmemory)))
+    assert len(rows) > 0, "*Error: The long term memory is empty, there are no positions to calibrate the quantisation on"
+    return hnef_compact.network_input([row['state'] for row in rows])
+
+# Exports a Residual_CNN to an int8 TFLite model
+# In: network (Residual_CNN), ltmemory to calibrate on, path to save the flatbuffer to (optional), number of positions
+# Out: Int8Model
+def export_int8(network, ltmemory, path=None, count=config.QUANTIZE_CALIBRATION_SAMPLES):
+    inputs = calibration_inputs(ltmemory, count)
+
+    def representative_dataset():
+        for i in range(len(inputs)):
+            yield [inputs[i:i + 1]]
+
+    # the compiled forward pass (see Residual_CNN.predict) gives the input its batch dimension and the outputs their order
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([network.forward.get_concrete_function()], network.model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    # the input and outputs stay float so that the model can be used like the float network
+    converter.inference_input_type = tf.float32
+    converter.inference_output_type = tf.float32
+    flatbuffer = converter.convert()
+
+    if path is not None:
+        with open(path, 'wb') as f:
+            f.write(flatbuffer)
+    return Int8Model(flatbuffer, network.input_dim, network.output_dim)
+
+# Quantised network run by the TFLite interpreter, with the prediction interface of Residual_CNN
+# In: flatbuffer (bytes made by export_int8 or the path of a saved one), input_dim and output_dim of the float network,
+#     number of threads of the interpreter (None lets TFLite choose)
+class Int8Model():
+    def __init__(self, flatbuffer, input_dim, output_dim, num_threads=None):
+        if isinstance(flatbuffer, str):
+            with open(flatbuffer, 'rb') as f:
+                flatbuffer = f.read()
+        self.flatbuffer = flatbuffer
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.interpreter = tf.lite.Interpreter(model_content=flatbuffer, num_threads=num_threads)
+        # the signature runner resizes the input to the batch size of every call
+        self.runner = self.interpreter.get_signature_runner()
+        # the weights never change
+        self.version = 0
+
+    def convert_to_input(self, state):
+        return np.expand_dims(state, axis=0).astype(np.float32)
+
+    # In: float array of shape (batch size,) + input_dim
+    # Out: [values of shape (batch size, 1), logits of shape (batch size, output_dim)]
+    def predict(self, x):
+        outputs = self.runner(x=np.asarray(x, dtype=np.float32))
+        return [outputs['output_0'], outputs['output_1']]
+
+    # Size of the flatbuffer in bytes
+    def size(self):
+        return len(self.flatbuffer)
+
+# Policy over the valid moves the way Agent.get_predictions_batch builds it from the logits
+def masked_policy(logits, valid):
+    logits = np.where(valid, logits, -100).astype(np.float64)
+    odds = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+    return odds / np.sum(odds, axis=1, keepdims=True)
+
+# Compares the predictions of the quantised model to the ones of the float network on a batch of inputs
+# In: network (float model), quantized (Int8Model), inputs (float array of network inputs)
+# Out: dict with the mean squared error of the values, the mean KL divergence of the quantised policies from the float
+#      ones (over the valid moves), and how often both give the highest prior to the same move
+def accuracy(network, quantized, inputs):
+    values, logits = network.predict(inputs)
+    quantized_values, quantized_logits = quantized.predict(inputs)
+
+    valid = hnef_game.compute_valid_moves_batch(inputs, action_codec.layout(logits.shape[1]))
+    policy = masked_policy(logits, valid)
+    quantized_policy = masked_policy(quantized_logits, valid)
+    kl = np.sum(np.where(valid, policy * (np.log(policy + 1e-12) - np.log(quantized_policy + 1e-12)), 0), axis=1)
+
+    return {'value_mse': float(np.mean((values - quantized_values) ** 2)),
+            'policy_kl': float(np.mean(kl)),
+            'top_move_agreement': float(np.mean(np.argmax(policy, axis=1) == np.argmax(quantized_policy, axis=1)))}
+
+def accuracy_report(network, quantized, inputs):
+    result = accuracy(network, quantized, inputs)
+    return "Int8 accuracy on {} positions: value MSE {:.2e}, policy KL {:.2e}, same top move {:.1%}".format(
+        len(inputs), result['value_mse'], result['policy_kl'], result['top_move_agreement'])
+
+# Compares the time per call of the quantised model to the float network's, median of repeats calls per batch size
+def latency_report(network, quantized, batch_sizes=(1, 8, 64), repeats=50):
+    lines = ["Int8 latency per call (float model {:.1f} MB, int8 model {:.1f} MB)".format(
+        sum(w.nbytes for w in network.get_weights()) / 2**20, quantized.size() / 2**20)]
+    for batch_size in batch_sizes:
+        x = np.zeros((batch_size,) + tuple(network.input_dim), dtype=np.float32)
+        times = {}
+        for name, model in (('float', network), ('int8', quantized)):
+            model.predict(x)
+            calls = []
+            for i in range(repeats):
+                start = time.perf_counter()
+                model.predict(x)
+                calls.append(time.perf_counter() - start)
+            times[name] = np.median(calls) * 1000
+        lines.append("  batch {:4d}: float {:8.3f} ms  int8 {:8.3f} ms  speedup {:6.2f}x".format(
+            batch_size, times['float'], times['int8'], times['float'] / times['int8']))
+    return "\n".join(lines)
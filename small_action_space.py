@@ -1,634 +0,0 @@
-import numpy as np
-
-# Gets the id of an action
-def get_id(a):
-    for i in range(len(action_id)):
-        if a == action_id[i]:
-            return i
-    return -1
-
-action_id = [((0, 0), (0, 0)),
-    ((0, 0), (0, 1)),
-    ((0, 0), (0, 2)),
-    ((0, 0), (0, 3)),
-    ((0, 0), (0, 4)),
-    ((0, 0), (1, 0)),
-    ((0, 0), (1, 1)),
-    ((0, 0), (1, 2)),
-    ((0, 0), (1, 3)),
-    ((0, 0), (1, 4)),
-    ((0, 0), (2, 0)),
-    ((0, 0), (2, 1)),
-    ((0, 0), (2, 2)),
-    ((0, 0), (2, 3)),
-    ((0, 0), (2, 4)),
-    ((0, 0), (3, 0)),
-    ((0, 0), (3, 1)),
-    ((0, 0), (3, 2)),
-    ((0, 0), (3, 3)),
-    ((0, 0), (3, 4)),
-    ((0, 0), (4, 0)),
-    ((0, 0), (4, 1)),
-    ((0, 0), (4, 2)),
-    ((0, 0), (4, 3)),
-    ((0, 0), (4, 4)),
-    ((0, 1), (0, 0)),
-    ((0, 1), (0, 1)),
-    ((0, 1), (0, 2)),
-    ((0, 1), (0, 3)),
-    ((0, 1), (0, 4)),
-    ((0, 1), (1, 0)),
-    ((0, 1), (1, 1)),
-    ((0, 1), (1, 2)),
-    ((0, 1), (1, 3)),
-    ((0, 1), (1, 4)),
-    ((0, 1), (2, 0)),
-    ((0, 1), (2, 1)),
-    ((0, 1), (2, 2)),
-    ((0, 1), (2, 3)),
-    ((0, 1), (2, 4)),
-    ((0, 1), (3, 0)),
-    ((0, 1), (3, 1)),
-    ((0, 1), (3, 2)),
-    ((0, 1), (3, 3)),
-    ((0, 1), (3, 4)),
-    ((0, 1), (4, 0)),
-    ((0, 1), (4, 1)),
-    ((0, 1), (4, 2)),
-    ((0, 1), (4, 3)),
-    ((0, 1), (4, 4)),
-    ((0, 2), (0, 0)),
-    ((0, 2), (0, 1)),
-    ((0, 2), (0, 2)),
-    ((0, 2), (0, 3)),
-    ((0, 2), (0, 4)),
-    ((0, 2), (1, 0)),
-    ((0, 2), (1, 1)),
-    ((0, 2), (1, 2)),
-    ((0, 2), (1, 3)),
-    ((0, 2), (1, 4)),
-    ((0, 2), (2, 0)),
-    ((0, 2), (2, 1)),
-    ((0, 2), (2, 2)),
-    ((0, 2), (2, 3)),
-    ((0, 2), (2, 4)),
-    ((0, 2), (3, 0)),
-    ((0, 2), (3, 1)),
-    ((0, 2), (3, 2)),
-    ((0, 2), (3, 3)),
-    ((0, 2), (3, 4)),
-    ((0, 2), (4, 0)),
-    ((0, 2), (4, 1)),
-    ((0, 2), (4, 2)),
-    ((0, 2), (4, 3)),
-    ((0, 2), (4, 4)),
-    ((0, 3), (0, 0)),
-    ((0, 3), (0, 1)),
-    ((0, 3), (0, 2)),
-    ((0, 3), (0, 3)),
-    ((0, 3), (0, 4)),
-    ((0, 3), (1, 0)),
-    ((0, 3), (1, 1)),
-    ((0, 3), (1, 2)),
-    ((0, 3), (1, 3)),
-    ((0, 3), (1, 4)),
-    ((0, 3), (2, 0)),
-    ((0, 3), (2, 1)),
-    ((0, 3), (2, 2)),
-    ((0, 3), (2, 3)),
-    ((0, 3), (2, 4)),
-    ((0, 3), (3, 0)),
-    ((0, 3), (3, 1)),
-    ((0, 3), (3, 2)),
-    ((0, 3), (3, 3)),
-    ((0, 3), (3, 4)),
-    ((0, 3), (4, 0)),
-    ((0, 3), (4, 1)),
-    ((0, 3), (4, 2)),
-    ((0, 3), (4, 3)),
-    ((0, 3), (4, 4)),
-    ((0, 4), (0, 0)),
-    ((0, 4), (0, 1)),
-    ((0, 4), (0, 2)),
-    ((0, 4), (0, 3)),
-    ((0, 4), (0, 4)),
-    ((0, 4), (1, 0)),
-    ((0, 4), (1, 1)),
-    ((0, 4), (1, 2)),
-    ((0, 4), (1, 3)),
-    ((0, 4), (1, 4)),
-    ((0, 4), (2, 0)),
-    ((0, 4), (2, 1)),
-    ((0, 4), (2, 2)),
-    ((0, 4), (2, 3)),
-    ((0, 4), (2, 4)),
-    ((0, 4), (3, 0)),
-    ((0, 4), (3, 1)),
-    ((0, 4), (3, 2)),
-    ((0, 4), (3, 3)),
-    ((0, 4), (3, 4)),
-    ((0, 4), (4, 0)),
-    ((0, 4), (4, 1)),
-    ((0, 4), (4, 2)),
-    ((0, 4), (4, 3)),
-    ((0, 4), (4, 4)),
-    ((1, 0), (0, 0)),
-    ((1, 0), (0, 1)),
-    ((1, 0), (0, 2)),
-    ((1, 0), (0, 3)),
-    ((1, 0), (0, 4)),
-    ((1, 0), (1, 0)),
-    ((1, 0), (1, 1)),
-    ((1, 0), (1, 2)),
-    ((1, 0), (1, 3)),
-    ((1, 0), (1, 4)),
-    ((1, 0), (2, 0)),
-    ((1, 0), (2, 1)),
-    ((1, 0), (2, 2)),
-    ((1, 0), (2, 3)),
-    ((1, 0), (2, 4)),
-    ((1, 0), (3, 0)),
-    ((1, 0), (3, 1)),
-    ((1, 0), (3, 2)),
-    ((1, 0), (3, 3)),
-    ((1, 0), (3, 4)),
-    ((1, 0), (4, 0)),
-    ((1, 0), (4, 1)),
-    ((1, 0), (4, 2)),
-    ((1, 0), (4, 3)),
-    ((1, 0), (4, 4)),
-    ((1, 1), (0, 0)),
-    ((1, 1), (0, 1)),
-    ((1, 1), (0, 2)),
-    ((1, 1), (0, 3)),
-    ((1, 1), (0, 4)),
-    ((1, 1), (1, 0)),
-    ((1, 1), (1, 1)),
-    ((1, 1), (1, 2)),
-    ((1, 1), (1, 3)),
-    ((1, 1), (1, 4)),
-    ((1, 1), (2, 0)),
-    ((1, 1), (2, 1)),
-    ((1, 1), (2, 2)),
-    ((1, 1), (2, 3)),
-    ((1, 1), (2, 4)),
-    ((1, 1), (3, 0)),
-    ((1, 1), (3, 1)),
-    ((1, 1), (3, 2)),
-    ((1, 1), (3, 3)),
-    ((1, 1), (3, 4)),
-    ((1, 1), (4, 0)),
-    ((1, 1), (4, 1)),
-    ((1, 1), (4, 2)),
-    ((1, 1), (4, 3)),
-    ((1, 1), (4, 4)),
-    ((1, 2), (0, 0)),
-    ((1, 2), (0, 1)),
-    ((1, 2), (0, 2)),
-    ((1, 2), (0, 3)),
-    ((1, 2), (0, 4)),
-    ((1, 2), (1, 0)),
-    ((1, 2), (1, 1)),
-    ((1, 2), (1, 2)),
-    ((1, 2), (1, 3)),
-    ((1, 2), (1, 4)),
-    ((1, 2), (2, 0)),
-    ((1, 2), (2, 1)),
-    ((1, 2), (2, 2)),
-    ((1, 2), (2, 3)),
-    ((1, 2), (2, 4)),
-    ((1, 2), (3, 0)),
-    ((1, 2), (3, 1)),
-    ((1, 2), (3, 2)),
-    ((1, 2), (3, 3)),
-    ((1, 2), (3, 4)),
-    ((1, 2), (4, 0)),
-    ((1, 2), (4, 1)),
-    ((1, 2), (4, 2)),
-    ((1, 2), (4, 3)),
-    ((1, 2), (4, 4)),
-    ((1, 3), (0, 0)),
-    ((1, 3), (0, 1)),
-    ((1, 3), (0, 2)),
-    ((1, 3), (0, 3)),
-    ((1, 3), (0, 4)),
-    ((1, 3), (1, 0)),
-    ((1, 3), (1, 1)),
-    ((1, 3), (1, 2)),
-    ((1, 3), (1, 3)),
-    ((1, 3), (1, 4)),
-    ((1, 3), (2, 0)),
-    ((1, 3), (2, 1)),
-    ((1, 3), (2, 2)),
-    ((1, 3), (2, 3)),
-    ((1, 3), (2, 4)),
-    ((1, 3), (3, 0)),
-    ((1, 3), (3, 1)),
-    ((1, 3), (3, 2)),
-    ((1, 3), (3, 3)),
-    ((1, 3), (3, 4)),
-    ((1, 3), (4, 0)),
-    ((1, 3), (4, 1)),
-    ((1, 3), (4, 2)),
-    ((1, 3), (4, 3)),
-    ((1, 3), (4, 4)),
-    ((1, 4), (0, 0)),
-    ((1, 4), (0, 1)),
-    ((1, 4), (0, 2)),
-    ((1, 4), (0, 3)),
-    ((1, 4), (0, 4)),
-    ((1, 4), (1, 0)),
-    ((1, 4), (1, 1)),
-    ((1, 4), (1, 2)),
-    ((1, 4), (1, 3)),
-    ((1, 4), (1, 4)),
-    ((1, 4), (2, 0)),
-    ((1, 4), (2, 1)),
-    ((1, 4), (2, 2)),
-    ((1, 4), (2, 3)),
-    ((1, 4), (2, 4)),
-    ((1, 4), (3, 0)),
-    ((1, 4), (3, 1)),
-    ((1, 4), (3, 2)),
-    ((1, 4), (3, 3)),
-    ((1, 4), (3, 4)),
-    ((1, 4), (4, 0)),
-    ((1, 4), (4, 1)),
-    ((1, 4), (4, 2)),
-    ((1, 4), (4, 3)),
-    ((1, 4), (4, 4)),
-    ((2, 0), (0, 0)),
-    ((2, 0), (0, 1)),
-    ((2, 0), (0, 2)),
-    ((2, 0), (0, 3)),
-    ((2, 0), (0, 4)),
-    ((2, 0), (1, 0)),
-    ((2, 0), (1, 1)),
-    ((2, 0), (1, 2)),
-    ((2, 0), (1, 3)),
-    ((2, 0), (1, 4)),
-    ((2, 0), (2, 0)),
-    ((2, 0), (2, 1)),
-    ((2, 0), (2, 2)),
-    ((2, 0), (2, 3)),
-    ((2, 0), (2, 4)),
-    ((2, 0), (3, 0)),
-    ((2, 0), (3, 1)),
-    ((2, 0), (3, 2)),
-    ((2, 0), (3, 3)),
-    ((2, 0), (3, 4)),
-    ((2, 0), (4, 0)),
-    ((2, 0), (4, 1)),
-    ((2, 0), (4, 2)),
-    ((2, 0), (4, 3)),
-    ((2, 0), (4, 4)),
-    ((2, 1), (0, 0)),
-    ((2, 1), (0, 1)),
-    ((2, 1), (0, 2)),
-    ((2, 1), (0, 3)),
-    ((2, 1), (0, 4)),
-    ((2, 1), (1, 0)),
-    ((2, 1), (1, 1)),
-    ((2, 1), (1, 2)),
-    ((2, 1), (1, 3)),
-    ((2, 1), (1, 4)),
-    ((2, 1), (2, 0)),
-    ((2, 1), (2, 1)),
-    ((2, 1), (2, 2)),
-    ((2, 1), (2, 3)),
-    ((2, 1), (2, 4)),
-    ((2, 1), (3, 0)),
-    ((2, 1), (3, 1)),
-    ((2, 1), (3, 2)),
-    ((2, 1), (3, 3)),
-    ((2, 1), (3, 4)),
-    ((2, 1), (4, 0)),
-    ((2, 1), (4, 1)),
-    ((2, 1), (4, 2)),
-    ((2, 1), (4, 3)),
-    ((2, 1), (4, 4)),
-    ((2, 2), (0, 0)),
-    ((2, 2), (0, 1)),
-    ((2, 2), (0, 2)),
-    ((2, 2), (0, 3)),
-    ((2, 2), (0, 4)),
-    ((2, 2), (1, 0)),
-    ((2, 2), (1, 1)),
-    ((2, 2), (1, 2)),
-    ((2, 2), (1, 3)),
-    ((2, 2), (1, 4)),
-    ((2, 2), (2, 0)),
-    ((2, 2), (2, 1)),
-    ((2, 2), (2, 2)),
-    ((2, 2), (2, 3)),
-    ((2, 2), (2, 4)),
-    ((2, 2), (3, 0)),
-    ((2, 2), (3, 1)),
-    ((2, 2), (3, 2)),
-    ((2, 2), (3, 3)),
-    ((2, 2), (3, 4)),
-    ((2, 2), (4, 0)),
-    ((2, 2), (4, 1)),
-    ((2, 2), (4, 2)),
-    ((2, 2), (4, 3)),
-    ((2, 2), (4, 4)),
-    ((2, 3), (0, 0)),
-    ((2, 3), (0, 1)),
-    ((2, 3), (0, 2)),
-    ((2, 3), (0, 3)),
-    ((2, 3), (0, 4)),
-    ((2, 3), (1, 0)),
-    ((2, 3), (1, 1)),
-    ((2, 3), (1, 2)),
-    ((2, 3), (1, 3)),
-    ((2, 3), (1, 4)),
-    ((2, 3), (2, 0)),
-    ((2, 3), (2, 1)),
-    ((2, 3), (2, 2)),
-    ((2, 3), (2, 3)),
-    ((2, 3), (2, 4)),
-    ((2, 3), (3, 0)),
-    ((2, 3), (3, 1)),
-    ((2, 3), (3, 2)),
-    ((2, 3), (3, 3)),
-    ((2, 3), (3, 4)),
-    ((2, 3), (4, 0)),
-    ((2, 3), (4, 1)),
-    ((2, 3), (4, 2)),
-    ((2, 3), (4, 3)),
-    ((2, 3), (4, 4)),
-    ((2, 4), (0, 0)),
-    ((2, 4), (0, 1)),
-    ((2, 4), (0, 2)),
-    ((2, 4), (0, 3)),
-    ((2, 4), (0, 4)),
-    ((2, 4), (1, 0)),
-    ((2, 4), (1, 1)),
-    ((2, 4), (1, 2)),
-    ((2, 4), (1, 3)),
-    ((2, 4), (1, 4)),
-    ((2, 4), (2, 0)),
-    ((2, 4), (2, 1)),
-    ((2, 4), (2, 2)),
-    ((2, 4), (2, 3)),
-    ((2, 4), (2, 4)),
-    ((2, 4), (3, 0)),
-    ((2, 4), (3, 1)),
-    ((2, 4), (3, 2)),
-    ((2, 4), (3, 3)),
-    ((2, 4), (3, 4)),
-    ((2, 4), (4, 0)),
-    ((2, 4), (4, 1)),
-    ((2, 4), (4, 2)),
-    ((2, 4), (4, 3)),
-    ((2, 4), (4, 4)),
-    ((3, 0), (0, 0)),
-    ((3, 0), (0, 1)),
-    ((3, 0), (0, 2)),
-    ((3, 0), (0, 3)),
-    ((3, 0), (0, 4)),
-    ((3, 0), (1, 0)),
-    ((3, 0), (1, 1)),
-    ((3, 0), (1, 2)),
-    ((3, 0), (1, 3)),
-    ((3, 0), (1, 4)),
-    ((3, 0), (2, 0)),
-    ((3, 0), (2, 1)),
-    ((3, 0), (2, 2)),
-    ((3, 0), (2, 3)),
-    ((3, 0), (2, 4)),
-    ((3, 0), (3, 0)),
-    ((3, 0), (3, 1)),
-    ((3, 0), (3, 2)),
-    ((3, 0), (3, 3)),
-    ((3, 0), (3, 4)),
-    ((3, 0), (4, 0)),
-    ((3, 0), (4, 1)),
-    ((3, 0), (4, 2)),
-    ((3, 0), (4, 3)),
-    ((3, 0), (4, 4)),
-    ((3, 1), (0, 0)),
-    ((3, 1), (0, 1)),
-    ((3, 1), (0, 2)),
-    ((3, 1), (0, 3)),
-    ((3, 1), (0, 4)),
-    ((3, 1), (1, 0)),
-    ((3, 1), (1, 1)),
-    ((3, 1), (1, 2)),
-    ((3, 1), (1, 3)),
-    ((3, 1), (1, 4)),
-    ((3, 1), (2, 0)),
-    ((3, 1), (2, 1)),
-    ((3, 1), (2, 2)),
-    ((3, 1), (2, 3)),
-    ((3, 1), (2, 4)),
-    ((3, 1), (3, 0)),
-    ((3, 1), (3, 1)),
-    ((3, 1), (3, 2)),
-    ((3, 1), (3, 3)),
-    ((3, 1), (3, 4)),
-    ((3, 1), (4, 0)),
-    ((3, 1), (4, 1)),
-    ((3, 1), (4, 2)),
-    ((3, 1), (4, 3)),
-    ((3, 1), (4, 4)),
-    ((3, 2), (0, 0)),
-    ((3, 2), (0, 1)),
-    ((3, 2), (0, 2)),
-    ((3, 2), (0, 3)),
-    ((3, 2), (0, 4)),
-    ((3, 2), (1, 0)),
-    ((3, 2), (1, 1)),
-    ((3, 2), (1, 2)),
-    ((3, 2), (1, 3)),
-    ((3, 2), (1, 4)),
-    ((3, 2), (2, 0)),
-    ((3, 2), (2, 1)),
-    ((3, 2), (2, 2)),
-    ((3, 2), (2, 3)),
-    ((3, 2), (2, 4)),
-    ((3, 2), (3, 0)),
-    ((3, 2), (3, 1)),
-    ((3, 2), (3, 2)),
-    ((3, 2), (3, 3)),
-    ((3, 2), (3, 4)),
-    ((3, 2), (4, 0)),
-    ((3, 2), (4, 1)),
-    ((3, 2), (4, 2)),
-    ((3, 2), (4, 3)),
-    ((3, 2), (4, 4)),
-    ((3, 3), (0, 0)),
-    ((3, 3), (0, 1)),
-    ((3, 3), (0, 2)),
-    ((3, 3), (0, 3)),
-    ((3, 3), (0, 4)),
-    ((3, 3), (1, 0)),
-    ((3, 3), (1, 1)),
-    ((3, 3), (1, 2)),
-    ((3, 3), (1, 3)),
-    ((3, 3), (1, 4)),
-    ((3, 3), (2, 0)),
-    ((3, 3), (2, 1)),
-    ((3, 3), (2, 2)),
-    ((3, 3), (2, 3)),
-    ((3, 3), (2, 4)),
-    ((3, 3), (3, 0)),
-    ((3, 3), (3, 1)),
-    ((3, 3), (3, 2)),
-    ((3, 3), (3, 3)),
-    ((3, 3), (3, 4)),
-    ((3, 3), (4, 0)),
-    ((3, 3), (4, 1)),
-    ((3, 3), (4, 2)),
-    ((3, 3), (4, 3)),
-    ((3, 3), (4, 4)),
-    ((3, 4), (0, 0)),
-    ((3, 4), (0, 1)),
-    ((3, 4), (0, 2)),
-    ((3, 4), (0, 3)),
-    ((3, 4), (0, 4)),
-    ((3, 4), (1, 0)),
-    ((3, 4), (1, 1)),
-    ((3, 4), (1, 2)),
-    ((3, 4), (1, 3)),
-    ((3, 4), (1, 4)),
-    ((3, 4), (2, 0)),
-    ((3, 4), (2, 1)),
-    ((3, 4), (2, 2)),
-    ((3, 4), (2, 3)),
-    ((3, 4), (2, 4)),
-    ((3, 4), (3, 0)),
-    ((3, 4), (3, 1)),
-    ((3, 4), (3, 2)),
-    ((3, 4), (3, 3)),
-    ((3, 4), (3, 4)),
-    ((3, 4), (4, 0)),
-    ((3, 4), (4, 1)),
-    ((3, 4), (4, 2)),
-    ((3, 4), (4, 3)),
-    ((3, 4), (4, 4)),
-    ((4, 0), (0, 0)),
-    ((4, 0), (0, 1)),
-    ((4, 0), (0, 2)),
-    ((4, 0), (0, 3)),
-    ((4, 0), (0, 4)),
-    ((4, 0), (1, 0)),
-    ((4, 0), (1, 1)),
-    ((4, 0), (1, 2)),
-    ((4, 0), (1, 3)),
-    ((4, 0), (1, 4)),
-    ((4, 0), (2, 0)),
-    ((4, 0), (2, 1)),
-    ((4, 0), (2, 2)),
-    ((4, 0), (2, 3)),
-    ((4, 0), (2, 4)),
-    ((4, 0), (3, 0)),
-    ((4, 0), (3, 1)),
-    ((4, 0), (3, 2)),
-    ((4, 0), (3, 3)),
-    ((4, 0), (3, 4)),
-    ((4, 0), (4, 0)),
-    ((4, 0), (4, 1)),
-    ((4, 0), (4, 2)),
-    ((4, 0), (4, 3)),
-    ((4, 0), (4, 4)),
-    ((4, 1), (0, 0)),
-    ((4, 1), (0, 1)),
-    ((4, 1), (0, 2)),
-    ((4, 1), (0, 3)),
-    ((4, 1), (0, 4)),
-    ((4, 1), (1, 0)),
-    ((4, 1), (1, 1)),
-    ((4, 1), (1, 2)),
-    ((4, 1), (1, 3)),
-    ((4, 1), (1, 4)),
-    ((4, 1), (2, 0)),
-    ((4, 1), (2, 1)),
-    ((4, 1), (2, 2)),
-    ((4, 1), (2, 3)),
-    ((4, 1), (2, 4)),
-    ((4, 1), (3, 0)),
-    ((4, 1), (3, 1)),
-    ((4, 1), (3, 2)),
-    ((4, 1), (3, 3)),
-    ((4, 1), (3, 4)),
-    ((4, 1), (4, 0)),
-    ((4, 1), (4, 1)),
-    ((4, 1), (4, 2)),
-    ((4, 1), (4, 3)),
-    ((4, 1), (4, 4)),
-    ((4, 2), (0, 0)),
-    ((4, 2), (0, 1)),
-    ((4, 2), (0, 2)),
-    ((4, 2), (0, 3)),
-    ((4, 2), (0, 4)),
-    ((4, 2), (1, 0)),
-    ((4, 2), (1, 1)),
-    ((4, 2), (1, 2)),
-    ((4, 2), (1, 3)),
-    ((4, 2), (1, 4)),
-    ((4, 2), (2, 0)),
-    ((4, 2), (2, 1)),
-    ((4, 2), (2, 2)),
-    ((4, 2), (2, 3)),
-    ((4, 2), (2, 4)),
-    ((4, 2), (3, 0)),
-    ((4, 2), (3, 1)),
-    ((4, 2), (3, 2)),
-    ((4, 2), (3, 3)),
-    ((4, 2), (3, 4)),
-    ((4, 2), (4, 0)),
-    ((4, 2), (4, 1)),
-    ((4, 2), (4, 2)),
-    ((4, 2), (4, 3)),
-    ((4, 2), (4, 4)),
-    ((4, 3), (0, 0)),
-    ((4, 3), (0, 1)),
-    ((4, 3), (0, 2)),
-    ((4, 3), (0, 3)),
-    ((4, 3), (0, 4)),
-    ((4, 3), (1, 0)),
-    ((4, 3), (1, 1)),
-    ((4, 3), (1, 2)),
-    ((4, 3), (1, 3)),
-    ((4, 3), (1, 4)),
-    ((4, 3), (2, 0)),
-    ((4, 3), (2, 1)),
-    ((4, 3), (2, 2)),
-    ((4, 3), (2, 3)),
-    ((4, 3), (2, 4)),
-    ((4, 3), (3, 0)),
-    ((4, 3), (3, 1)),
-    ((4, 3), (3, 2)),
-    ((4, 3), (3, 3)),
-    ((4, 3), (3, 4)),
-    ((4, 3), (4, 0)),
-    ((4, 3), (4, 1)),
-    ((4, 3), (4, 2)),
-    ((4, 3), (4, 3)),
-    ((4, 3), (4, 4)),
-    ((4, 4), (0, 0)),
-    ((4, 4), (0, 1)),
-    ((4, 4), (0, 2)),
-    ((4, 4), (0, 3)),
-    ((4, 4), (0, 4)),
-    ((4, 4), (1, 0)),
-    ((4, 4), (1, 1)),
-    ((4, 4), (1, 2)),
-    ((4, 4), (1, 3)),
-    ((4, 4), (1, 4)),
-    ((4, 4), (2, 0)),
-    ((4, 4), (2, 1)),
-    ((4, 4), (2, 2)),
-    ((4, 4), (2, 3)),
-    ((4, 4), (2, 4)),
-    ((4, 4), (3, 0)),
-    ((4, 4), (3, 1)),
-    ((4, 4), (3, 2)),
-    ((4, 4), (3, 3)),
-    ((4, 4), (3, 4)),
-    ((4, 4), (4, 0)),
-    ((4, 4), (4, 1)),
-    ((4, 4), (4, 2)),
-    ((4, 4), (4, 3)),
-    ((4, 4), (4, 4))]
\ No newline at end of file